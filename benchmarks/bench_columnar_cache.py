@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark and write check: memory-mapped columnar loads vs ``pd.read_csv``.
+
+On a seeded synthetic data/ directory (benchmarks/synthetic_data.py) every
+source is converted to its Feather copy once, then loaded three ways:
+
+  - read_csv:  ``pd.read_csv`` of the CSV (untyped)
+  - writable:  ``load_source(name, ...)`` - the default, a drop-in for
+               read_csv whose numeric / date columns are copied out of the map
+  - read-only: ``load_source(name, ..., writable=False)`` - zero-copy views
+
+Each writable frame gets an in-place write to every column kind (``df.loc[
+mask, col] = ...`` and ``df.iloc[0, k] = ...``); the writes must stick and a
+fresh load must not see them. The read-only frame must refuse the same write
+with ``ValueError`` instead of corrupting the shared map.
+
+Usage examples:
+  python benchmarks/bench_columnar_cache.py
+  python benchmarks/bench_columnar_cache.py --scale 10 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.sources import SOURCE_FILES, ColumnarCache  # noqa: E402
+from synthetic_data import generate_data_dir  # noqa: E402
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def write_first_rows(df: pd.DataFrame) -> dict:
+    """Overwrite the first row of every column in place (its own value type); returns what was written."""
+    written = {}
+    mask = np.zeros(len(df), dtype=bool)
+    mask[0] = True
+    for k, (col, dtype) in enumerate(df.dtypes.items()):
+        value = df[col].dropna().iloc[-1] if df[col].notna().any() else None
+        if value is None:
+            continue
+        if isinstance(dtype, np.dtype) and dtype.kind in "iuf":
+            df.loc[mask, col] = value
+        else:
+            df.iloc[0, k] = value
+        written[col] = value
+    return written
+
+
+def check_source(cache: ColumnarCache, name: str) -> bool:
+    df = cache.load(name)
+    if df.empty:
+        return True
+    written = write_first_rows(df)
+    stuck = all(df[col].iloc[0] == value for col, value in written.items())
+    fresh = cache.load(name)
+    before = cache.load(name, writable=False)
+    isolated = all(fresh[col].iloc[:1].equals(before[col].iloc[:1]) for col in written)
+
+    frozen = cache.load(name, writable=False)
+    numeric = [c for c, dtype in frozen.dtypes.items() if isinstance(dtype, np.dtype) and dtype.kind in "iuf"]
+    refused = True
+    if numeric:
+        try:
+            frozen.loc[frozen[numeric[0]].notna().to_numpy(), numeric[0]] = 0
+            refused = False
+        except ValueError:
+            pass
+    ok = stuck and isolated and refused
+    print(f"{'✅' if ok else '❌'} {name:<11} {len(written):>2} columns written in place "
+          f"({'kept' if stuck else 'LOST'}, {'isolated' if isolated else 'LEAKED into reloads'}); "
+          f"read-only load {'refuses' if refused else 'ACCEPTS'} writes")
+    return ok
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Columnar cache loads: writable vs read-only vs read_csv")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiple of the firm for the synthetic data")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic data seed")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is reported)")
+    args = parser.parse_args(argv)
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        counts = generate_data_dir(data_dir, args.scale, args.seed)
+        print(f"🧪 {args.scale:g}x: {counts['users']:,} users, {counts['bookings']:,} bookings, {counts['vacation']:,} leave rows")
+        cache = ColumnarCache(data_dir, os.path.join(tmp, "columnar"))
+        names = [n for n in SOURCE_FILES if os.path.exists(cache.csv_path(n))]
+        for name in names:
+            cache.ensure(name)
+
+        print(f"\n{'source':<11} {'read_csv':>9} {'writable':>9} {'read-only':>9}")
+        for name in names:
+            csv = best_of(lambda: pd.read_csv(cache.csv_path(name), low_memory=False), args.repeat)
+            writable = best_of(lambda: cache.load(name), args.repeat)
+            frozen = best_of(lambda: cache.load(name, writable=False), args.repeat)
+            print(f"{name:<11} {csv * 1000:>7.1f}ms {writable * 1000:>7.1f}ms {frozen * 1000:>7.1f}ms")
+
+        print()
+        for name in names:
+            ok &= check_source(cache, name)
+
+    print("\n✅ Loaded frames accept in-place writes; read-only loads refuse them" if ok else "\n❌ Columnar cache write check failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Parity check and benchmark: comp title override in Python vs. the SQL dataflow.
+
+Generates seeded synthetic ``namely_comp_data_history_w_notes`` and
+``namely_title_history_data_aq`` tables (title changes near, far from and on
+the same day as comp dates, NULL titles, other divisions, pre-2016 rows),
+runs SQL/comp_title_override_mysql57.sql unchanged on the SQLite stand-in and
+capacity.comp_titles.override_comp_titles in Python, checks the outputs are
+identical as multisets of rows and times both.
+
+Usage examples:
+  python benchmarks/bench_comp_title_override.py
+  python benchmarks/bench_comp_title_override.py --employees 200,2000 --sql-limit 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.comp_titles import OUTPUT_COLUMNS, override_comp_titles  # noqa: E402
+from capacity.sqlite_standin import connect, load_tables, run_sql  # noqa: E402
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SQL_PATH = os.path.join(PROJECT_ROOT, "SQL", "comp_title_override_mysql57.sql")
+TITLES = ["Associate", "Consultant", "Senior Consultant", "Manager", "Director", "Partner"]
+
+
+def _iso(days: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(days.astype("datetime64[D]"), unit="D").astype(object)
+
+
+def synthetic_tables(employees: int, seed: int = 11) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Comp history (~6 rows/employee) and title history (~4 changes/employee)."""
+    rng = np.random.default_rng(seed)
+    base = np.datetime64("2014-01-01")
+    emp_ids = np.array([f"EMP-{i:06d}" for i in range(employees)], dtype=object)
+
+    n_comp = employees * 6
+    comp_emp = rng.choice(emp_ids, n_comp)
+    start = base + rng.integers(0, 10 * 365, n_comp).astype("timedelta64[D]")
+    salary_start = start + rng.integers(0, 400, n_comp).astype("timedelta64[D]")
+    salary_start_text = _iso(salary_start)
+    salary_start_text[rng.random(n_comp) < 0.2] = None
+    comp = pd.DataFrame({
+        "Salary Currency": rng.choice(["USD", "AED"], n_comp),
+        "Office Location": rng.choice(["New York", "San Francisco", "UAE"], n_comp),
+        "Job Title": rng.choice(TITLES, n_comp),
+        "Division": rng.choice(["Consulting", "CONSULTING", "Operations"], n_comp, p=[0.6, 0.2, 0.2]),
+        "Salary Notes": rng.choice(["", "merit", "promotion"], n_comp),
+        "Start Date": _iso(start),
+        "Employee Number": comp_emp,
+        "Level": rng.integers(1, 8, n_comp),
+        "Salary End Date": None,
+        "Step": rng.integers(1, 4, n_comp),
+        "Salary Start Date": salary_start_text,
+        "Department": rng.choice(["Strategy", "Design"], n_comp),
+        "User Status": rng.choice(["Active Employee", "Inactive Employee"], n_comp),
+        "Last Name": "L" + pd.Series(comp_emp).str[-4:],
+        "Salary": rng.integers(60, 400, n_comp) * 1000,
+        "Type": "Salary",
+        "Employee Type": "Full Time",
+        "First Name": "F" + pd.Series(comp_emp).str[-4:],
+    })
+
+    # Title changes: some exactly on, some within 15 days of, comp dates
+    n_titles = employees * 4
+    title_emp = rng.choice(emp_ids, n_titles)
+    title_day = base + rng.integers(0, 11 * 365, n_titles).astype("timedelta64[D]")
+    near = rng.choice(n_comp, n_titles // 3)
+    near_day = (salary_start[near] + rng.integers(-20, 21, len(near)).astype("timedelta64[D]"))
+    titles = pd.DataFrame({
+        "Employee Number": np.concatenate([title_emp, comp_emp[near]]),
+        "Title Change Date": np.concatenate([_iso(title_day), _iso(near_day)]),
+        "Title": rng.choice(TITLES + [None], n_titles + len(near), p=[0.16] * 6 + [0.04]),
+    })
+    # Same-day duplicate changes exercise the SQL's row multiplication
+    dupes = titles.sample(frac=0.02, random_state=seed).assign(Title="Acting " + pd.Series(TITLES).sample(1, random_state=seed).iloc[0])
+    titles = pd.concat([titles, dupes], ignore_index=True)
+    return comp, titles
+
+
+def _canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """Everything as text, dates as YYYY-MM-DD, NULL as '', rows sorted."""
+    out = pd.DataFrame(index=range(len(df)))
+    for col in OUTPUT_COLUMNS:
+        values = df[col].reset_index(drop=True)
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.dt.strftime("%Y-%m-%d")
+        elif pd.api.types.is_float_dtype(values) and values.dropna().apply(float.is_integer).all():
+            values = values.astype("Int64")
+        out[col] = values.astype("string").fillna("")
+    return out.sort_values(list(OUTPUT_COLUMNS)).reset_index(drop=True)
+
+
+def run_python(comp: pd.DataFrame, titles: pd.DataFrame) -> Tuple[pd.DataFrame, float]:
+    t0 = time.perf_counter()
+    out = override_comp_titles(comp, titles)
+    return out, time.perf_counter() - t0
+
+
+def run_sqlite(comp: pd.DataFrame, titles: pd.DataFrame) -> Tuple[pd.DataFrame, float]:
+    conn = connect()
+    load_tables(conn, {"namely_comp_data_history_w_notes": comp, "namely_title_history_data_aq": titles})
+    with open(SQL_PATH, "r", encoding="utf-8") as f:
+        sql = f.read()
+    t0 = time.perf_counter()
+    out = run_sql(conn, sql)
+    seconds = time.perf_counter() - t0
+    conn.close()
+    return out, seconds
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Comp title override: Python as-of join vs SQL")
+    parser.add_argument("--employees", default="100,1000,10000", help="Comma-separated synthetic employee counts")
+    parser.add_argument("--sql-limit", type=int, default=10000, help="Largest employee count also run through SQLite")
+    args = parser.parse_args(argv)
+
+    print(f"{'employees':>10} {'comp rows':>10} {'out rows':>9} {'python s':>9} {'sqlite s':>9} {'parity':>7}")
+    failed = False
+    for n in [int(x) for x in args.employees.split(",") if x.strip()]:
+        comp, titles = synthetic_tables(n)
+        py, py_s = run_python(comp, titles)
+        sql_s, parity = float("nan"), "-"
+        if n <= args.sql_limit:
+            sql, sql_s = run_sqlite(comp, titles)
+            same = _canonical(py).equals(_canonical(sql))
+            parity = "✅" if same else "❌"
+            failed |= not same
+        print(f"{n:>10,} {len(comp):>10,} {len(py):>9,} {py_s:>9.3f} {sql_s:>9.3f} {parity:>7}")
+        counts = py["Title Match Strategy"].value_counts().to_dict()
+        print(f"{'':>10} strategies: {counts}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: watermark-based incremental refresh vs rebuilding from the full history.
+
+On a seeded synthetic data/ directory (benchmarks/synthetic_data.py) the
+Namely leave and Salesforce stores of capacity.incremental are built once,
+then a sequence of daily deltas is applied:
+
+  1. append:  a new batch that updates --delta-rows existing records (changed
+              days / schedules) and adds as many new ones
+  2. rerun:   the same batch id re-delivered with a newer _BATCH_LAST_RUN_
+              and only half of its rows (the other half must be retracted)
+  3. rewrite: the file rewritten with the same rows in another order (scan
+              mode, no rebuild)
+  4. remove:  the appended batches cut off again (history changed -> rebuild)
+
+After every step the incremental aggregate must equal a store rebuilt from
+scratch on the same file, and the refresh time is reported next to the
+rebuild time.
+
+Usage examples:
+  python benchmarks/bench_incremental.py
+  python benchmarks/bench_incremental.py --scale 10 --delta-rows 500
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.incremental import BATCH_ID, BATCH_LAST_RUN, INCREMENTAL_SPECS, IncrementalStore  # noqa: E402
+from synthetic_data import generate_data_dir  # noqa: E402
+
+
+def delta_batch(raw: pd.DataFrame, name: str, rows: int, batch_id: int, last_run: str, rng: np.random.Generator) -> pd.DataFrame:
+    """``rows`` updated copies of existing records plus ``rows`` brand-new ones, stamped as one batch."""
+    updated = raw.iloc[rng.choice(len(raw), min(rows, len(raw)), replace=False)].copy()
+    fresh = raw.iloc[rng.choice(len(raw), min(rows, len(raw)), replace=False)].copy()
+    if name == "vacation":
+        updated["Used"] = rng.integers(1, 6, len(updated)).astype(float)
+        fresh["Start date"] = (pd.Timestamp("2025-07-01") + pd.to_timedelta(rng.integers(0, 120, len(fresh)), unit="D")).strftime("%Y-%m-%d")
+        fresh["Departure date"] = None
+        fresh["Used"] = rng.integers(1, 4, len(fresh)).astype(float)
+    else:
+        # Re-scheduled engagements: every row of an updated engagement is re-sent
+        ids = updated["Engagement ID"].unique()
+        updated = raw[raw["Engagement ID"].isin(ids)].copy()
+        updated["Schedule Amount"] = (updated["Schedule Amount"] * rng.uniform(0.5, 1.5, len(updated))).round(2)
+        fresh["Engagement ID"] = [f"0063ZNEW{batch_id}{i:07d}" for i in range(len(fresh))]
+    out = pd.concat([updated, fresh], ignore_index=True)
+    out[BATCH_ID] = float(batch_id)
+    out[BATCH_LAST_RUN] = last_run
+    return out[raw.columns]
+
+
+def append_rows(path: str, rows: pd.DataFrame) -> None:
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        rows.to_csv(f, header=False, index=False, lineterminator="\n")
+
+
+def same_aggregate(a: pd.DataFrame, b: pd.DataFrame, name: str) -> bool:
+    spec = INCREMENTAL_SPECS[name]
+    group = list(spec.group)
+    a = a.sort_values(group).reset_index(drop=True)
+    b = b.sort_values(group).reset_index(drop=True)
+    if len(a) != len(b) or not a[group].astype("string").equals(b[group].astype("string")):
+        return False
+    measures = list(spec.measures)
+    return bool(np.allclose(a[measures].to_numpy(dtype=float), b[measures].to_numpy(dtype=float), rtol=1e-9, atol=1e-6))
+
+
+def check(store: IncrementalStore, name: str, data_dir: str, tmp: str, step: str) -> bool:
+    result = store.refresh(name)
+    fresh_dir = os.path.join(tmp, "fresh")
+    shutil.rmtree(fresh_dir, ignore_errors=True)
+    fresh = IncrementalStore(data_dir, fresh_dir)
+    t0 = time.perf_counter()
+    fresh.refresh(name)
+    rebuild = time.perf_counter() - t0
+    ok = same_aggregate(store.aggregate(name), fresh.aggregate(name), name)
+    speedup = rebuild / result.seconds if result.seconds else float("inf")
+    print(f"{'✅' if ok else '❌'} {step:<8} {result}  | rebuild {rebuild:.2f}s ({speedup:.1f}x)")
+    return ok
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Incremental batch refresh vs full rebuild, with parity checks")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiple of the firm for the synthetic data")
+    parser.add_argument("--delta-rows", type=int, default=200, help="Updated and new records per appended batch")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic data seed")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        counts = generate_data_dir(data_dir, args.scale, args.seed)
+        store = IncrementalStore(data_dir, os.path.join(tmp, "incremental"))
+        for name in INCREMENTAL_SPECS:
+            print(f"🧪 {name}: {counts[name]:,} rows at {args.scale:g}x")
+            path = store.csv_path(name)
+            with open(path, "rb") as f:
+                original = f.read()
+            raw = pd.read_csv(path, low_memory=False)
+
+            ok &= check(store, name, data_dir, tmp, "initial")
+            batch = delta_batch(raw, name, args.delta_rows, 500, "2025-08-01 06:00:00", rng)
+            append_rows(path, batch)
+            ok &= check(store, name, data_dir, tmp, "append")
+
+            rerun = batch.iloc[: len(batch) // 2].copy()
+            rerun[BATCH_LAST_RUN] = "2025-08-02 06:00:00"
+            append_rows(path, rerun)
+            ok &= check(store, name, data_dir, tmp, "rerun")
+
+            shuffled = pd.read_csv(path, low_memory=False).sample(frac=1.0, random_state=args.seed)
+            shuffled.to_csv(path, index=False, lineterminator="\n")
+            ok &= check(store, name, data_dir, tmp, "rewrite")
+
+            with open(path, "wb") as f:
+                f.write(original)
+            ok &= check(store, name, data_dir, tmp, "remove")
+            print()
+
+    print("✅ Incremental aggregates match full rebuilds" if ok else "❌ Incremental aggregates diverged")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark: blocked fuzzy name matching vs scoring all pairs.
+
+Users are distinct seeded names built from the benchmarks/synthetic_data.py
+name pools (plus the canonical nickname targets and surname variants), at
+--scale times the firm's 1,045 users. Leave-side names are derived from a
+sample of them with a known answer -
+preferred first names, an added middle name, "(Archived)" suffixes, accents,
+swapped order - plus decoys that belong to nobody. Both are matched against
+the users' folded names with capacity.name_matching:
+
+  - blocked:   NameMatcher (token blocks, capped block size)
+  - all pairs: the same scoring over the full cross product (skipped above
+               --all-pairs-limit pairs)
+
+Reports time and pairs scored, precision / recall against the known answers,
+and how many of the all-pairs matches blocking loses. A second blocked run
+must come entirely from the decision cache, and after one matched user
+leaves the roster only the names that had that user among their blocked
+candidates may be re-scored.
+
+Usage examples:
+  python benchmarks/bench_name_matching.py
+  python benchmarks/bench_name_matching.py --scale 10 --names 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.identity import PersonIndex, fold_name  # noqa: E402
+from capacity.name_matching import (  # noqa: E402
+    MATCH, NICKNAMES, NameMatcher, best_matches, candidate_pairs, name_tokens, score_pairs,
+)
+from synthetic_data import FIRST_NAMES, LAST_NAMES  # noqa: E402
+
+
+SHORT_FORMS = {canonical: short for short, canonical in NICKNAMES.items()}
+ACCENTS = str.maketrans({"a": "á", "e": "é", "o": "ö", "u": "ü", "c": "ç"})
+SURNAME_PREFIXES = ["", "Mc", "De ", "Van "]
+SURNAME_SUFFIXES = ["", "son", "berg", "ley", "field", "man", "ton", "ström", "ini", "ova"]
+FIRM_USERS = 1045
+
+
+def population(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """``n`` users with distinct first + last names."""
+    firsts = np.array(sorted(set(FIRST_NAMES) | {c.title() for c in NICKNAMES.values()}), dtype=object)
+    lasts = np.array([p + root + s for p in SURNAME_PREFIXES for root in LAST_NAMES for s in SURNAME_SUFFIXES], dtype=object)
+    n = min(n, len(firsts) * len(lasts))
+    combos = rng.choice(len(firsts) * len(lasts), n, replace=False)
+    return pd.DataFrame({
+        "first_name": firsts[combos // len(lasts)],
+        "last_name": lasts[combos % len(lasts)],
+        "email": [f"user{i}@example.com" for i in range(n)],
+    })
+
+
+def variants(users: pd.DataFrame, n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """``n`` leave-side names with the person_id they should match (-1 for decoys)."""
+    firsts = users["first_name"].astype(str).str.strip().to_numpy()
+    lasts = users["last_name"].astype(str).str.strip().to_numpy()
+    ids = users["person_id"].to_numpy()
+    pick = rng.integers(0, len(users), n)
+    kind = rng.choice(["nickname", "middle", "archived", "accents", "swapped", "decoy"], n)
+    names, truth = [], []
+    for i, k in zip(pick, kind):
+        first, last = firsts[i], lasts[i]
+        if k == "nickname":
+            name = f"{SHORT_FORMS.get(first.lower(), first)} {last}".title()
+        elif k == "middle":
+            name = f"{first} {firsts[rng.integers(0, len(firsts))]} {last}"
+        elif k == "archived":
+            name = f"{first} {last} (Archived)"
+        elif k == "accents":
+            name = f"{first} {last.translate(ACCENTS)}"
+        elif k == "swapped":
+            name = f"{last} {first}"
+        else:
+            name = f"{firsts[rng.integers(0, len(firsts))]} {lasts[rng.integers(0, len(lasts))]}zz"
+        names.append(name)
+        truth.append(-1 if k == "decoy" else ids[i])
+    return pd.DataFrame({"name": names, "kind": kind, "truth": truth})
+
+
+def quality(found: np.ndarray, truth: np.ndarray) -> tuple:
+    matched = found >= 0
+    correct = matched & (found == truth)
+    precision = correct.sum() / max(matched.sum(), 1)
+    recall = correct.sum() / max((truth >= 0).sum(), 1)
+    return precision, recall
+
+
+def blocked_names(names: pd.Index, candidates: pd.Series, matcher: NameMatcher) -> dict:
+    """Position of each name -> the candidate names it is blocked with."""
+    li, ri = candidate_pairs(name_tokens(names), name_tokens(candidates.index), matcher.max_block, matcher.block_tokens)
+    blocked = pd.Series(candidates.index.to_numpy(dtype=object)[ri]).groupby(li).agg(frozenset)
+    return blocked.to_dict()
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Blocked fuzzy name matching vs all pairs")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiple of the firm for the synthetic users")
+    parser.add_argument("--names", type=int, default=1000, help="Leave-side names to match")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic data seed")
+    parser.add_argument("--all-pairs-limit", type=int, default=20_000_000, help="Skip the all-pairs run above this many pairs")
+    parser.add_argument("--min-precision", type=float, default=0.95, help="Required precision of the blocked matcher")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        users = population(int(FIRM_USERS * args.scale), rng)
+        index = PersonIndex()
+        users["person_id"] = index.update_from_users(users)
+        candidates = NameMatcher.candidates_from_index(index)
+        cases = variants(users, args.names, rng)
+        print(f"🧪 {args.scale:g}x: {len(candidates):,} user names, {len(cases):,} leave names "
+              f"({(cases['truth'] < 0).sum():,} decoys)")
+
+        matcher = NameMatcher(os.path.join(tmp, "name_matches.json"))
+        t0 = time.perf_counter()
+        decisions = matcher.match(cases["name"], candidates).set_index("name")
+        blocked_seconds = time.perf_counter() - t0
+        matcher.save()
+        folded = fold_name(cases["name"])
+        accepted = decisions["person_id"].where(decisions["decision"] == MATCH, -1)
+        blocked = folded.map(accepted).fillna(-1).astype(np.int64).to_numpy()
+        precision, recall = quality(blocked, cases["truth"].to_numpy())
+        print(f"⚙️  blocked:   {blocked_seconds:6.2f}s  precision {precision:.3f}  recall {recall:.3f}")
+        for kind, group in cases.assign(found=blocked).groupby("kind"):
+            hit = (group["found"] == group["truth"]).mean()
+            print(f"     {kind:<9} {hit:6.1%} resolved correctly")
+
+        reopened = NameMatcher.open(matcher.path)
+        t0 = time.perf_counter()
+        reopened.match(cases["name"], candidates)
+        print(f"♻️  cached:    {time.perf_counter() - t0:6.2f}s  ({reopened.last_scored} names re-scored)")
+        ok = reopened.last_scored == 0 and precision >= args.min_precision
+
+        # Roster change: the user behind one accepted match leaves
+        gone = decisions.loc[decisions["decision"] == MATCH, "candidate"].iloc[0]
+        roster = candidates.drop(gone)
+        unique = pd.Index(folded.dropna().unique())
+        before = blocked_names(unique, candidates, matcher)
+        after = blocked_names(unique, roster, matcher)
+        expected = sum(before.get(i, frozenset()) != after.get(i, frozenset()) for i in range(len(unique)))
+        reopened.match(cases["name"], roster)
+        print(f"👋 roster:    1 user left, {reopened.last_scored} names re-scored ({expected} had them as a candidate)")
+        ok &= reopened.last_scored == expected
+
+        pairs = len(unique) * len(candidates)
+        if pairs <= args.all_pairs_limit:
+            left, right = name_tokens(unique), name_tokens(candidates.index)
+            li = np.repeat(np.arange(len(unique)), len(candidates))
+            ri = np.tile(np.arange(len(candidates)), len(unique))
+            t0 = time.perf_counter()
+            best = best_matches(score_pairs(left, right, li, ri), li, ri, len(unique))
+            all_seconds = time.perf_counter() - t0
+            strong = best[(best["score"] >= matcher.min_score) & (best["score"] - best["runner_up"] >= matcher.min_margin)]
+            all_pairs = pd.Series(candidates.to_numpy()[strong["right"]], index=unique[strong.index])
+            lost = int((decisions.loc[all_pairs.index, "person_id"] != all_pairs).sum())
+            print(f"🐢 all pairs: {all_seconds:6.2f}s  {pairs:,} pairs ({all_seconds / max(blocked_seconds, 1e-9):.1f}x slower), "
+                  f"{lost} of {len(all_pairs):,} matches lost to blocking")
+        else:
+            print(f"⏭️  all pairs: {pairs:,} pairs > --all-pairs-limit, skipped")
+
+    print("✅ Blocked matching is precise and cached" if ok else "❌ Name matching check failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Parity check and benchmark: Org Units interval index vs. the SQL lookups.
+
+Generates seeded synthetic ``employee_org_units_dept_div_loc`` rows (gaps,
+overlapping and open-ended assignments, Org Type aliases, mixed-case emails)
+and comp (email, date) pairs, then compares on the SQLite stand-in:
+
+  - ``Org Units Notes``: the CONCAT_WS expression taken verbatim from
+    SQL/misalignment_report_mysql57.sql vs capacity.org_units.org_units_notes
+  - the projection's Department match (latest start covering the date)
+    vs OrgUnitIndex.lookup
+
+Usage examples:
+  python benchmarks/bench_org_unit_index.py
+  python benchmarks/bench_org_unit_index.py --people 2000,100000 --sql-limit 2000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.org_units import OrgUnitIndex, org_units_notes  # noqa: E402
+from capacity.sqlite_standin import connect, load_tables, run_sql  # noqa: E402
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MISALIGNMENT_SQL = os.path.join(PROJECT_ROOT, "SQL", "misalignment_report_mysql57.sql")
+ORG_TYPES = ["Department", "Departments", "Division", "Divisions", "Office Location", "Location", "Office", "Team"]
+
+# The projection's dept_match + dept_ou joins, over distinct (email, date) pairs
+DEPARTMENT_MATCH_SQL = """
+SELECT p.`Work Email`, p.comp_effective_date, dept_ou.`Department`, dept_ou.start_date, dept_ou.end_date
+FROM (SELECT DISTINCT LOWER(TRIM(`Work Email`)) AS `Work Email`, comp_effective_date FROM comp) AS p
+LEFT JOIN (
+  SELECT p.`Work Email` AS work_email, p.comp_effective_date, MAX(r.start_date) AS matched_start_date
+  FROM (SELECT DISTINCT LOWER(TRIM(`Work Email`)) AS `Work Email`, comp_effective_date FROM comp) AS p
+  JOIN (
+    SELECT LOWER(TRIM(`Email`)) AS email, DATE(`Assignment Start Date`) AS start_date,
+           COALESCE(DATE(`Assignment End Date`), DATE('9999-12-31')) AS end_date
+    FROM `dataflow_schema`.`employee_org_units_dept_div_loc`
+    WHERE TRIM(`Org Type`) IN ('Department','Departments')
+  ) AS r ON LOWER(TRIM(p.`Work Email`)) = r.email
+  WHERE p.comp_effective_date BETWEEN r.start_date AND r.end_date
+  GROUP BY p.`Work Email`, p.comp_effective_date
+) AS dept_match
+  ON p.`Work Email` = dept_match.work_email AND p.comp_effective_date = dept_match.comp_effective_date
+LEFT JOIN (
+  SELECT LOWER(TRIM(`Email`)) AS email, DATE(`Assignment Start Date`) AS start_date,
+         DATE(`Assignment End Date`) AS end_date, `Org Unit` AS `Department`
+  FROM `dataflow_schema`.`employee_org_units_dept_div_loc`
+  WHERE TRIM(`Org Type`) IN ('Department','Departments')
+) AS dept_ou
+  ON dept_ou.email = p.`Work Email` AND dept_ou.start_date = dept_match.matched_start_date
+"""
+
+
+def _iso(days: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(days.astype("datetime64[D]"), unit="D").astype(object)
+
+
+def synthetic_tables(people: int, seed: int = 5) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Org Units (~9 assignments/person) and comp rows (~5/person)."""
+    rng = np.random.default_rng(seed)
+    emails = np.array([f"person{i}@sypartners.com" for i in range(people)], dtype=object)
+    base = np.datetime64("2015-01-01")
+
+    n = people * 9
+    owner = rng.choice(emails, n)
+    start = base + rng.integers(0, 9 * 365, n).astype("timedelta64[D]")
+    end = start + rng.integers(0, 3 * 365, n).astype("timedelta64[D]")
+    end_text = _iso(end)
+    end_text[rng.random(n) < 0.25] = None  # open-ended
+    start_text = _iso(start)
+    start_text[rng.random(n) < 0.01] = None
+    # Mixed case / padding exercises LOWER(TRIM()) on both sides
+    shout = rng.random(n) < 0.1
+    owner_text = owner.copy()
+    owner_text[shout] = [f"  {e.upper()} " for e in owner[shout]]
+    org_units = pd.DataFrame({
+        "Email": owner_text,
+        "Org Type": rng.choice(ORG_TYPES, n),
+        "Org Unit": rng.choice(["Strategy", "Design", "Consulting", "MLT", "New York", "UAE"], n),
+        "Assignment Start Date": start_text,
+        "Assignment End Date": end_text,
+    })
+
+    m = people * 5
+    comp_email = rng.choice(np.r_[emails, ["unknown@sypartners.com", "", None]], m).astype(object)
+    comp_date = _iso(base + rng.integers(-200, 10 * 365, m).astype("timedelta64[D]"))
+    comp_date[rng.random(m) < 0.01] = None
+    comp = pd.DataFrame({"Work Email": comp_email, "comp_effective_date": comp_date})
+    return org_units, comp
+
+
+def notes_sql() -> str:
+    """The ``Org Units Notes`` expression from the misalignment report, over a plain comp table."""
+    with open(MISALIGNMENT_SQL, "r", encoding="utf-8") as f:
+        text = f.read()
+    match = re.search(r"CONCAT_WS\('; ',.*?\)\s*AS `Org Units Notes`", text, re.S)
+    if match is None:
+        raise ValueError(f"Org Units Notes expression not found in {MISALIGNMENT_SQL}")
+    return f"SELECT c.`Work Email`, c.comp_effective_date, {match.group(0)} FROM comp c"
+
+
+def _text(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values = values.dt.strftime("%Y-%m-%d")
+    return values.astype("string").fillna("")
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Org Units interval index vs SQL EXISTS / BETWEEN lookups")
+    parser.add_argument("--people", default="200,500,20000", help="Comma-separated synthetic people counts")
+    parser.add_argument("--sql-limit", type=int, default=500, help="Largest people count also run through SQLite")
+    args = parser.parse_args(argv)
+
+    print(f"{'people':>8} {'org rows':>9} {'comp rows':>10} {'index s':>8} {'notes s':>8} {'lookup s':>9} {'sqlite s':>9} {'parity':>7}")
+    failed = False
+    for n in [int(x) for x in args.people.split(",") if x.strip()]:
+        org_units, comp = synthetic_tables(n)
+
+        t0 = time.perf_counter()
+        index = OrgUnitIndex(org_units)
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        notes = org_units_notes(index, comp["Work Email"], comp["comp_effective_date"])
+        notes_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        resolved = index.resolve(comp["Work Email"], comp["comp_effective_date"])
+        lookup_s = time.perf_counter() - t0
+
+        sql_s, parity = float("nan"), "-"
+        if n <= args.sql_limit:
+            conn = connect(schemas=["dataflow_schema"])
+            load_tables(conn, {"comp": comp, "dataflow_schema.employee_org_units_dept_div_loc": org_units})
+            t0 = time.perf_counter()
+            sql_notes = run_sql(conn, notes_sql())
+            sql_dept = run_sql(conn, DEPARTMENT_MATCH_SQL)
+            sql_s = time.perf_counter() - t0
+            conn.close()
+
+            same_notes = _text(sql_notes["Org Units Notes"]).equals(_text(notes.reset_index(drop=True)))
+            ours = pd.concat([comp, resolved[["Department", "Department Start Date", "Department End Date"]]], axis=1)
+            ours["Work Email"] = ours["Work Email"].astype("string").str.strip().str.lower()
+            ours = ours.drop_duplicates(["Work Email", "comp_effective_date"])
+            keys = ["Work Email", "comp_effective_date"]
+            # SQL joins every assignment sharing the matched start; compare on pairs without ties
+            tied = sql_dept.duplicated(keys, keep=False)
+            merged = sql_dept[~tied].merge(ours, on=keys, how="inner", validate="one_to_one")
+            same_dept = all(
+                _text(merged[a]).equals(_text(merged[b]))
+                for a, b in [("Department_x", "Department_y"), ("start_date", "Department Start Date"), ("end_date", "Department End Date")]
+            )
+            same = same_notes and same_dept
+            parity = "✅" if same else "❌"
+            failed |= not same
+        print(f"{n:>8,} {len(org_units):>9,} {len(comp):>10,} {build_s:>8.3f} {notes_s:>8.3f} {lookup_s:>9.3f} {sql_s:>9.3f} {parity:>7}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Monte Carlo pipeline forecast.
+
+Times capacity.forecast.forecast_pipeline on the real Salesforce export (when
+present) and on seeded synthetic opportunity histories of growing size, and
+checks that the simulated mean converges to the probability-weighted demand.
+
+Usage examples:
+  python benchmarks/bench_pipeline_forecast.py
+  python benchmarks/bench_pipeline_forecast.py --engagements 500,5000,20000 --trials 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.forecast import forecast_pipeline, schedule_matrix, simulate_demand  # noqa: E402
+
+
+REGIONS = ["US", "Abu Dhabi", "East", "Europe", "West", "KSA", "Japan"]
+PROBABILITIES = ["100%", "0%", "90%", "65%", "50%", "25%"]
+
+
+def synthetic_opportunities(engagements: int, seed: int = 7) -> pd.DataFrame:
+    """Engagements with 1-12 consecutive schedule months each, like the export."""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 13, size=engagements)
+    first = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 72, size=engagements) * 31, unit="D")
+    eng = np.repeat(np.arange(engagements), lengths)
+    offset = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    months = (first.to_period("M")[eng] + offset).to_timestamp()
+    return pd.DataFrame({
+        "Engagement ID": pd.Series(eng).map("ENG{:07d}".format),
+        "Probability": np.repeat(rng.choice(PROBABILITIES, size=engagements, p=[0.6, 0.05, 0.1, 0.05, 0.1, 0.1]), lengths),
+        "Schedule Month": months,
+        "Schedule Amount": rng.gamma(2.0, 60_000, size=len(eng)).round(2),
+        "Region": np.repeat(rng.choice(REGIONS, size=engagements), lengths),
+    })
+
+
+def check_mean(df: pd.DataFrame, trials: int) -> float:
+    """Largest relative gap between the simulated mean and the expected demand."""
+    schedules = schedule_matrix(df, start=df["Schedule Month"].min(), months=None)
+    expected = schedules.committed + schedules.probability @ schedules.amounts
+    mean = simulate_demand(schedules, trials=trials).mean(axis=0)
+    scale = max(float(np.abs(expected).max()), 1.0)
+    return float(np.abs(mean - expected).max() / scale)
+
+
+def time_forecast(df: pd.DataFrame, trials: int, repeats: int = 3) -> float:
+    start = pd.to_datetime(df["Schedule Month"], errors="coerce").min()
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        forecast_pipeline(df, start=start, months=None, trials=trials)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv: Optional[list] = None) -> int:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Benchmark the Monte Carlo pipeline forecast")
+    parser.add_argument("--engagements", default="500,5000,20000", help="Comma-separated synthetic engagement counts")
+    parser.add_argument("--trials", type=int, default=20_000)
+    parser.add_argument("--salesforce-csv", default=os.path.join(project_root, "data", "Salesforce Opportunity Data.csv"))
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.salesforce_csv):
+        real = pd.read_csv(args.salesforce_csv)
+        print(f"📊 Full history ({len(real):,} rows, {real['Engagement ID'].nunique():,} engagements): "
+              f"{time_forecast(real, args.trials):.3f}s for {args.trials:,} trials")
+
+    print(f"\n{'engagements':>12} {'rows':>10} {'seconds':>9} {'mean gap':>9}")
+    for n in [int(x) for x in args.engagements.split(",") if x.strip()]:
+        df = synthetic_opportunities(n)
+        gap = check_mean(df, trials=min(args.trials, 20_000))
+        print(f"{n:>12,} {len(df):>10,} {time_forecast(df, args.trials):>9.3f} {gap:>9.2%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
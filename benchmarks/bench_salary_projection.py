@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Parity check and benchmark: local salary projection engine vs the SQL.
+
+Loads the seeded synthetic input tables of bench_staged_projection.py into
+the SQLite stand-in, runs Consultants_Salary_Data_projection.SQL (or its
+``_staged`` variant with --staged) and compares the result with
+capacity.salary_projection.SalaryProjection.project on the same frames:
+
+  - filtered:  the SQL as shipped (hard-coded Employee Number list) vs
+               ``project(employees=...)`` with the ids parsed from the SQL
+  - all:       the SQL without that filter vs ``project()``
+
+Rows are compared as a multiset (neither side has an ORDER BY) after
+normalizing dates to ISO text and amounts to cents. Also times the monthly
+salary series and checks no person-month is covered by more than its days.
+
+Usage examples:
+  python benchmarks/bench_salary_projection.py
+  python benchmarks/bench_salary_projection.py --employees 1200,5000 --staged
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_staged_projection import EMPLOYEE_FILTER, MONOLITHIC, STAGED, load_query, synthetic_tables  # noqa: E402
+from capacity.salary_projection import OUTPUT_COLUMNS, SalaryProjection, monthly_salary  # noqa: E402
+from capacity.sql_export import result_statement, run_statements, split_statements  # noqa: E402
+from capacity.sqlite_standin import connect, load_tables  # noqa: E402
+from capacity.vacation import month_grid  # noqa: E402
+
+
+def with_edge_cases(tables: dict) -> dict:
+    """
+    Philosophy rows the synthetic table lacks: ISO and lower-case month
+    dates, blank / unparseable ends, cents and stray text in the amount,
+    lower-case and oddly spaced title / department lists.
+    """
+    extra = pd.DataFrame({
+        "Roles/ Titles": ["senior consultant,Manager", "Director ,  Partner", "Associate, Consultant"],
+        "Department": ["consulting", "Strategy,Consulting", "Design, Consulting"],
+        "Level": [" 3", "5 ", "1"],
+        "Step": ["2", " 1", "3"],
+        "Annual Salary\\nUSD": ["$101,250.75", "n/a", "88000 USD"],
+        "Salary Start Effective Date": ["2019-06-01", "march 1, 2018", "Feb 1, 2022"],
+        "Salary End Effective Date": ["", "2020-13-40", None],
+    })
+    philosophy = tables["dataflow_schema.consulting_comp_philosophy"]
+    return {**tables, "dataflow_schema.consulting_comp_philosophy": pd.concat([philosophy, extra], ignore_index=True)}
+
+
+DATE_COLUMNS = [c for c in OUTPUT_COLUMNS if c.endswith("Date") or c.endswith("Date (Used)")]
+AMOUNT_COLUMNS = ["Salary", "Target Annual Salary USD"]
+
+
+def normalized(df: pd.DataFrame) -> pd.DataFrame:
+    """Every column as text (ISO dates, amounts to cents, NULL as ''), rows sorted."""
+    out = pd.DataFrame(index=df.index)
+    for col in OUTPUT_COLUMNS:
+        if col in DATE_COLUMNS:
+            text = pd.to_datetime(df[col], errors="coerce").dt.strftime("%Y-%m-%d")
+        elif col in AMOUNT_COLUMNS:
+            text = pd.to_numeric(df[col], errors="coerce").round(2).map(lambda v: f"{v:.2f}", na_action="ignore")
+        else:
+            text = df[col].astype("string")
+        out[col] = text.astype("string").fillna("")
+    return out.sort_values(list(OUTPUT_COLUMNS)).reset_index(drop=True)
+
+
+def run_projection_sql(conn, sql: str) -> pd.DataFrame:
+    """Setup statements of a staged script first, then the final SELECT into a frame."""
+    statements = split_statements(sql)
+    at = result_statement(statements)
+    run_statements(conn, statements[:at])
+    cursor = conn.execute(statements[at])
+    rows = pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+    run_statements(conn, statements[at + 1:])
+    return rows
+
+
+def compare(label: str, expected: pd.DataFrame, actual: pd.DataFrame, sql_seconds: float, seconds: float) -> bool:
+    a, b = normalized(expected), normalized(actual)
+    same = a.equals(b)
+    detail = ""
+    if not same:
+        if len(a) != len(b):
+            detail = f" (SQL {len(a):,} rows, engine {len(b):,})"
+        else:
+            diff = [c for c in OUTPUT_COLUMNS if not a[c].equals(b[c])]
+            detail = f" (columns differ: {', '.join(diff)})"
+    speedup = sql_seconds / seconds if seconds > 0 else float("inf")
+    print(f"{'✅' if same else '❌'} {label:<9} {len(expected):>9,} rows  SQL {sql_seconds:8.2f}s  "
+          f"engine {seconds:6.2f}s  ({speedup:,.0f}x){detail}")
+    return same
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Salary projection engine vs Consultants_Salary_Data_projection.SQL on SQLite")
+    parser.add_argument("--employees", default="1200", help="Comma-separated synthetic employee counts (>= 1179 keeps the filtered ids)")
+    parser.add_argument("--staged", action="store_true", help="Run the _staged SQL variant (same rows, much faster on SQLite)")
+    parser.add_argument("--months", type=int, default=120, help="Months in the monthly salary series (from 2016-01)")
+    args = parser.parse_args(argv)
+
+    sql_path = STAGED if args.staged else MONOLITHIC
+    filtered_sql = load_query(sql_path, all_employees=False)
+    all_sql = load_query(sql_path, all_employees=True)
+    ids = re.findall(r"'([^']+)'", EMPLOYEE_FILTER.search(filtered_sql).group(0))
+    print(f"🧪 {os.path.basename(sql_path)}, filter {', '.join(ids)}")
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(x) for x in args.employees.split(",") if x.strip()]:
+            tables = with_edge_cases(synthetic_tables(n))
+            db, schema_db = os.path.join(tmp, f"main_{n}.db"), os.path.join(tmp, f"dataflow_{n}.db")
+            conn = connect(db, {"dataflow_schema": schema_db})
+            load_tables(conn, tables)
+            conn.close()
+            comp_rows = len(tables["namely_comp_data_history_w_notes"])
+
+            t0 = time.perf_counter()
+            projection = SalaryProjection.from_tables(tables)
+            build = time.perf_counter() - t0
+            print(f"\n👥 {n:,} employees, {comp_rows:,} comp rows; engine inputs indexed in {build:.2f}s")
+
+            for label, sql, employees in (("filtered", filtered_sql, ids), ("all", all_sql, None)):
+                conn = connect(db, {"dataflow_schema": schema_db})
+                t0 = time.perf_counter()
+                expected = run_projection_sql(conn, sql)
+                sql_seconds = time.perf_counter() - t0
+                conn.close()
+                t0 = time.perf_counter()
+                actual = projection.project(employees=employees)
+                ok &= compare(label, expected, actual, sql_seconds, time.perf_counter() - t0)
+
+            months = month_grid("2016-01-01", args.months)
+            t0 = time.perf_counter()
+            monthly = monthly_salary(actual, months)
+            seconds = time.perf_counter() - t0
+            covered = monthly.groupby(["Employee Number", "Month"])["Covered_Days"].sum()
+            within = bool((covered <= covered.index.get_level_values("Month").days_in_month).all())
+            ok &= within
+            print(f"{'✅' if within else '❌'} monthly   {len(monthly):>9,} person-months in {seconds:.2f}s, "
+                  f"{'no' if within else 'some'} month covered twice; "
+                  f"{monthly['Monthly Salary'].sum():,.0f} total salary")
+
+    print("\n✅ Engine matches the projection SQL" if ok else "\n❌ Salary projection parity failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Benchmark: staged (indexed temporary tables) vs monolithic salary projection.
+
+Builds a seeded SQLite database with synthetic ``namely_comp_data_history_w_notes``,
+``namely_title_history_data_aq``, ``dataflow_schema.employee_org_units_dept_div_loc``
+and ``dataflow_schema.consulting_comp_philosophy`` tables, runs
+Consultants_Salary_Data_projection.SQL and its ``_staged`` variant through
+capacity.sql_export.stream_query on the SQLite stand-in, times both and checks
+the exported CSVs are byte-identical once their lines are sorted (neither query
+has an ORDER BY).
+
+The projection ends with a hard-coded ``Employee Number IN (...)`` filter;
+--all-employees strips it from both queries for a parity check over every row.
+
+Usage examples:
+  python benchmarks/bench_staged_projection.py
+  python benchmarks/bench_staged_projection.py --employees 200,500 --all-employees
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.sql_export import stream_query  # noqa: E402
+from capacity.sqlite_standin import connect, load_tables  # noqa: E402
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MONOLITHIC = os.path.join(PROJECT_ROOT, "Consulting Salary History for Modeling", "Consultants_Salary_Data_projection.SQL")
+STAGED = os.path.join(PROJECT_ROOT, "Consulting Salary History for Modeling", "Consultants_Salary_Data_projection_staged.SQL")
+TITLES = ["Associate", "Consultant", "Senior Consultant", "Manager", "Director", "Partner"]
+EMPLOYEE_FILTER = re.compile(r"\n\s*AND c\.`Employee Number` IN \([^)]*\)")
+
+
+def _iso(days: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(days.astype("datetime64[D]"), unit="D").astype(object)
+
+
+def synthetic_tables(employees: int, seed: int = 17) -> dict:
+    rng = np.random.default_rng(seed)
+    base = np.datetime64("2014-01-01")
+    emp = np.array([f"EMP-{i:06d}" for i in range(employees)], dtype=object)
+    email = np.array([f"person{i}@sypartners.com" for i in range(employees)], dtype=object)
+
+    n = employees * 6
+    who = rng.integers(0, employees, n)
+    start = base + rng.integers(0, 10 * 365, n).astype("timedelta64[D]")
+    salary_start = _iso(start + rng.integers(0, 400, n).astype("timedelta64[D]"))
+    salary_start[rng.random(n) < 0.2] = None
+    salary_end = _iso(start + rng.integers(200, 900, n).astype("timedelta64[D]"))
+    salary_end[rng.random(n) < 0.5] = None
+    work_email = email[who].copy()
+    shout = rng.random(n) < 0.1
+    work_email[shout] = [f" {e.upper()} " for e in work_email[shout]]
+    work_email[rng.random(n) < 0.03] = None
+    comp = pd.DataFrame({
+        "Salary Currency": rng.choice(["USD", "AED"], n),
+        "Job Title": rng.choice(TITLES, n),
+        "Division": rng.choice(["Consulting", "CONSULTING", "Operations"], n, p=[0.6, 0.2, 0.2]),
+        "Salary Notes": rng.choice(["", "merit", "promotion"], n),
+        "Start Date": _iso(start),
+        "Employee Number": emp[who],
+        "Work Email": work_email,
+        "Level": rng.integers(1, 6, n).astype(str),
+        "Salary End Date": salary_end,
+        "Step": rng.integers(1, 4, n).astype(str),
+        "Salary Start Date": salary_start,
+        "User Status": rng.choice(["Active Employee", "Inactive Employee"], n),
+        "Last Name": "L" + pd.Series(emp[who]).str[-4:],
+        "Salary": rng.integers(60, 400, n) * 1000,
+        "Type": "Salary",
+        "Employee Type": "Full Time",
+        "First Name": "F" + pd.Series(emp[who]).str[-4:],
+    })
+
+    m = employees * 4
+    twho = rng.integers(0, employees, m)
+    term = _iso(base + rng.integers(0, 12 * 365, m).astype("timedelta64[D]"))
+    term[rng.random(m) < 0.7] = None
+    titles = pd.DataFrame({
+        "Employee Number": emp[twho],
+        "Title Change Date": _iso(base + rng.integers(0, 11 * 365, m).astype("timedelta64[D]")),
+        "Title": rng.choice(TITLES + [None], m, p=[0.16] * 6 + [0.04]),
+        "Termination Date": term,
+        "Preferred First Name": rng.choice(["Sam", "Alex", None], m),
+    })
+    dupes = titles.sample(frac=0.02, random_state=seed).assign(Title="Acting Manager")
+    titles = pd.concat([titles, dupes], ignore_index=True)
+
+    k = employees * 9
+    owner = rng.integers(0, employees, k)
+    ou_start = base + rng.integers(-365, 10 * 365, k).astype("timedelta64[D]")
+    ou_end = _iso(ou_start + rng.integers(0, 3 * 365, k).astype("timedelta64[D]"))
+    ou_end[rng.random(k) < 0.25] = None
+    org_type = rng.choice(["Department", "Division", "Divisions", "Office Location", "Office"], k)
+    unit = np.where(
+        np.isin(org_type, ["Division", "Divisions"]),
+        rng.choice(["Consulting", "MLT", "Operations"], k, p=[0.7, 0.1, 0.2]),
+        rng.choice(["Strategy", "Design", "Consulting", "New York", "UAE"], k),
+    )
+    org_units = pd.DataFrame({
+        "Email": email[owner],
+        "Org Type": org_type,
+        "Org Unit": unit,
+        "Assignment Start Date": _iso(ou_start),
+        "Assignment End Date": ou_end,
+    })
+
+    rows = []
+    for year, (start_text, end_text) in enumerate([("January 1, 2016", "December 31, 2020"), ("Jan 1, 2021", None)]):
+        for level in range(1, 6):
+            for step in range(1, 4):
+                salary = 70_000 + level * 25_000 + step * 5_000 + year * 4_000
+                rows.append({
+                    "Roles/ Titles": ", ".join(TITLES[max(level - 1, 0):level + 1]),
+                    "Department": "Consulting, Strategy" if step != 2 else "Design",
+                    "Level": str(level),
+                    "Step": str(step),
+                    "Annual Salary\\nUSD": f"${salary:,}",
+                    "Salary Start Effective Date": start_text,
+                    "Salary End Effective Date": end_text,
+                })
+    philosophy = pd.DataFrame(rows)
+
+    return {
+        "namely_comp_data_history_w_notes": comp,
+        "namely_title_history_data_aq": titles,
+        "dataflow_schema.employee_org_units_dept_div_loc": org_units,
+        "dataflow_schema.consulting_comp_philosophy": philosophy,
+    }
+
+
+def load_query(path: str, all_employees: bool) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        sql = f.read()
+    return EMPLOYEE_FILTER.sub("", sql) if all_employees else sql
+
+
+def sorted_lines(path: str) -> bytes:
+    with open(path, "rb") as f:
+        header, *rows = f.read().splitlines()
+    return b"\n".join([header] + sorted(rows))
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Staged vs monolithic Consultants_Salary_Data_projection on SQLite")
+    parser.add_argument("--employees", default="1200", help="Comma-separated synthetic employee counts (>= 1179 keeps the filtered ids)")
+    parser.add_argument("--all-employees", action="store_true", help="Drop the hard-coded Employee Number filter from both queries")
+    args = parser.parse_args(argv)
+
+    monolithic = load_query(MONOLITHIC, args.all_employees)
+    staged = load_query(STAGED, args.all_employees)
+    if args.all_employees and (EMPLOYEE_FILTER.search(monolithic) or EMPLOYEE_FILTER.search(staged)):
+        print("Error: could not strip the Employee Number filter", file=sys.stderr)
+        return 2
+
+    print(f"{'employees':>10} {'comp rows':>10} {'out rows':>9} {'monolithic s':>13} {'staged s':>9} {'speedup':>8} {'parity':>7}")
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(x) for x in args.employees.split(",") if x.strip()]:
+            db, schema_db = os.path.join(tmp, f"main_{n}.db"), os.path.join(tmp, f"dataflow_{n}.db")
+            tables = synthetic_tables(n)
+            conn = connect(db, {"dataflow_schema": schema_db})
+            load_tables(conn, tables)
+            conn.close()
+
+            timings, outputs = {}, {}
+            for name, sql in (("monolithic", monolithic), ("staged", staged)):
+                conn = connect(db, {"dataflow_schema": schema_db})
+                path = os.path.join(tmp, f"{name}_{n}.csv")
+                t0 = time.perf_counter()
+                stats = stream_query(conn, sql, path)
+                timings[name] = time.perf_counter() - t0
+                conn.close()
+                outputs[name] = (stats.rows, sorted_lines(path))
+
+            same = outputs["monolithic"] == outputs["staged"]
+            failed |= not same
+            comp_rows = len(tables["namely_comp_data_history_w_notes"])
+            speedup = timings["monolithic"] / timings["staged"] if timings["staged"] > 0 else float("nan")
+            print(f"{n:>10,} {comp_rows:>10,} {outputs['staged'][0]:>9,} {timings['monolithic']:>13.2f} "
+                  f"{timings['staged']:>9.2f} {speedup:>7.1f}x {'✅' if same else '❌':>7}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: every notebook stage on synthetic data at 1x / 10x / 100x the firm.
+
+For each scale, benchmarks/synthetic_data.py writes a seeded, referentially
+consistent data/ directory (users, bookings, Org Units, Namely leave,
+Salesforce schedules) and the stages below run on it through the same
+capacity/ functions the notebook and capacity.stages use:
+
+  - ingest_sources:          rebuilding the typed Feather copies of the CSVs (capacity.sources)
+  - booking_user_merge:      person index, role filter and streamed booking merge (Cell 5)
+  - org_units_merge:         Org Units normalization and merge onto users and bookings (Cell 5b)
+  - vacation_months:         leadership leave rows (exact + fuzzy person match), coalesced spans and their month split (Cell 7)
+  - working_hours:           business-day calendar and available hours per user and month
+  - salesforce_aggregation:  schedule matrix and P10/P50/P90 demand per month and region
+
+Each stage is timed --repeat times (best kept) and then run once more under
+tracemalloc for its peak Python heap. Results are compared with the JSON
+baseline (benchmarks/bench_stages_baseline.json by default); a stage that got
+slower or bigger than --tolerance (and past a small noise floor) is flagged
+and the script exits 1. --update-baseline records the current results
+instead. Baselines are machine specific: re-record them when the hardware
+changes.
+
+Usage examples:
+  python benchmarks/bench_stages.py
+  python benchmarks/bench_stages.py --scales 1,10,100 --repeat 1
+  python benchmarks/bench_stages.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity import stages  # noqa: E402
+from capacity.forecast import forecast_pipeline  # noqa: E402
+from capacity.sources import SOURCE_FILES, ColumnarCache, read_source_csv  # noqa: E402
+from capacity.workdays import CapacityCalendar, region_for_location  # noqa: E402
+from synthetic_data import generate_data_dir  # noqa: E402
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "bench_stages_baseline.json")
+# Differences below these are noise, whatever the relative change
+NOISE_SECONDS = 0.05
+NOISE_MIB = 5.0
+HORIZON_MONTHS = 12
+
+
+def _csv(ctx: dict, name: str) -> str:
+    return os.path.join(ctx["data_dir"], SOURCE_FILES[name])
+
+
+def ingest_sources(ctx: dict) -> int:
+    cache = ColumnarCache(ctx["data_dir"])
+    for name in ("users", "org_units", "vacation", "salesforce"):
+        cache.build(name)
+    return sum(cache.load(name).shape[0] for name in ("users", "org_units", "vacation", "salesforce"))
+
+
+def booking_user_merge(ctx: dict) -> int:
+    index_path = os.path.join(ctx["work_dir"], "person_index.json")
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    ctx["person_index"] = stages.person_index(_csv(ctx, "users"), index_path)
+    ctx["users"] = stages.filtered_users(_csv(ctx, "users"), ctx["person_index"], stages.DEFAULT_SELECTED_ROLES)
+    ctx["bookings"] = stages.bookings(_csv(ctx, "bookings"), ctx["users"])
+    return len(ctx["bookings"])
+
+
+def org_units_merge(ctx: dict) -> int:
+    org = stages.org_units(_csv(ctx, "org_units"), ctx["person_index"])
+    ctx["users_with_org"] = stages.users_with_org(ctx["users"], org)
+    return len(stages.bookings_with_org(ctx["bookings"], org))
+
+
+def vacation_months(ctx: dict) -> int:
+    matches_path = os.path.join(ctx["work_dir"], "name_matches.json")
+    if os.path.exists(matches_path):
+        os.remove(matches_path)
+    detail = stages.vacation_detail(_csv(ctx, "vacation"), ctx["users"], ctx["person_index"], matches_path)
+    spans = stages.vacation_spans(detail, stages.LEAVE_PRECEDENCE)
+    return len(stages.vacation_monthly(detail, spans, 4))
+
+
+def working_hours(ctx: dict) -> int:
+    calendar = CapacityCalendar.from_data_dir(ctx["data_dir"])
+    users = ctx["users"]
+    last = min(region.last_day for region in calendar.regions.values())
+    months = pd.date_range(end=pd.Timestamp(last).to_period("M").to_timestamp(), periods=HORIZON_MONTHS, freq="MS")
+    regions = np.repeat(region_for_location(users["location"]).to_numpy(dtype=object), len(months))
+    starts = np.tile(months.to_numpy(), len(users))
+    ends = np.tile((months + pd.offsets.MonthEnd(0)).to_numpy(), len(users))
+    hours = calendar.available_hours(regions, starts, ends)
+    return int(np.isfinite(hours).sum())
+
+
+def salesforce_aggregation(ctx: dict) -> int:
+    salesforce = read_source_csv(_csv(ctx, "salesforce"))
+    last = pd.to_datetime(salesforce["Schedule Month"], errors="coerce").max()
+    start = last - pd.DateOffset(months=HORIZON_MONTHS - 1)
+    return len(forecast_pipeline(salesforce, start=start, months=HORIZON_MONTHS, trials=2_000))
+
+
+STAGES: Dict[str, Callable[[dict], int]] = {
+    "ingest_sources": ingest_sources,
+    "booking_user_merge": booking_user_merge,
+    "org_units_merge": org_units_merge,
+    "vacation_months": vacation_months,
+    "working_hours": working_hours,
+    "salesforce_aggregation": salesforce_aggregation,
+}
+
+
+def run_scale(scale: float, repeat: int, seed: int) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        t0 = time.perf_counter()
+        counts = generate_data_dir(data_dir, scale, seed)
+        print(f"🧪 {scale:g}x: generated {counts['users']:,} users, {counts['bookings']:,} bookings, "
+              f"{counts['vacation']:,} leave rows, {counts['salesforce']:,} schedule rows "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+        ctx = {"data_dir": data_dir, "work_dir": tmp}
+        timings: Dict[str, List[float]] = {name: [] for name in STAGES}
+        rows: Dict[str, int] = {}
+        for _ in range(repeat):
+            for name, stage in STAGES.items():
+                t0 = time.perf_counter()
+                rows[name] = stage(ctx)
+                timings[name].append(time.perf_counter() - t0)
+
+        for name, stage in STAGES.items():
+            tracemalloc.start()
+            stage(ctx)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results[name] = {"seconds": round(min(timings[name]), 4), "peak_mib": round(peak / 2**20, 2), "rows": rows[name]}
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Human-readable regressions of ``current`` against ``baseline`` (same scale and stage only)."""
+    problems = []
+    for scale, stages_now in current.items():
+        for name, now in stages_now.items():
+            then = baseline.get(scale, {}).get(name)
+            if then is None:
+                continue
+            for metric, floor in (("seconds", NOISE_SECONDS), ("peak_mib", NOISE_MIB)):
+                if now[metric] > then[metric] * (1 + tolerance) and now[metric] - then[metric] > floor:
+                    problems.append(f"{scale} {name}: {metric} {then[metric]:g} -> {now[metric]:g}")
+            if now["rows"] != then["rows"]:
+                problems.append(f"{scale} {name}: rows {then['rows']:,} -> {now['rows']:,}")
+    return problems
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time and memory-profile every pipeline stage on synthetic data")
+    parser.add_argument("--scales", default="1,10", help="Comma-separated multiples of the firm (e.g. 1,10,100)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; the best is kept")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic data seed")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative slowdown / growth (default: 0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    current: Dict[str, dict] = {}
+    for scale in [float(x) for x in args.scales.split(",") if x.strip()]:
+        key = f"{scale:g}x"
+        current[key] = run_scale(scale, max(args.repeat, 1), args.seed)
+        print(f"{'stage':<24} {'seconds':>8} {'peak MiB':>9} {'rows':>12}")
+        for name, r in current[key].items():
+            print(f"{name:<24} {r['seconds']:>8.3f} {r['peak_mib']:>9.1f} {r['rows']:>12,}")
+        print()
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f).get("scales", {})
+        baseline.update(current)
+        payload = {
+            "recorded": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "seed": args.seed,
+            "scales": baseline,
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+            f.write("\n")
+        print(f"📝 Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    problems = compare(current, baseline.get("scales", {}), args.tolerance)
+    if problems:
+        print(f"❌ {len(problems)} regression(s) vs baseline recorded {baseline.get('recorded', '?')}:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print(f"✅ No regressions vs baseline recorded {baseline.get('recorded', '?')} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: buffered ``pd.read_sql`` export vs streaming batch export.
+
+Fills a temporary SQLite database with a seeded comp-report-shaped table
+(text, dates, integers, decimals and NULLs), then for each size exports it
+with ``pd.read_sql`` + ``to_csv`` and with capacity.sql_export.stream_query in
+every format. Reports rows/s and peak Python heap (tracemalloc) and checks the
+streamed files read back to the same rows as the buffered frame.
+
+Usage examples:
+  python benchmarks/bench_streaming_export.py
+  python benchmarks/bench_streaming_export.py --rows 100000,2000000 --batch-size 50000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.sql_export import FORMATS, stream_query  # noqa: E402
+
+
+QUERY = "SELECT * FROM report"
+
+
+def build_database(path: str, rows: int, seed: int = 3) -> None:
+    rng = np.random.default_rng(seed)
+    day = np.datetime64("2016-01-01") + rng.integers(0, 3650, rows).astype("timedelta64[D]")
+    notes = rng.choice(np.array(["", "missing work email", "no Department covering comp date", None], dtype=object), rows)
+    frame = pd.DataFrame({
+        "Employee Number": [f"EMP-{i:06d}" for i in rng.integers(0, max(rows // 6, 1), rows)],
+        "Job Title": rng.choice(["Associate", "Consultant", "Manager", "Director", "Partner"], rows),
+        "Comp Effective Date": np.datetime_as_string(day, unit="D"),
+        "Days From Prior": np.where(rng.random(rows) < 0.2, np.nan, rng.integers(0, 900, rows)),
+        "Salary": np.round(rng.uniform(60_000, 400_000, rows), 2),
+        "Org Units Notes": notes,
+    })
+    conn = sqlite3.connect(path)
+    frame.to_sql("report", conn, index=False, chunksize=100_000)
+    conn.close()
+
+
+def measure(fn: Callable[[], int]) -> Tuple[int, float, float]:
+    """(rows, seconds, peak MiB of Python allocations)."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows = fn()
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows, seconds, peak / 2**20
+
+
+def read_back(path: str, fmt: str) -> pd.DataFrame:
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Buffered vs streaming SQL export")
+    parser.add_argument("--rows", default="50000,500000", help="Comma-separated table sizes")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Rows per fetchmany batch")
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>10} {'mode':>16} {'seconds':>8} {'rows/s':>10} {'peak MiB':>9} {'parity':>7}")
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(x) for x in args.rows.split(",") if x.strip()]:
+            db = os.path.join(tmp, f"report_{n}.db")
+            build_database(db, n)
+
+            buffered_path = os.path.join(tmp, "buffered.csv")
+
+            def buffered() -> int:
+                conn = sqlite3.connect(db)
+                df = pd.read_sql(QUERY, conn)
+                conn.close()
+                df.to_csv(buffered_path, index=False)
+                return len(df)
+
+            rows, seconds, peak = measure(buffered)
+            print(f"{rows:>10,} {'read_sql+to_csv':>16} {seconds:>8.2f} {rows / seconds:>10,.0f} {peak:>9.1f} {'-':>7}")
+            expected = pd.read_csv(buffered_path)
+
+            for fmt, ext in FORMATS.items():
+                path = os.path.join(tmp, f"streamed{ext}")
+
+                def streamed() -> int:
+                    conn = sqlite3.connect(db)
+                    stats = stream_query(conn, QUERY, path, fmt=fmt, batch_size=args.batch_size)
+                    conn.close()
+                    return stats.rows
+
+                rows, seconds, peak = measure(streamed)
+                got = read_back(path, fmt)
+                if fmt == "parquet":
+                    # Parquet keeps NULL vs '' apart; CSV cannot
+                    got["Org Units Notes"] = got["Org Units Notes"].replace("", np.nan)
+                same = len(got) == len(expected) and got.astype(str).equals(expected.astype(str))
+                failed |= not same
+                print(f"{rows:>10,} {'stream ' + fmt:>16} {seconds:>8.2f} {rows / seconds:>10,.0f} {peak:>9.1f} {'✅' if same else '❌':>7}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized leave-to-month expansion against the original loop.
+
+Generates seeded synthetic leave records (Start date / Departure date), checks
+that capacity.vacation.expand_leave_to_months matches the notebook's
+iterrows loop on a small sample, then times the vectorized engine at growing
+record counts and horizons.
+
+Usage examples:
+  python benchmarks/bench_vacation_overlap.py
+  python benchmarks/bench_vacation_overlap.py --rows 100000,1000000,5000000 --horizons 4,12,36
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.vacation import expand_leave_to_months, month_grid  # noqa: E402
+
+
+def synthetic_leave(rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = np.datetime64("2019-01-01")
+    start = base + rng.integers(0, 6 * 365, size=rows).astype("timedelta64[D]")
+    length = rng.integers(0, 21, size=rows).astype("timedelta64[D]")
+    departure = start + length
+    # Roughly a third of Namely rows have no departure date (single-day leave)
+    departure[rng.random(rows) < 0.3] = np.datetime64("NaT")
+    return pd.DataFrame({
+        "Full Name": rng.integers(0, max(rows // 20, 1), size=rows).astype(str),
+        "Start date": start,
+        "Departure date": departure,
+        "Used": rng.integers(1, 10, size=rows).astype(float),
+    })
+
+
+def loop_reference(df: pd.DataFrame, date_range: pd.DatetimeIndex) -> List[tuple]:
+    """The original notebook loop, reduced to the (row, month) pairs it emits."""
+    pairs = []
+    for pos, (_, row) in enumerate(df.iterrows()):
+        start_date = row["Start date"]
+        departure_date = row["Departure date"]
+        if pd.isna(start_date):
+            continue
+        end_date = departure_date if pd.notna(departure_date) else start_date
+        for month_start in date_range:
+            month_end = month_start + pd.offsets.MonthEnd(0)
+            if start_date <= month_end and end_date >= month_start:
+                pairs.append((pos, month_start))
+    return pairs
+
+
+def check_parity(rows: int = 2000) -> None:
+    df = synthetic_leave(rows, seed=1)
+    grid = month_grid("2021-03-01", 18)
+    expected = loop_reference(df, grid)
+    out = expand_leave_to_months(df.assign(_pos=np.arange(len(df))), grid)
+    actual = list(zip(out["_pos"].tolist(), out["Month"].tolist()))
+    if actual != expected:
+        raise SystemExit(f"Parity check failed: {len(actual)} vectorized vs {len(expected)} loop pairs")
+    print(f"✅ Parity with loop reference on {rows:,} rows ({len(expected):,} pairs)")
+
+
+def time_loop(rows: int, horizon: int) -> float:
+    df = synthetic_leave(rows)
+    grid = month_grid("2019-01-01", horizon)
+    t0 = time.perf_counter()
+    loop_reference(df, grid)
+    return time.perf_counter() - t0
+
+
+def time_vectorized(rows: int, horizon: int, repeats: int = 3) -> tuple:
+    df = synthetic_leave(rows)
+    grid = month_grid("2019-01-01", horizon)
+    best = float("inf")
+    out_rows = 0
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = expand_leave_to_months(df, grid)
+        best = min(best, time.perf_counter() - t0)
+        out_rows = len(out)
+    return best, out_rows
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark leave-to-month expansion")
+    parser.add_argument("--rows", default="10000,100000,1000000,3000000", help="Comma-separated record counts")
+    parser.add_argument("--horizons", default="4,12,36", help="Comma-separated month horizons")
+    parser.add_argument("--loop-rows", type=int, default=5000, help="Record count for the loop baseline (0 to skip)")
+    args = parser.parse_args(argv)
+
+    rows_list = [int(v) for v in args.rows.split(",") if v.strip()]
+    horizons = [int(v) for v in args.horizons.split(",") if v.strip()]
+
+    check_parity()
+
+    if args.loop_rows:
+        elapsed = time_loop(args.loop_rows, 4)
+        vec, _ = time_vectorized(args.loop_rows, 4)
+        print(f"\nLoop baseline, {args.loop_rows:,} rows × 4 months: {elapsed:.3f}s "
+              f"(vectorized {vec * 1000:.1f} ms, {elapsed / vec:,.0f}x faster)")
+
+    print(f"\n{'rows':>12} {'months':>7} {'pairs':>12} {'seconds':>9} {'rows/s':>14}")
+    for rows in rows_list:
+        for horizon in horizons:
+            elapsed, out_rows = time_vectorized(rows, horizon)
+            print(f"{rows:>12,} {horizon:>7} {out_rows:>12,} {elapsed:>9.3f} {rows / elapsed:>14,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
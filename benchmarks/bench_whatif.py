@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memoized what-if queries vs rebuilding the role-filtered cube.
+
+On a seeded synthetic data/ directory (benchmarks/synthetic_data.py) the
+role-independent ``capacity_cube`` stage is built once (cold, then from the
+pipeline cache) and wrapped in capacity.whatif.CapacityQuery. Then:
+
+  - parity:  for several role sets the query totals must equal a cube built
+             the notebook way for just those roles (Cell 5 role filter,
+             bookings, leave, Cell 10 build_cube) over the same months
+  - leave:   the selected roles' vacation_days must equal the coalesced
+             ``vacation_monthly`` stage over its window (hours as days), so
+             overlapping leave rows are not counted twice in the cube
+  - window:  a query without ``start`` covers the cube's last months, and one
+             entirely past the cube warns instead of silently coming back empty
+  - latency: --queries random what-ifs (role subsets, start months, 3-12
+             month horizons, group_by axes) timed cold, then replayed with
+             the arguments spelled differently - every replay must be a
+             cache hit
+
+Usage examples:
+  python benchmarks/bench_whatif.py
+  python benchmarks/bench_whatif.py --scale 10 --queries 500
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import warnings
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity import stages  # noqa: E402
+from capacity.cube import AXES, build_cube  # noqa: E402
+from capacity.sources import SOURCE_FILES, read_source_csv  # noqa: E402
+from capacity.whatif import DEFAULT_CACHE_SIZE, CapacityQuery  # noqa: E402
+from capacity.workdays import CapacityCalendar  # noqa: E402
+from synthetic_data import generate_data_dir  # noqa: E402
+
+
+def role_filtered_cube(pipeline, roles, months):
+    """The notebook path for one role set: filtered users -> bookings, leave -> build_cube."""
+    data_dir = pipeline.data_dir
+    csv = {name: os.path.join(data_dir, file) for name, file in SOURCE_FILES.items()}
+    index = pipeline.run("person_index")["person_index"]
+    org = pipeline.run("org_units")["org_units"]
+    users = stages.users_with_org(stages.filtered_users(csv["users"], index, roles), org)
+    return build_cube(
+        users,
+        months=months,
+        bookings=stages.bookings(csv["bookings"], users),
+        vacation=stages.vacation_detail(csv["vacation"], users, index, pipeline.params["name_matches_path"]),
+        salesforce=read_source_csv(csv["salesforce"]),
+        calendar=CapacityCalendar.from_data_dir(data_dir),
+        person_index=index,
+        leave_precedence=pipeline.params["leave_precedence"],
+    )
+
+
+def coalesced_leave_days(pipeline) -> pd.Series:
+    """Month -> Days_Used + Days_Scheduled of the vacation_spans / vacation_monthly stages (hours converted by coalesce_leave)."""
+    detail = pipeline.run("vacation_detail")["vacation_detail"]
+    spans = stages.vacation_spans(detail, pipeline.params["leave_precedence"])
+    monthly = stages.vacation_monthly(detail, spans, pipeline.params["horizon_months"])
+    return (monthly["Days_Used"] + monthly["Days_Scheduled"]).groupby(monthly["Month"]).sum()
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Memoized what-if capacity queries: parity and latency")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiple of the firm for the synthetic data")
+    parser.add_argument("--seed", type=int, default=7, help="Synthetic data and query seed")
+    parser.add_argument("--queries", type=int, default=200, help="Random what-if queries to time")
+    parser.add_argument("--role-sets", type=int, default=3, help="Random role sets checked against a role-filtered rebuild")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        counts = generate_data_dir(data_dir, args.scale, args.seed)
+        print(f"🧪 {args.scale:g}x: {counts['users']:,} users, {counts['bookings']:,} bookings, {counts['vacation']:,} leave rows")
+        pipeline = stages.build_pipeline(data_dir, os.path.join(tmp, "cache", "pipeline"), verbose=False)
+
+        t0 = time.perf_counter()
+        pipeline.run("capacity_cube")
+        cold = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        capacity = CapacityQuery.from_pipeline(pipeline)
+        warm = time.perf_counter() - t0
+        cube = capacity.cube
+        print(f"🧊 capacity_cube: {cube} built in {cold:.2f}s, loaded from cache in {warm:.2f}s")
+
+        roles = list(cube.attributes["role"].cat.categories)
+        role_sets = [list(stages.DEFAULT_SELECTED_ROLES)] + [
+            list(rng.choice(roles, rng.integers(1, len(roles) + 1), replace=False)) for _ in range(args.role_sets)
+        ]
+        start, months = cube.months[max(len(cube.months) - 12, 0)], 12
+        for role_set in role_sets:
+            t0 = time.perf_counter()
+            expected = role_filtered_cube(pipeline, role_set, cube.months).select(start=start, months=months).totals()
+            rebuild = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            actual = capacity(roles=role_set, start=start, months=months).set_index("Month")[list(cube.metrics)]
+            query = time.perf_counter() - t0
+            same = expected.shape == actual.shape and np.allclose(expected.to_numpy(), actual.to_numpy(), rtol=1e-5, atol=1e-3)
+            ok &= same
+            print(f"{'✅' if same else '❌'} {len(role_set)} roles: rebuild {rebuild:6.2f}s, query {query * 1000:7.2f}ms "
+                  f"({rebuild / max(query, 1e-9):,.0f}x) - totals {'match' if same else 'differ'}")
+
+        expected = coalesced_leave_days(pipeline)
+        actual = capacity(roles=pipeline.params["selected_roles"], start=expected.index.min(), months=len(expected),
+                          metrics=["vacation_days"]).set_index("Month")["vacation_days"]
+        same = expected.index.equals(actual.index) and np.allclose(expected.to_numpy(), actual.to_numpy(), rtol=1e-5, atol=1e-3)
+        ok &= same
+        print(f"{'✅' if same else '❌'} leave: {actual.sum():,.1f} cube vacation days vs {expected.sum():,.1f} "
+              f"in vacation_monthly over {len(expected)} months")
+
+        default = capacity(months=4)["Month"]
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            outside = capacity(start=cube.months[-1] + pd.DateOffset(years=5), months=4)
+        same = list(default) == list(cube.months[-4:]) and outside.empty and any(w.category is UserWarning for w in caught)
+        ok &= same
+        print(f"{'✅' if same else '❌'} window: default covers {default.min():%Y-%m} to {default.max():%Y-%m} "
+              f"(cube ends {cube.months[-1]:%Y-%m}); a window past the cube {'warns' if caught else 'is SILENTLY empty'}")
+
+        queries = []
+        for _ in range(args.queries):
+            subset = list(rng.choice(roles, rng.integers(1, len(roles) + 1), replace=False))
+            first = cube.months[rng.integers(0, len(cube.months))]
+            group_by = [None, "role", *AXES][rng.integers(0, len(AXES) + 2)]
+            queries.append((subset, first, int(rng.integers(3, 13)), group_by))
+
+        # Room for every query, so the replay measures hits rather than LRU eviction
+        capacity = CapacityQuery(cube, maxsize=max(len(queries), DEFAULT_CACHE_SIZE))
+        t0 = time.perf_counter()
+        for subset, first, horizon, group_by in queries:
+            capacity(roles=subset, start=first, months=horizon, group_by=group_by)
+        cold = (time.perf_counter() - t0) / len(queries)
+        misses = capacity.cache_info().misses
+
+        t0 = time.perf_counter()
+        for subset, first, horizon, group_by in queries:
+            # Same questions, spelled the way a dashboard might: other case and order, a date string
+            capacity(roles=[r.lower() for r in reversed(subset)], start=f"{first:%Y-%m}-15", months=horizon, group_by=group_by)
+        replay = (time.perf_counter() - t0) / len(queries)
+        info = capacity.cache_info()
+        cached = info.misses == misses
+        ok &= cached
+        print(f"⚡ {len(queries)} what-ifs: {cold * 1000:.2f}ms each cold, {replay * 1e6:.0f}µs each replayed "
+              f"({info.hits} hits, {info.misses - misses} extra misses)")
+
+    print("✅ What-if queries match role-filtered rebuilds and replay from cache" if ok else "❌ What-if check failed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
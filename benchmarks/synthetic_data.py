@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic copies of the data/ sources at any multiple of the firm's size.
+
+``generate_data_dir(path, scale)`` writes a data directory laid out exactly like
+data/ (file names from capacity.sources.SOURCE_FILES) so the notebook stages
+can be pointed at it unchanged:
+
+  - ``10k Users.csv``: FIRM_USERS * scale users with unique id, email,
+    employee number, role and office location
+  - ``10k Data for S3 (1).csv``: BOOKINGS_PER_USER booking rows per user
+    (dates, hours, client/project), ``user_id`` taken from the users
+  - ``Employee Org Units (Dept, Div, Loc).csv``: one row per user email (with
+    case / whitespace noise and a few unknown emails)
+  - ``Namely Vacation and Leave Dataset.csv``: leave rows whose Employee
+    Number / Full Name belong to the users (a few unmatched)
+  - ``Salesforce Opportunity Data.csv``: monthly schedules for engagements
+    whose Primary Partner is one of the users
+  - the two Working Hours files, copied from data/ (they do not scale)
+
+1x matches the current exports (about 1,000 users, 18k leave rows, 1.8k
+Salesforce schedule rows). The same seed and scale always give the same files.
+
+Usage examples:
+  python benchmarks/synthetic_data.py /tmp/synthetic_10x --scale 10
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.sources import SOURCE_FILES  # noqa: E402
+from capacity.stages import VACATION_CATEGORIES  # noqa: E402
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRM_USERS = 1_045
+BOOKINGS_PER_USER = 160
+LEAVE_PER_USER = 17
+ENGAGEMENTS_PER_USER = 0.55
+SCHEDULE_MONTHS = (1, 6)
+
+ROLES = {
+    "Design": 0.20, "Strategy": 0.12, "Program Management": 0.09, "Principal": 0.07,
+    "Studio": 0.05, "Tech": 0.05, "xRegular": 0.07, "Admin": 0.05, "Facilities": 0.03,
+    "Talent": 0.03, "xDirector": 0.04, "xSenior": 0.04, "Leadfully": 0.03, "xAssociate": 0.03,
+    "Finance": 0.04, "Exec and Team": 0.06,
+}
+LOCATIONS = {
+    "NY Perm": 0.26, "xNew York Consulting": 0.16, "NY Flex": 0.16, "xSan Francisco Consulting": 0.14,
+    "SF Perm": 0.07, "SF Flex": 0.05, "Abu Dhabi | Flex": 0.06, "Abu Dhabi | Perm": 0.04,
+    "xNon-billable": 0.03, "Remote": 0.03,
+}
+DEPARTMENTS = ["Design", "Strategy", "Program Management", "Studio", "Tech", "People", "Finance"]
+DIVISIONS = ["Consulting", "Operations", "MLT", "Internal Partners"]
+REGIONS = {"US": 0.46, "Abu Dhabi": 0.19, "East": 0.18, "Europe": 0.08, "West": 0.04, "KSA": 0.03, "Japan": 0.02}
+PROBABILITIES = {"100%": 0.85, "0%": 0.06, "90%": 0.03, "25%": 0.03, "50%": 0.02, "75%": 0.01}
+FIRST_NAMES = np.array([
+    "Sabrina", "Kath", "Alma", "Jordan", "Priya", "Mateo", "Aisha", "Noah", "Elena", "Omar",
+    "Grace", "Hiro", "Zoë", "Renée", "Luis", "Fatima", "Chen", "Ana", "Björn", "Maya",
+], dtype=object)
+LAST_NAMES = np.array([
+    "Clark", "Horton", "Puškar", "Nguyen", "Patel", "García", "Khan", "Smith", "Rossi", "Haddad",
+    "Kim", "Tanaka", "Müller", "Dubois", "López", "Ali", "Wang", "Silva", "Öberg", "Cohen",
+], dtype=object)
+LEAVE_TYPES = np.array([t for members in VACATION_CATEGORIES.values() for t in members], dtype=object)
+
+BASE_DAY = np.datetime64("2014-01-01")
+LAST_DAY = np.datetime64("2025-06-30")
+
+
+def _choice(rng: np.random.Generator, weights: Dict[str, float], n: int) -> np.ndarray:
+    keys = np.array(list(weights), dtype=object)
+    p = np.array(list(weights.values()), dtype=float)
+    return rng.choice(keys, n, p=p / p.sum())
+
+
+def _days(rng: np.random.Generator, lo: np.datetime64, hi: np.datetime64, n: int) -> np.ndarray:
+    span = int((hi - lo).astype(int))
+    return lo + rng.integers(0, span + 1, n).astype("timedelta64[D]")
+
+
+def _iso(days: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(days.astype("datetime64[D]"), unit="D").astype(object)
+
+
+def users_frame(rng: np.random.Generator, n: int) -> pd.DataFrame:
+    ids = 70_000 + np.arange(n)
+    first = rng.choice(FIRST_NAMES, n)
+    last = rng.choice(LAST_NAMES, n)
+    created = _days(rng, BASE_DAY, LAST_DAY - 365, n)
+    terminated = _iso(created + rng.integers(200, 3000, n).astype("timedelta64[D]"))
+    terminated[rng.random(n) < 0.7] = None
+    return pd.DataFrame({
+        "id": ids,
+        "first_name": first,
+        "last_name": last,
+        "display_name": first + " " + last,
+        "email": [f"{f[0].lower()}{i}@sypartners.com" for f, i in zip(first, ids)],
+        "employee_number": [f"EMP-{i:06d}" for i in range(n)],
+        "role": _choice(rng, ROLES, n),
+        "discipline": rng.choice(["Managing Partner", "Deputy", "Consultant", "Designer", "Producer"], n),
+        "location": _choice(rng, LOCATIONS, n),
+        "billable": rng.random(n) < 0.8,
+        "billability_target": rng.choice([80.0, 90.0, 100.0], n),
+        "hire_date": _iso(created),
+        "termination_date": terminated,
+        "created_at": _iso(created),
+        "updated_at": _iso(_days(rng, LAST_DAY - 900, LAST_DAY, n)),
+        "type": "User",
+        "license_type": rng.choice(["licensed", None], n, p=[0.9, 0.1]),
+        "_BATCH_ID_": 115.0,
+        "_BATCH_LAST_RUN_": "2025-06-29 04:27:10",
+    })
+
+
+def bookings_frame(rng: np.random.Generator, users: pd.DataFrame, per_user: int) -> pd.DataFrame:
+    n = len(users) * per_user
+    who = rng.integers(0, len(users), n)
+    scheduled = np.round(rng.uniform(0, 9, n), 2)
+    incurred = np.where(rng.random(n) < 0.7, np.round(scheduled * rng.uniform(0.6, 1.2, n), 2), 0.0)
+    project = rng.integers(0, max(len(users) // 3, 1), n)
+    return pd.DataFrame({
+        "user_id": users["id"].to_numpy()[who],
+        "assignable_id": 900_000 + project,
+        "client": np.char.add("Client ", (project % 400).astype(str)).astype(object),
+        "project_name": np.char.add("Project ", project.astype(str)).astype(object),
+        "phase_name": rng.choice(["Discovery", "Design", "Delivery", None], n),
+        "date": _iso(_days(rng, np.datetime64("2022-01-01"), LAST_DAY, n)),
+        "incurred_hours": incurred,
+        "scheduled_hours": scheduled,
+        "total_hours": np.round(incurred + scheduled, 2),
+    })
+
+
+def org_units_frame(rng: np.random.Generator, users: pd.DataFrame) -> pd.DataFrame:
+    n = len(users)
+    email = users["email"].to_numpy(dtype=object).copy()
+    noisy = rng.random(n) < 0.1
+    email[noisy] = [f" {e.upper()} " for e in email[noisy]]
+    unknown = rng.random(n) < 0.03
+    email[unknown] = [f"former{i}@sypartners.com" for i in np.flatnonzero(unknown)]
+    office = np.where(
+        users["location"].str.contains("Abu Dhabi").to_numpy(), "Abu Dhabi",
+        np.where(users["location"].str.contains("SF|San Francisco").to_numpy(), "San Francisco", "New York"),
+    )
+    return pd.DataFrame({
+        "Email": email,
+        "Department": rng.choice(DEPARTMENTS, n),
+        "Division": rng.choice(DIVISIONS, n, p=[0.7, 0.2, 0.05, 0.05]),
+        "Office Location": office,
+    })
+
+
+def vacation_frame(rng: np.random.Generator, users: pd.DataFrame, per_user: int) -> pd.DataFrame:
+    n = len(users) * per_user
+    who = rng.integers(0, len(users), n)
+    employee = users["employee_number"].to_numpy(dtype=object)[who].copy()
+    first = users["first_name"].to_numpy(dtype=object)[who]
+    last = users["last_name"].to_numpy(dtype=object)[who]
+    full = first + " " + last
+    unmatched = rng.random(n) < 0.04
+    employee[unmatched] = [f"EMP-9{i:06d}" for i in np.flatnonzero(unmatched)]
+    full[unmatched] = "Former Employee"
+    start = _days(rng, np.datetime64("2021-01-01"), LAST_DAY, n)
+    departure = _iso(start + rng.integers(0, 15, n).astype("timedelta64[D]"))
+    departure[rng.random(n) < 0.6] = None
+    used = np.where(rng.random(n) < 0.6, rng.integers(0, 10, n), 0).astype(float)
+    scheduled = np.where(rng.random(n) < 0.3, rng.integers(0, 5, n), 0).astype(float)
+    return pd.DataFrame({
+        "User status": rng.choice(["Active Employee", "Inactive Employee"], n, p=[0.85, 0.15]),
+        "Scheduled From Accrued": 0.0,
+        "Employee Type": "Staff Full Time",
+        "Used": used,
+        "Departments": rng.choice(DEPARTMENTS, n),
+        "Type": rng.choice(LEAVE_TYPES, n),
+        "Employee Number": employee,
+        "Departure date": departure,
+        "Full Name": full,
+        "Start date": _iso(start),
+        "Office Location": rng.choice(["New York", "UAE", "Remote", "San Francisco", "Los Angeles"], n),
+        "Job Title": rng.choice(["Director", "Senior Consultant", "Partner", "Producer"], n),
+        "Accrual Year": start.astype("datetime64[Y]").astype(int) + 1970,
+        "Units": rng.choice(["days", "hours"], n, p=[0.9, 0.1]),
+        "Scheduled": scheduled,
+        "First Name": first,
+        "Last Name": last,
+        "_BATCH_ID_": 37.0,
+        "_BATCH_LAST_RUN_": "2025-05-25 22:14:06",
+        "Month": None,
+    })
+
+
+def salesforce_frame(rng: np.random.Generator, users: pd.DataFrame, engagements_per_user: float) -> pd.DataFrame:
+    engagements = max(int(len(users) * engagements_per_user), 1)
+    months = rng.integers(SCHEDULE_MONTHS[0], SCHEDULE_MONTHS[1] + 1, engagements)
+    launch = _days(rng, np.datetime64("2019-01-01"), LAST_DAY, engagements).astype("datetime64[M]")
+    fee = np.round(rng.uniform(20_000, 900_000, engagements), 2)
+    partner = users["display_name"].to_numpy(dtype=object)[rng.integers(0, len(users), engagements)]
+    region = _choice(rng, REGIONS, engagements)
+    probability = _choice(rng, PROBABILITIES, engagements)
+    industry = rng.choice(["Consulting & Professional Services", "Technology", "Retail", "Health"], engagements)
+
+    eng = np.repeat(np.arange(engagements), months)
+    offset = np.arange(len(eng)) - np.repeat(np.cumsum(months) - months, months)
+    schedule_month = launch[eng] + offset.astype("timedelta64[M]")
+    end = launch + (months - 1).astype("timedelta64[M]")
+    return pd.DataFrame({
+        "Probability": probability[eng],
+        "Account Name": np.char.add("Account ", (eng % 700).astype(str)).astype(object),
+        "Engagement Name": np.char.add("Engagement ", eng.astype(str)).astype(object),
+        "Created Date": _iso(launch[eng].astype("datetime64[D]") - 30),
+        "Schedule Month": _iso(schedule_month.astype("datetime64[D]")),
+        "Region": region[eng],
+        "Schedule Amount": np.round(fee[eng] / months[eng] * rng.uniform(0.8, 1.2, len(eng)), 2),
+        "Engagement Launch Date": _iso(launch[eng].astype("datetime64[D]")),
+        "Primary Partner": partner[eng],
+        "Fee": fee[eng],
+        "Engagement ID": np.char.add("0063Z", np.char.zfill(eng.astype(str), 10)).astype(object),
+        "Engagement End Date": _iso((end[eng] + 1).astype("datetime64[D]") - 1),
+        "Industry": industry[eng],
+        "_BATCH_ID_": 109.0,
+        "_BATCH_LAST_RUN_": "2025-07-01 10:12:25",
+    })
+
+
+def generate_data_dir(path: str, scale: float = 1.0, seed: int = 7) -> Dict[str, int]:
+    """Write a synthetic data/ directory at ``scale`` x the firm; returns row counts per source."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(path, exist_ok=True)
+    users = users_frame(rng, max(int(round(FIRM_USERS * scale)), 1))
+    frames = {
+        "users": users,
+        "bookings": bookings_frame(rng, users, BOOKINGS_PER_USER),
+        "org_units": org_units_frame(rng, users),
+        "vacation": vacation_frame(rng, users, LEAVE_PER_USER),
+        "salesforce": salesforce_frame(rng, users, ENGAGEMENTS_PER_USER),
+    }
+    counts = {}
+    for name, frame in frames.items():
+        frame.to_csv(os.path.join(path, SOURCE_FILES[name]), index=False)
+        counts[name] = len(frame)
+    for name in ("us_hours", "uae_hours"):
+        shutil.copyfile(os.path.join(PROJECT_ROOT, "data", SOURCE_FILES[name]), os.path.join(path, SOURCE_FILES[name]))
+    return counts
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write a seeded synthetic data/ directory")
+    parser.add_argument("outdir", help="Directory to write the CSVs to")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiple of the firm's size (default: 1)")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed")
+    args = parser.parse_args(argv)
+
+    counts = generate_data_dir(args.outdir, args.scale, args.seed)
+    for name, rows in counts.items():
+        print(f"✅ {SOURCE_FILES[name]}: {rows:,} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
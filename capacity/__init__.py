@@ -0,0 +1,13 @@
+"""
+Reusable data-engineering building blocks for the Leader Capacity Dashboard.
+
+The notebook in notebooks/ and the utilities in scripts/ import from this
+package so heavy lifting lives in plain, testable Python modules instead of
+notebook cells.
+
+From the notebook (working directory notebooks/):
+
+    import sys, os
+    sys.path.insert(0, os.path.abspath('..'))
+    from capacity.vacation import expand_leave_to_months
+"""
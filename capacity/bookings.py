@@ -0,0 +1,193 @@
+"""
+Streaming, role-filtered ingestion of the 10k booking export.
+
+Cell 5 used to read all of ``10k Data for S3 (1).csv`` and then throw most rows
+away in the inner merge with the leadership users. Here the user ids for the
+selected roles are resolved first from ``10k Users.csv`` and the booking file
+is read in bounded chunks, keeping only rows for those ids and only the
+columns the dashboard needs. Peak memory is one chunk plus the matched rows,
+independent of the size of the export.
+
+    from capacity.bookings import load_role_bookings
+    df_10k = load_role_bookings('../data/10k Data for S3 (1).csv', df_filtered_users)
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from capacity.sources import SOURCE_SPECS, apply_spec
+
+
+# Parsing a chunk costs far more than the rows it keeps: 50k rows bounds the
+# parser's working set to a few MB; smaller chunks save little more memory and
+# slow the parse (benchmarks/bench_source_schema.py, bench_stages.py)
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Columns the notebook reads from the booking export (declared in the source
+# schema). Any column whose name mentions hours or a date is kept as well so
+# the monthly rollups still work.
+DEFAULT_BOOKING_COLUMNS = SOURCE_SPECS["bookings"].columns
+KEEP_COLUMN_KEYWORDS = ("hours", "date")
+
+# User attributes carried onto every booking row by ``load_role_bookings``.
+# They repeat once per booking, so text columns are stored as categoricals.
+BOOKING_USER_COLUMNS = (
+    "id", "person_id", "first_name", "last_name", "email", "role", "discipline", "location", "billable",
+)
+
+ColumnsArg = Union[None, str, Iterable[str]]
+
+
+def resolve_user_ids(users: pd.DataFrame, selected_roles: Optional[Iterable[str]] = None, role_column: str = "role") -> np.ndarray:
+    """Sorted unique integer user ids, optionally restricted to ``selected_roles``."""
+    if selected_roles is not None:
+        users = users[users[role_column].isin(list(selected_roles))]
+    ids = pd.to_numeric(users["id"], errors="coerce").dropna().astype(np.int64)
+    return np.unique(ids.to_numpy())
+
+
+def _column_filter(columns: ColumnsArg, id_column: str) -> Optional[Callable[[str], bool]]:
+    if columns == "all":
+        return None
+    wanted = set(DEFAULT_BOOKING_COLUMNS if columns is None else columns) | {id_column}
+    if columns is not None:
+        return lambda c: c in wanted
+    return lambda c: c in wanted or any(k in c.lower() for k in KEEP_COLUMN_KEYWORDS)
+
+
+def iter_booking_chunks(
+    bookings_csv: str,
+    user_ids: Iterable[int],
+    columns: ColumnsArg = None,
+    id_column: str = "user_id",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the rows of ``bookings_csv`` whose ``id_column`` is in ``user_ids``.
+
+    ``columns`` is ``None`` for the dashboard defaults, ``"all"`` for every
+    column, or an explicit list (the id column is always included). Chunks
+    are typed with the bookings ``SourceSpec`` (int32 ids, float32 hours,
+    categorical client / project / phase, parsed dates).
+    """
+    ids = np.unique(np.asarray(list(user_ids), dtype=np.int64))
+    spec = SOURCE_SPECS["bookings"]
+    # Categoricals and float32 are parsed by read_csv itself; dates and ids
+    # (int32 or Int32 depending on gaps) are typed per matched chunk
+    dtype = {c: "category" for c in spec.categories}
+    dtype.update({c: "float32" for c in spec.float32})
+    reader = pd.read_csv(
+        bookings_csv,
+        usecols=_column_filter(columns, id_column),
+        dtype=dtype,
+        chunksize=chunk_rows,
+        low_memory=False,
+    )
+    for chunk in reader:
+        hit = pd.to_numeric(chunk[id_column], errors="coerce").isin(ids).to_numpy()
+        if hit.any():
+            yield apply_spec(chunk[hit].reset_index(drop=True), spec)
+
+
+def stream_bookings(
+    bookings_csv: str,
+    user_ids: Iterable[int],
+    columns: ColumnsArg = None,
+    id_column: str = "user_id",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """Concatenate ``iter_booking_chunks``; only matched rows are ever held at once."""
+    data = concat_typed(iter_booking_chunks(bookings_csv, user_ids, columns, id_column, chunk_rows))
+    if data is None:
+        return pd.read_csv(bookings_csv, nrows=0, usecols=_column_filter(columns, id_column))
+    return data
+
+
+def _code_dtype(categories: int) -> type:
+    return np.int8 if categories < 2**7 else np.int16 if categories < 2**15 else np.int32
+
+
+def concat_typed(chunks: Iterable[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    ``pd.concat`` that keeps categorical columns categorical (``None`` for no chunks).
+
+    Every chunk parses its own categories, and concatenating differing
+    categories would turn the column into objects. Chunks are consumed one at
+    a time with their categoricals held as codes into one category list per
+    column that only grows, so earlier codes stay valid and the category
+    strings are stored once rather than once per chunk. The result is
+    assembled a column at a time, dropping that column's pieces as it goes,
+    so the pieces and the whole result are never held together.
+    """
+    categories: Dict[str, pd.Index] = {}
+    pieces: Dict[str, list] = {}
+    for chunk in chunks:
+        for col, dtype in chunk.dtypes.items():
+            values = chunk[col]
+            if isinstance(dtype, pd.CategoricalDtype):
+                known = categories.get(col)
+                if known is None:
+                    known = dtype.categories
+                else:
+                    new = dtype.categories.difference(known, sort=False)
+                    known = known.append(new) if len(new) else known
+                categories[col] = known
+                recode = known.get_indexer(dtype.categories)
+                codes = values.cat.codes.to_numpy()
+                values = np.where(codes < 0, -1, recode[codes])
+            pieces.setdefault(col, []).append(values)
+    if not pieces:
+        return None
+    columns = {}
+    for col in list(pieces):
+        parts = pieces.pop(col)
+        if col in categories:
+            codes = np.concatenate(parts).astype(_code_dtype(len(categories[col])))
+            columns[col] = pd.Categorical.from_codes(codes, categories=categories[col])
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+        del parts
+    return pd.DataFrame(columns, copy=False)
+
+
+def booking_user_columns(filtered_users: pd.DataFrame, columns: Iterable[str] = BOOKING_USER_COLUMNS) -> pd.DataFrame:
+    """The user attributes merged onto bookings, with text columns as categoricals."""
+    users = filtered_users[[c for c in columns if c in filtered_users.columns]]
+    text = [c for c in users.columns if c != "id" and (users[c].dtype == object or pd.api.types.is_string_dtype(users[c].dtype))]
+    if not text:
+        return users
+    return users.astype({c: "category" for c in text})
+
+
+def load_role_bookings(
+    bookings_csv: str,
+    filtered_users: pd.DataFrame,
+    columns: ColumnsArg = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    user_columns: ColumnsArg = BOOKING_USER_COLUMNS,
+) -> pd.DataFrame:
+    """
+    Stream the bookings for ``filtered_users`` and merge them (Cell 5's ``df_10k``).
+
+    Only ``user_columns`` of the users travel onto the booking rows (all of
+    them with ``user_columns="all"``).
+    """
+    users = filtered_users if user_columns == "all" else booking_user_columns(filtered_users, user_columns)
+    ids = resolve_user_ids(filtered_users)
+    data = concat_typed(iter_booking_chunks(bookings_csv, ids, columns=columns, chunk_rows=chunk_rows))
+    if data is None:
+        data = pd.read_csv(bookings_csv, nrows=0, usecols=_column_filter(columns, "user_id"))
+    if users["id"].duplicated().any() or set(users.columns) & set(data.columns):
+        return pd.merge(data, users, left_on="user_id", right_on="id", how="inner")
+    # Every streamed row belongs to one of the users, so the inner merge is a
+    # positional take of each user column: no second copy of the booking rows
+    pos = pd.Index(users["id"]).get_indexer(data["user_id"])
+    if (pos < 0).any():
+        data, pos = data[pos >= 0], pos[pos >= 0]
+    columns = {col: data[col].array for col in data.columns}
+    columns.update({col: users[col].array.take(pos) for col in users.columns})
+    return pd.DataFrame(columns, copy=False)
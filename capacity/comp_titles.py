@@ -0,0 +1,205 @@
+"""
+As-of join port of ``SQL/comp_title_override_mysql57.sql``.
+
+The dataflow gives each Consulting comp row the title from
+``namely_title_history_data_aq`` using:
+
+  1. the latest title change on/before the comp effective date, at most 15
+     days before it (``window±15d``)
+  2. else the earliest title change on/after it, at most 15 days after
+     (``window±15d``)
+  3. else the latest title change on/before it at any distance
+     (``fallback_before``)
+  4. else the comp row's own Job Title (``no_match``)
+
+In MySQL each case is a GROUP BY self-join over every (comp row, title)
+pair. Here the title history is sorted once by (employee, date) and each case
+is a single ``searchsorted`` over composite integer keys, so the whole table
+resolves in O(n log n):
+
+    from capacity.comp_titles import override_comp_titles
+    df = override_comp_titles(df_comp, df_title_history)
+
+Output rows and columns match the SQL, including its row multiplication when
+an employee has several titles on the matched date.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+WINDOW_DAYS = 15
+CONSULTING_SINCE = "2016-01-01"
+
+# SELECT list of the dataflow, in order
+OUTPUT_COLUMNS = (
+    "Salary Currency",
+    "Office Location",
+    "Job Title",
+    "Title Change Date (Used)",
+    "Comp Effective Date",
+    "Title Match Strategy",
+    "Division",
+    "Salary Notes",
+    "Start Date",
+    "Employee Number",
+    "Level",
+    "Salary End Date",
+    "Step",
+    "Salary Start Date",
+    "Department",
+    "User Status",
+    "Last Name",
+    "Salary",
+    "Type",
+    "Employee Type",
+    "First Name",
+)
+
+_DAY_OFFSET = 1 << 31  # keeps day numbers non-negative inside the composite key
+NO_MATCH = -1
+
+
+def _days(values) -> np.ndarray:
+    """Non-missing dates -> int64 days since epoch (MySQL ``DATE()``)."""
+    dt = pd.to_datetime(pd.Series(values), errors="coerce").dt.normalize()
+    return dt.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+
+
+def comp_effective_date(comp: pd.DataFrame) -> pd.Series:
+    """``COALESCE(DATE(Salary Start Date), DATE(Start Date))``."""
+    salary_start = pd.to_datetime(comp["Salary Start Date"], errors="coerce").dt.normalize()
+    start = pd.to_datetime(comp["Start Date"], errors="coerce").dt.normalize()
+    return salary_start.fillna(start)
+
+
+def consulting_comp(comp: pd.DataFrame, since: str = CONSULTING_SINCE) -> pd.DataFrame:
+    """The dataflow's ``c`` subquery: Consulting rows with Start Date on/after ``since``."""
+    division = comp["Division"].astype("string").str.upper()
+    start = pd.to_datetime(comp["Start Date"], errors="coerce").dt.normalize()
+    keep = (division == "CONSULTING").fillna(False) & (start >= pd.Timestamp(since)).fillna(False)
+    out = comp[keep.to_numpy()].copy()
+    out["comp_effective_date"] = comp_effective_date(out)
+    return out
+
+
+class TitleHistory:
+    """
+    Title changes sorted by (employee, date) for as-of lookups.
+
+    Rows with a NULL Title are dropped, as in every ``th`` subquery; rows
+    with a missing date are kept out of the search arrays because they can
+    never satisfy a date comparison.
+    """
+
+    def __init__(self, titles: pd.DataFrame):
+        titles = titles[titles["Title"].notna()]
+        employee = titles["Employee Number"].astype("string")
+        day = pd.to_datetime(titles["Title Change Date"], errors="coerce").dt.normalize()
+        valid = (employee.notna() & day.notna()).to_numpy()
+
+        self.employees = pd.Index(pd.unique(employee[valid].to_numpy(dtype=object)))
+        codes = self.employees.get_indexer(employee[valid].to_numpy(dtype=object)).astype(np.int64)
+        days = _days(day[valid])
+        keys = (codes << 32) | (days + _DAY_OFFSET)
+
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.days = days[order]
+        self.titles = titles["Title"].to_numpy(dtype=object)[valid][order]
+
+    def encode(self, employee_numbers, dates) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Composite keys for (employee, date) pairs plus the day numbers and a validity mask."""
+        codes = self.employees.get_indexer(pd.Series(employee_numbers).astype("string").to_numpy(dtype=object))
+        dt = pd.to_datetime(pd.Series(dates), errors="coerce")
+        valid = (codes >= 0) & dt.notna().to_numpy()
+        days = np.where(valid, _days(dt.fillna(pd.Timestamp(0))), 0)
+        keys = (codes.astype(np.int64) << 32) | (days + _DAY_OFFSET)
+        return keys, days, valid
+
+    def on_or_before(self, keys, days, valid, max_days: Optional[int] = None) -> np.ndarray:
+        """Position of the latest change <= date (within ``max_days``), ``NO_MATCH`` otherwise."""
+        pos = np.searchsorted(self.keys, keys, side="right") - 1
+        return self._accept(pos, keys, days, valid, max_days, before=True)
+
+    def on_or_after(self, keys, days, valid, max_days: Optional[int] = None) -> np.ndarray:
+        """Position of the earliest change >= date (within ``max_days``), ``NO_MATCH`` otherwise."""
+        pos = np.searchsorted(self.keys, keys, side="left")
+        return self._accept(pos, keys, days, valid, max_days, before=False)
+
+    def _accept(self, pos, keys, days, valid, max_days, before: bool) -> np.ndarray:
+        inside = (pos >= 0) & (pos < len(self.keys))
+        safe = np.clip(pos, 0, max(len(self.keys) - 1, 0))
+        if len(self.keys) == 0:
+            return np.full(len(keys), NO_MATCH, dtype=np.int64)
+        same_employee = (self.keys[safe] >> 32) == (keys >> 32)
+        ok = valid & inside & same_employee
+        if max_days is not None:
+            gap = days - self.days[safe] if before else self.days[safe] - days
+            ok &= gap <= max_days
+        return np.where(ok, safe, NO_MATCH)
+
+    def ties(self, pos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(first position, count) of the rows sharing each matched (employee, date)."""
+        matched = pos >= 0
+        key = self.keys[np.where(matched, pos, 0)] if len(self.keys) else np.zeros(len(pos), np.int64)
+        first = np.searchsorted(self.keys, key, side="left")
+        count = np.searchsorted(self.keys, key, side="right") - first
+        return np.where(matched, first, NO_MATCH), np.where(matched, count, 0)
+
+
+def _expand(first_a, count_a, first_b, count_b) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Row multiplication of two LEFT JOINs: each comp row x max(1, ties) x max(1, ties)."""
+    na, nb = np.maximum(count_a, 1), np.maximum(count_b, 1)
+    reps = na * nb
+    row = np.repeat(np.arange(len(reps)), reps)
+    within = np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+    a = np.where(count_a[row] > 0, first_a[row] + within // nb[row], NO_MATCH)
+    b = np.where(count_b[row] > 0, first_b[row] + within % nb[row], NO_MATCH)
+    return row, a, b
+
+
+def _take(values: np.ndarray, pos: np.ndarray) -> pd.Series:
+    """``values[pos]`` with ``NO_MATCH`` positions as missing."""
+    out = pd.Series([None] * len(pos), dtype=object)
+    hit = pos >= 0
+    out[hit] = values[pos[hit]]
+    return out
+
+
+def override_comp_titles(
+    comp: pd.DataFrame,
+    titles: pd.DataFrame,
+    window_days: int = WINDOW_DAYS,
+    since: str = CONSULTING_SINCE,
+) -> pd.DataFrame:
+    """
+    ``comp`` is ``namely_comp_data_history_w_notes``, ``titles`` is
+    ``namely_title_history_data_aq``. Returns the dataflow's output columns.
+    """
+    c = consulting_comp(comp, since=since)
+    history = TitleHistory(titles)
+    keys, days, valid = history.encode(c["Employee Number"], c["comp_effective_date"])
+
+    before = history.on_or_before(keys, days, valid, max_days=window_days)
+    after = history.on_or_after(keys, days, valid, max_days=window_days)
+    chosen = np.where(before >= 0, before, after)
+    fallback = history.on_or_before(keys, days, valid)
+
+    row, m, f = _expand(*history.ties(chosen), *history.ties(fallback))
+    out = c.iloc[row].reset_index(drop=True)
+
+    used = np.where(chosen[row] >= 0, chosen[row], fallback[row])
+    strategy = np.where(m >= 0, "window±15d", np.where(f >= 0, "fallback_before", "no_match"))
+    job_title = _take(history.titles, m).fillna(_take(history.titles, f)).fillna(out["Job Title"].astype(object))
+    used_dates = _take(history.days, used).astype("float64")
+
+    out["Job Title"] = job_title.to_numpy()
+    out["Title Change Date (Used)"] = pd.to_datetime(used_dates, unit="D").to_numpy()
+    out["Comp Effective Date"] = out["comp_effective_date"]
+    out["Title Match Strategy"] = strategy
+    return out[[col for col in OUTPUT_COLUMNS if col in out.columns]]
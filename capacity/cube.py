@@ -0,0 +1,406 @@
+"""
+Dense person x month x metric capacity cube.
+
+The dashboard views used to regroup the long frames (``df_10k``,
+``df_vacation_monthly``, the Salesforce frame) with ``groupby`` for every
+chart. The cube stores one ``float32`` array of shape
+``(people, months, metrics)`` plus categorical person attributes, so the whole
+firm's history is a few MB and every view is an array reduction:
+
+    cube = build_cube(df_filtered_users, bookings=df_10k, vacation=df_vacation,
+                      salesforce=df_salesforce, calendar=capacity_calendar, person_index=person_index,
+                      leave_precedence=LEAVE_PRECEDENCE)
+    view = cube.select(start='2025-06-01', months=4, role=['Design', 'Tech'])
+    view.rollup('Org_Department', 'booked_hours')
+    view.top_n('vacation_days', n=10)
+
+``select`` never copies the cube: months and metrics are basic slices (numpy
+views) and person filters are kept as a mask that the reductions apply.
+
+Metrics:
+  - booked_hours:      booking hours per person and month
+  - available_hours:   region working hours (``CapacityCalendar``) minus leave
+  - vacation_days:     Used + Scheduled of each person's leave in days after
+                       ``coalesce_leave`` converts rows booked in hours and
+                       merges overlapping rows into disjoint spans, prorated
+                       over the months the spans cover: the same function the
+                       vacation_spans / vacation_monthly stages and the
+                       incremental store use, so the three agree
+  - weighted_pipeline: Schedule Amount x Probability by Schedule Month,
+                       attributed to the Primary Partner when that name is in
+                       the person index; everything else is kept per month in
+                       ``cube.unattributed``
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from capacity.vacation import coalesce_leave, prorate_leave_to_months
+from capacity.workdays import HOURS_PER_DAY, CapacityCalendar, region_for_location
+
+
+METRICS = ("booked_hours", "available_hours", "vacation_days", "weighted_pipeline")
+AXES = ("role", "Org_Department", "Org_Division", "Org_Office_Location")
+MISSING_LABEL = "(none)"
+
+BOOKING_DATE_COLUMNS = ("date", "booking_date", "assignment_date", "start_date", "week")
+BOOKING_HOURS_COLUMNS = ("scheduled_hours", "total_hours", "incurred_hours")
+
+MonthArg = Union[None, str, pd.Timestamp]
+
+
+def _month_number(values) -> np.ndarray:
+    """Months since year 0 (``year * 12 + month - 1``); -1 for missing dates."""
+    dt = pd.to_datetime(pd.Series(values), errors="coerce")
+    out = (dt.dt.year * 12 + dt.dt.month - 1).to_numpy(dtype="float64", na_value=np.nan)
+    return np.where(np.isnan(out), -1, out).astype(np.int64)
+
+
+class CapacityCube:
+    """
+    ``values[p, m, k]``: metric ``k`` for person ``p`` in month ``m``.
+
+    People are ordered by ``person_id``; ``attributes`` holds one categorical
+    column per axis in the same order.
+    """
+
+    def __init__(
+        self,
+        person_ids: Iterable[int],
+        months: pd.DatetimeIndex,
+        attributes: Optional[pd.DataFrame] = None,
+        metrics: Sequence[str] = METRICS,
+    ):
+        ids = np.asarray(list(person_ids), dtype=np.int64)
+        order = np.argsort(ids, kind="stable")
+        self.person_ids = ids[order]
+        if len(np.unique(self.person_ids)) != len(self.person_ids):
+            raise ValueError("person_ids must be unique")
+
+        months = pd.DatetimeIndex(months).to_period("M").to_timestamp()
+        if len(months) and not (np.diff(_month_number(months)) == 1).all():
+            raise ValueError("months must be consecutive month starts")
+        self.months = months
+        self._first_month = int(_month_number(months[:1])[0]) if len(months) else 0
+
+        self.metrics = tuple(metrics)
+        self.values = np.zeros((len(ids), len(months), len(self.metrics)), dtype=np.float32)
+        self.unattributed = np.zeros((len(months), len(self.metrics)), dtype=np.float64)
+
+        attrs = pd.DataFrame(index=range(len(ids)))
+        if attributes is not None:
+            attrs = attributes.reset_index(drop=True).iloc[order].reset_index(drop=True)
+        self.attributes = pd.DataFrame({
+            axis: (attrs[axis] if axis in attrs.columns else pd.Series([None] * len(ids))).astype("category")
+            for axis in AXES
+        })
+
+    def __repr__(self) -> str:
+        span = f"{self.months[0]:%Y-%m}..{self.months[-1]:%Y-%m}" if len(self.months) else "empty"
+        return f"CapacityCube({len(self.person_ids)} people x {len(self.months)} months [{span}] x {list(self.metrics)})"
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    # --------------------------------------------------------------- indexing
+
+    def person_positions(self, person_ids: Iterable[int]) -> np.ndarray:
+        """Row of each ``person_id`` in the cube, ``-1`` when not in the cube."""
+        ids = pd.to_numeric(pd.Series(person_ids), errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+        if len(self.person_ids) == 0:
+            return np.full(len(ids), -1, dtype=np.int64)
+        pos = np.clip(np.searchsorted(self.person_ids, ids), 0, len(self.person_ids) - 1)
+        return np.where(self.person_ids[pos] == ids, pos, -1)
+
+    def month_positions(self, dates) -> np.ndarray:
+        """Month column of each date, ``-1`` outside the cube."""
+        number = _month_number(dates)
+        pos = number - self._first_month
+        return np.where((number >= 0) & (pos >= 0) & (pos < len(self.months)), pos, -1)
+
+    def metric_index(self, metric: str) -> int:
+        try:
+            return self.metrics.index(metric)
+        except ValueError:
+            raise KeyError(f"Unknown metric {metric!r}; expected one of {list(self.metrics)}") from None
+
+    def month_slice(self, start: MonthArg = None, months: Optional[int] = None) -> slice:
+        """Columns for ``months`` months starting at ``start`` (clipped to the cube)."""
+        lo = 0 if start is None else int(_month_number([start])[0]) - self._first_month
+        hi = len(self.months) if months is None else lo + int(months)
+        return slice(max(lo, 0), min(max(hi, 0), len(self.months)))
+
+    # ---------------------------------------------------------------- loading
+
+    def accumulate(self, metric: str, person_ids, dates, amounts) -> None:
+        """
+        Add ``amounts`` into ``metric`` at (person, month). Rows for people not
+        in the cube go to ``unattributed``; rows outside the months are dropped.
+        """
+        k = self.metric_index(metric)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        p = self.person_positions(person_ids)
+        m = self.month_positions(dates)
+        amounts = np.where(np.isnan(amounts), 0.0, amounts)
+
+        known = (p >= 0) & (m >= 0)
+        flat = np.bincount(
+            p[known] * len(self.months) + m[known],
+            weights=amounts[known],
+            minlength=len(self.person_ids) * len(self.months),
+        )
+        self.values[:, :, k] += flat.reshape(len(self.person_ids), len(self.months)).astype(np.float32)
+
+        orphan = (p < 0) & (m >= 0)
+        self.unattributed[:, k] += np.bincount(m[orphan], weights=amounts[orphan], minlength=len(self.months))
+
+    def set_metric(self, metric: str, values: np.ndarray) -> None:
+        self.values[:, :, self.metric_index(metric)] = values
+
+    # -------------------------------------------------------------- querying
+
+    def select(
+        self,
+        start: MonthArg = None,
+        months: Optional[int] = None,
+        metrics: Optional[Sequence[str]] = None,
+        **filters: Union[str, Iterable[str]],
+    ) -> "CubeView":
+        """
+        View over a month window, a subset of metrics and people matching
+        ``filters`` (``role='Tech'``, ``Org_Division=['A', 'B']``). No data is copied.
+        """
+        mask = None
+        for axis, wanted in filters.items():
+            if axis not in self.attributes.columns:
+                raise KeyError(f"Unknown axis {axis!r}; expected one of {list(AXES)}")
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            hit = self.attributes[axis].isin(wanted).to_numpy()
+            mask = hit if mask is None else mask & hit
+        ks = list(self.metrics) if metrics is None else list(metrics)
+        return CubeView(self, mask, self.month_slice(start, months), [self.metric_index(m) for m in ks])
+
+    def rolling(self, months: int = 4, end: MonthArg = None, **filters) -> "CubeView":
+        """
+        The ``months``-month window ending at ``end`` (default: last month in
+        the cube), clipped to the cube: an ``end`` past the last month keeps
+        only the months that exist, and a window entirely outside is empty.
+        """
+        if end is None and not len(self.months):
+            return self.select(**filters)
+        last = self._first_month + len(self.months) - 1 if end is None else int(_month_number([end])[0])
+        first = last - int(months) + 1
+        start = pd.Timestamp(year=first // 12, month=first % 12 + 1, day=1)
+        return self.select(start=start, months=months, **filters)
+
+
+class CubeView:
+    """A window over a ``CapacityCube``; reductions allocate only their result."""
+
+    def __init__(self, cube: CapacityCube, mask: Optional[np.ndarray], months: slice, metric_idx: List[int]):
+        self.cube = cube
+        self.mask = mask
+        self.month_cols = months
+        self.metric_idx = metric_idx
+
+    @property
+    def months(self) -> pd.DatetimeIndex:
+        return self.cube.months[self.month_cols]
+
+    @property
+    def metrics(self) -> List[str]:
+        return [self.cube.metrics[k] for k in self.metric_idx]
+
+    @property
+    def people(self) -> int:
+        return len(self.cube.person_ids) if self.mask is None else int(self.mask.sum())
+
+    def _block(self, metric: str) -> np.ndarray:
+        """(people, months) view of one metric for the whole cube."""
+        k = self.cube.metric_index(metric)
+        if k not in self.metric_idx:
+            raise KeyError(f"Metric {metric!r} is not in this view")
+        return self.cube.values[:, self.month_cols, k]
+
+    def _weights(self) -> Optional[np.ndarray]:
+        return None if self.mask is None else self.mask.astype(np.float32)
+
+    def array(self) -> np.ndarray:
+        """(people, months, metrics) values; a view unless a person filter is set."""
+        block = self.cube.values[:, self.month_cols, :]
+        if self.metric_idx != list(range(len(self.cube.metrics))):
+            block = block[:, :, self.metric_idx]
+        return block if self.mask is None else block[self.mask]
+
+    def totals(self) -> pd.DataFrame:
+        """Month x metric totals over the selected people."""
+        w = self._weights()
+        out = {}
+        for metric in self.metrics:
+            block = self._block(metric)
+            out[metric] = block.sum(axis=0, dtype=np.float64) if w is None else w @ block
+        return pd.DataFrame(out, index=self.months)
+
+    def rollup(self, by: str, metric: str) -> pd.DataFrame:
+        """``by`` group x month sums of ``metric`` over the selected people."""
+        cat = self.cube.attributes[by].cat
+        codes = cat.codes.to_numpy().astype(np.int64)
+        labels = list(cat.categories) + [MISSING_LABEL]
+        codes = np.where(codes < 0, len(labels) - 1, codes)
+        if self.mask is not None:
+            codes = np.where(self.mask, codes, len(labels))
+
+        block = self._block(metric)
+        out = np.zeros((len(labels) + 1, block.shape[1]), dtype=np.float64)
+        np.add.at(out, codes, block)
+
+        frame = pd.DataFrame(out[:-1], index=pd.Index(labels, name=by), columns=self.months)
+        present = np.bincount(codes, minlength=len(labels) + 1)[:-1] > 0
+        return frame[present]
+
+    def top_n(self, metric: str, n: int = 10, by: Optional[str] = None) -> pd.DataFrame:
+        """The ``n`` people (or ``by`` groups) with the largest ``metric`` over the window."""
+        if by is not None:
+            totals = self.rollup(by, metric).sum(axis=1)
+            return totals.nlargest(n).rename(metric).reset_index()
+
+        totals = self._block(metric).sum(axis=1, dtype=np.float64)
+        if self.mask is not None:
+            totals = np.where(self.mask, totals, -np.inf)
+        n = min(n, self.people)
+        if n <= 0:
+            return pd.DataFrame(columns=["person_id", metric, *AXES])
+        top = np.argpartition(-totals, n - 1)[:n]
+        top = top[np.argsort(-totals[top], kind="stable")]
+        frame = self.cube.attributes.iloc[top].reset_index(drop=True)
+        frame.insert(0, metric, totals[top])
+        frame.insert(0, "person_id", self.cube.person_ids[top])
+        return frame
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long person x month frame with one column per metric (materializes the window)."""
+        people = np.arange(len(self.cube.person_ids)) if self.mask is None else np.flatnonzero(self.mask)
+        months = self.months
+        frame = pd.DataFrame({
+            "person_id": np.repeat(self.cube.person_ids[people], len(months)),
+            "Month": np.tile(months.values, len(people)),
+        })
+        for metric in self.metrics:
+            frame[metric] = self._block(metric)[people].reshape(-1)
+        for axis in AXES:
+            frame[axis] = np.repeat(self.cube.attributes[axis].to_numpy()[people], len(months))
+        return frame
+
+
+# ------------------------------------------------------------------ building
+
+def _first_present(frame: pd.DataFrame, candidates: Sequence[str]) -> Optional[str]:
+    return next((c for c in candidates if c in frame.columns), None)
+
+
+def _month_span(*dates: Optional[pd.Series]) -> pd.DatetimeIndex:
+    numbers = np.concatenate([_month_number(d) for d in dates if d is not None and len(d)] or [np.empty(0, np.int64)])
+    numbers = numbers[numbers >= 0]
+    if len(numbers) == 0:
+        return pd.DatetimeIndex([])
+    lo, hi = numbers.min(), numbers.max()
+    return pd.date_range(f"{lo // 12:04d}-{lo % 12 + 1:02d}-01", periods=int(hi - lo + 1), freq="MS")
+
+
+def build_cube(
+    people: pd.DataFrame,
+    months: Optional[pd.DatetimeIndex] = None,
+    bookings: Optional[pd.DataFrame] = None,
+    vacation: Optional[pd.DataFrame] = None,
+    salesforce: Optional[pd.DataFrame] = None,
+    calendar: Optional[CapacityCalendar] = None,
+    person_index=None,
+    booking_date_col: Optional[str] = None,
+    booking_hours_col: Optional[str] = None,
+    role_column: str = "role",
+    leave_precedence: Sequence[str] = (),
+) -> CapacityCube:
+    """
+    Cube for ``people`` (a users frame with ``person_id`` and, after Cell 5b,
+    the Org_* columns) from whichever sources are given.
+
+    ``months`` defaults to the span of the booking, leave and Schedule Month
+    dates. ``person_index`` is only needed to attribute Salesforce rows to a
+    Primary Partner. Overlapping leave rows are coalesced per person before
+    they reach ``vacation_days``; where they overlap, the ``Vacation_Category``
+    earliest in ``leave_precedence`` owns the days (``stages.LEAVE_PRECEDENCE``).
+    """
+    people = people[people["person_id"] >= 0].drop_duplicates(subset=["person_id"])
+    attributes = people.rename(columns={role_column: "role"})
+
+    if bookings is not None and not bookings.empty:
+        booking_date_col = booking_date_col or _first_present(bookings, BOOKING_DATE_COLUMNS)
+        booking_hours_col = booking_hours_col or _first_present(bookings, BOOKING_HOURS_COLUMNS)
+        if booking_date_col is None or booking_hours_col is None:
+            raise ValueError(
+                "Cannot place bookings in months: pass booking_date_col / booking_hours_col "
+                f"(found date={booking_date_col}, hours={booking_hours_col})"
+            )
+
+    if months is None:
+        months = _month_span(
+            bookings[booking_date_col] if bookings is not None and not bookings.empty else None,
+            vacation["Start date"] if vacation is not None else None,
+            vacation["Departure date"] if vacation is not None else None,
+            salesforce["Schedule Month"] if salesforce is not None else None,
+        )
+    cube = CapacityCube(people["person_id"], months, attributes)
+    if len(cube.months) == 0:
+        return cube
+
+    if bookings is not None and not bookings.empty:
+        cube.accumulate(
+            "booked_hours",
+            bookings["person_id"],
+            bookings[booking_date_col],
+            pd.to_numeric(bookings[booking_hours_col], errors="coerce"),
+        )
+
+    if vacation is not None and not vacation.empty:
+        leave = vacation
+        if "Vacation_Category" not in leave.columns:
+            leave = leave.assign(Vacation_Category="Leave")
+        overlaps = prorate_leave_to_months(coalesce_leave(leave, leave_precedence), cube.months)
+        cube.accumulate("vacation_days", overlaps["person_id"], overlaps["Month"], overlaps["Used"] + overlaps["Scheduled"])
+
+    if salesforce is not None and not salesforce.empty:
+        from capacity.sources import parse_percent
+
+        probability = salesforce["Probability"]
+        if not pd.api.types.is_numeric_dtype(probability):
+            probability = parse_percent(probability)
+        amount = pd.to_numeric(salesforce["Schedule Amount"], errors="coerce") * probability.astype("float64")
+        owners = np.full(len(salesforce), -1, dtype=np.int64)
+        if person_index is not None and "Primary Partner" in salesforce.columns:
+            owners = person_index.lookup(names=salesforce["Primary Partner"])
+        cube.accumulate("weighted_pipeline", owners, salesforce["Schedule Month"], amount)
+
+    if calendar is not None:
+        location = attributes["Org_Office_Location"] if "Org_Office_Location" in attributes.columns else None
+        if location is None or location.isna().all():
+            location = attributes["location"] if "location" in attributes.columns else pd.Series([None] * len(attributes))
+        regions = region_for_location(location).to_numpy()
+        regions = regions[np.argsort(people["person_id"].to_numpy(), kind="stable")]
+
+        monthly = calendar.monthly_hours()
+        grid = monthly.assign(col=cube.month_positions(monthly["Month"]))
+        grid = grid[grid["col"] >= 0]
+        hours = np.zeros((len(cube.person_ids), len(cube.months)), dtype=np.float32)
+        for region, rows in grid.groupby("Region"):
+            by_month = np.zeros(len(cube.months), dtype=np.float32)
+            by_month[rows["col"].to_numpy()] = rows["Net_Working_Hours"].to_numpy()
+            hours[regions == region] = by_month
+        leave = cube.values[:, :, cube.metric_index("vacation_days")] * HOURS_PER_DAY
+        cube.set_metric("available_hours", np.clip(hours - leave, 0, None))
+
+    return cube
@@ -0,0 +1,159 @@
+"""
+Monte Carlo forecast of scheduled demand from the Salesforce opportunities.
+
+``Salesforce Opportunity Data.csv`` has one row per engagement and schedule
+month (``Engagement ID``, ``Schedule Month``, ``Schedule Amount``, ``Region``)
+and the engagement's ``Probability``. Each trial wins or loses every open
+engagement once, with all of its schedule rows following together:
+
+  - ``A``:    engagements x (month, region) cells, summed Schedule Amount
+  - ``wins``: trials x engagements, ``uniform < probability`` (seeded)
+  - demand:   ``wins @ A`` plus the committed (100%) amounts
+
+so tens of thousands of trials are a handful of matrix products, run in
+bounded batches. The result is P10/P50/P90 demand per month and region:
+
+    from capacity.forecast import forecast_pipeline
+    forecast = forecast_pipeline(df_salesforce, start='2025-07-01', months=4)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from capacity.sources import parse_percent
+
+
+DEFAULT_TRIALS = 20_000
+DEFAULT_SEED = 42
+DEFAULT_QUANTILES = (0.1, 0.5, 0.9)
+# Trials simulated per matrix product; bounds memory at batch x engagements
+TRIAL_BATCH = 5_000
+UNKNOWN_REGION = "Unknown"
+
+
+@dataclass
+class ScheduleMatrix:
+    """Opportunity schedules folded onto a (month, region) grid."""
+
+    months: pd.DatetimeIndex
+    regions: pd.Index
+    probability: np.ndarray  # open engagements, 0 < p < 1
+    amounts: np.ndarray  # open engagements x cells
+    committed: np.ndarray  # cells, amounts with p >= 1
+    engagement_ids: np.ndarray  # open engagements
+
+    @property
+    def cells(self) -> pd.MultiIndex:
+        return pd.MultiIndex.from_product([self.months, self.regions], names=["Month", "Region"])
+
+
+def _probability(values: pd.Series) -> np.ndarray:
+    if not pd.api.types.is_numeric_dtype(values):
+        values = parse_percent(values)
+    return values.astype("float64").to_numpy(na_value=np.nan)
+
+
+def schedule_matrix(
+    salesforce: pd.DataFrame,
+    start=None,
+    months: Optional[int] = 4,
+) -> ScheduleMatrix:
+    """
+    Fold ``salesforce`` onto ``months`` months from ``start`` (default: the
+    current month). ``months=None`` keeps every month from ``start`` on.
+    Rows without a probability, month or amount are ignored.
+    """
+    month = pd.to_datetime(salesforce["Schedule Month"], errors="coerce").dt.to_period("M").dt.to_timestamp()
+    amount = pd.to_numeric(salesforce["Schedule Amount"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    probability = np.clip(_probability(salesforce["Probability"]), 0.0, 1.0)
+
+    first = pd.Timestamp.now() if start is None else pd.Timestamp(start)
+    first = first.to_period("M").to_timestamp()
+    last = month.max() if months is None else first + pd.DateOffset(months=int(months) - 1)
+    grid = pd.date_range(first, last if pd.notna(last) and last >= first else first, freq="MS")
+
+    keep = (month >= grid[0]) & (month <= grid[-1])
+    keep = keep.to_numpy() & ~np.isnan(amount) & ~np.isnan(probability) & (probability > 0)
+    region = salesforce["Region"].astype("string").fillna(UNKNOWN_REGION).to_numpy(dtype=object)[keep]
+    regions = pd.Index(sorted(set(region)), name="Region")
+
+    month_idx = ((month[keep].dt.year - grid[0].year) * 12 + month[keep].dt.month - grid[0].month).to_numpy()
+    cell = month_idx * len(regions) + regions.get_indexer(region)
+    n_cells = len(grid) * len(regions)
+    amount, probability = amount[keep], probability[keep]
+    engagement = salesforce["Engagement ID"].astype("string").fillna("").to_numpy(dtype=object)[keep]
+
+    certain = probability >= 1.0
+    committed = np.bincount(cell[certain], weights=amount[certain], minlength=n_cells)
+
+    # One row of A per open engagement; its probability is the highest quoted
+    # on any of its schedule rows
+    codes, ids = pd.factorize(engagement[~certain])
+    open_cell = cell[~certain]
+    amounts = np.zeros((len(ids), n_cells), dtype=np.float64)
+    np.add.at(amounts, (codes, open_cell), amount[~certain])
+    open_probability = np.zeros(len(ids), dtype=np.float64)
+    np.maximum.at(open_probability, codes, probability[~certain])
+
+    return ScheduleMatrix(grid, regions, open_probability, amounts, committed, np.asarray(ids, dtype=object))
+
+
+def simulate_demand(
+    schedules: ScheduleMatrix,
+    trials: int = DEFAULT_TRIALS,
+    seed: int = DEFAULT_SEED,
+    batch: int = TRIAL_BATCH,
+) -> np.ndarray:
+    """Trials x cells simulated demand (committed plus won open engagements)."""
+    rng = np.random.default_rng(seed)
+    n_cells = len(schedules.committed)
+    out = np.empty((trials, n_cells), dtype=np.float64)
+    amounts = schedules.amounts.astype(np.float32)
+    for lo in range(0, trials, batch):
+        hi = min(lo + batch, trials)
+        wins = (rng.random((hi - lo, len(schedules.probability)), dtype=np.float32) < schedules.probability).astype(np.float32)
+        out[lo:hi] = wins @ amounts
+    out += schedules.committed
+    return out
+
+
+def forecast_pipeline(
+    salesforce: pd.DataFrame,
+    start=None,
+    months: Optional[int] = 4,
+    trials: int = DEFAULT_TRIALS,
+    seed: int = DEFAULT_SEED,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+) -> pd.DataFrame:
+    """
+    Demand percentiles per month and region.
+
+    Columns: Month, Region, Committed (100% rows), Expected (probability
+    weighted) and one ``P<q>`` column per quantile (P10, P50, P90).
+    """
+    schedules = schedule_matrix(salesforce, start=start, months=months)
+    expected = schedules.committed + schedules.probability @ schedules.amounts
+    frame = pd.DataFrame({"Committed": schedules.committed, "Expected": expected}, index=schedules.cells)
+
+    # Cells without open engagements are deterministic; only simulate the rest
+    levels = np.tile(schedules.committed, (len(quantiles), 1))
+    uncertain = np.flatnonzero(schedules.amounts.any(axis=0))
+    if len(uncertain):
+        subset = ScheduleMatrix(
+            schedules.months,
+            schedules.regions,
+            schedules.probability,
+            schedules.amounts[:, uncertain],
+            schedules.committed[uncertain],
+            schedules.engagement_ids,
+        )
+        demand = simulate_demand(subset, trials=trials, seed=seed)
+        levels[:, uncertain] = np.quantile(demand, quantiles, axis=0)
+    for q, values in zip(quantiles, levels):
+        frame[f"P{round(q * 100)}"] = values
+    return frame.reset_index()
@@ -0,0 +1,236 @@
+"""
+Persistent person identity index shared by every source.
+
+People show up as ``email`` (10k Users, Org Units, the SQL dataflows),
+``employee_number`` / ``Employee Number`` (10k Users, Namely) and full names
+("Alma Puškar" in Namely, ``first_name + ' ' + last_name`` in 10k). The index
+maps each normalized key to one integer ``person_id`` so every source joins on
+that integer in a single hash lookup:
+
+  - email:            ``LOWER(TRIM(email))``, same as the SQL joins
+  - employee number:  trimmed, upper-cased
+  - name:             Unicode-folded (accents stripped, case-folded, single spaces)
+
+Emails and employee numbers are strong keys. Names are only used to identify a
+person when a record has no strong key, and a name shared by two different
+people is marked ambiguous and never matched on.
+
+The index is saved as JSON and updated incrementally: existing people keep
+their ids and only new keys (new hires, newly filled employee numbers) are
+added.
+
+    index = PersonIndex.open('../.cache/person_index.json')
+    index.update_from_users(df_10k_users)
+    index.save()
+    df_vacation_raw['person_id'] = index.lookup(
+        employee_numbers=df_vacation_raw['Employee Number'],
+        names=df_vacation_raw['Full Name'],
+    )
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, Iterable, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+
+INDEX_FORMAT_VERSION = 1
+KEY_KINDS = ("email", "employee_number", "name")
+STRONG_KINDS = ("email", "employee_number")
+MISSING_ID = -1
+
+
+# ------------------------------------------------------------- normalization
+
+def _blank_to_nan(values: pd.Series) -> pd.Series:
+    return values.where(values.str.len() > 0)
+
+
+def normalize_email(values: Iterable) -> pd.Series:
+    s = pd.Series(values, dtype="object").astype("string")
+    return _blank_to_nan(s.str.strip().str.lower())
+
+
+def normalize_employee_number(values: Iterable) -> pd.Series:
+    s = pd.Series(values, dtype="object").astype("string")
+    return _blank_to_nan(s.str.strip().str.upper())
+
+
+def fold_name(values: Iterable) -> pd.Series:
+    """'Alma  Puškar ' -> 'alma puskar' (NFKD, combining marks dropped, case-folded)."""
+    s = pd.Series(values, dtype="object").astype("string")
+    s = s.str.normalize("NFKD").str.replace("[\u0300-\u036f]", "", regex=True)
+    s = s.str.casefold().str.replace(r"\s+", " ", regex=True).str.strip()
+    return _blank_to_nan(s)
+
+
+NORMALIZERS = {
+    "email": normalize_email,
+    "employee_number": normalize_employee_number,
+    "name": fold_name,
+}
+
+
+# --------------------------------------------------------------------- index
+
+class PersonIndex:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.keys: Dict[str, Dict[str, int]] = {kind: {} for kind in KEY_KINDS}
+        self.ambiguous_names: Set[str] = set()
+        self.next_id = 0
+
+    def __len__(self) -> int:
+        return self.next_id
+
+    # ------------------------------------------------------------ persistence
+
+    @classmethod
+    def open(cls, path: str) -> "PersonIndex":
+        """Load the index at ``path``, or start an empty one that will save there."""
+        index = cls(path)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") != INDEX_FORMAT_VERSION:
+                raise ValueError(f"Unsupported person index version in {path}: {payload.get('version')}")
+            index.next_id = int(payload["next_id"])
+            index.keys = {kind: {k: int(v) for k, v in payload["keys"].get(kind, {}).items()} for kind in KEY_KINDS}
+            index.ambiguous_names = set(payload.get("ambiguous_names", []))
+        return index
+
+    def save(self, path: Optional[str] = None) -> str:
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given for saving the person index")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        payload = {
+            "version": INDEX_FORMAT_VERSION,
+            "next_id": self.next_id,
+            "keys": self.keys,
+            "ambiguous_names": sorted(self.ambiguous_names),
+        }
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self.path = path
+        return path
+
+    # ----------------------------------------------------------------- lookup
+
+    @staticmethod
+    def _normalized(emails=None, employee_numbers=None, names=None) -> Dict[str, pd.Series]:
+        given = {"email": emails, "employee_number": employee_numbers, "name": names}
+        out = {}
+        for kind, values in given.items():
+            if values is not None:
+                out[kind] = NORMALIZERS[kind](values).reset_index(drop=True)
+        lengths = {len(s) for s in out.values()}
+        if len(lengths) > 1:
+            raise ValueError("All key columns passed to the person index must have the same length")
+        return out
+
+    def _lookup_normalized(self, keys: Dict[str, pd.Series]) -> np.ndarray:
+        n = len(next(iter(keys.values()))) if keys else 0
+        result = np.full(n, MISSING_ID, dtype=np.int64)
+        for kind in KEY_KINDS:
+            if kind not in keys:
+                continue
+            found = keys[kind].map(self.keys[kind]).to_numpy(dtype="float64", na_value=np.nan)
+            fill = (result == MISSING_ID) & ~np.isnan(found)
+            result[fill] = found[fill].astype(np.int64)
+        return result
+
+    def lookup(self, emails=None, employee_numbers=None, names=None) -> np.ndarray:
+        """
+        ``person_id`` per row (``-1`` when unknown), trying email, then
+        employee number, then folded name. Pass whichever columns a source has.
+        """
+        return self._lookup_normalized(self._normalized(emails, employee_numbers, names))
+
+    # ----------------------------------------------------------------- update
+
+    def _register(self, kind: str, key: str, person_id: int) -> None:
+        if kind == "name":
+            if key in self.ambiguous_names:
+                return
+            existing = self.keys["name"].get(key)
+            if existing is not None and existing != person_id:
+                del self.keys["name"][key]
+                self.ambiguous_names.add(key)
+                return
+        self.keys[kind].setdefault(key, person_id)
+
+    def update(self, emails=None, employee_numbers=None, names=None) -> np.ndarray:
+        """
+        Add any unseen keys and return the ``person_id`` of every row.
+
+        Rows whose keys are all already indexed are resolved in one vectorized
+        pass; only rows carrying a new key go through the per-row path. Rows
+        identified only by an ambiguous name stay ``-1``.
+        """
+        keys = self._normalized(emails, employee_numbers, names)
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        n = len(next(iter(keys.values())))
+
+        needs_work = np.zeros(n, dtype=bool)
+        has_strong = np.zeros(n, dtype=bool)
+        for kind, values in keys.items():
+            present = values.notna().to_numpy()
+            known = values.isin(list(self.keys[kind])).to_numpy()
+            if kind == "name":
+                known = known | values.isin(list(self.ambiguous_names)).to_numpy()
+            else:
+                has_strong |= present
+            needs_work |= present & ~known
+
+        # Rows with a strong key first, so name-only rows see every strong
+        # identity (and every ambiguous name) from this batch
+        work = np.flatnonzero(needs_work)
+        work = work[np.argsort(~has_strong[work], kind="stable")]
+
+        columns = {kind: values.to_numpy(dtype=object, na_value=None) for kind, values in keys.items()}
+        for i in work:
+            row = {kind: columns[kind][i] for kind in keys if columns[kind][i] is not None}
+            person_id = None
+            for kind in STRONG_KINDS:
+                if kind in row and row[kind] in self.keys[kind]:
+                    person_id = self.keys[kind][row[kind]]
+                    break
+            if person_id is None and not has_strong[i]:
+                if row["name"] in self.ambiguous_names:
+                    continue
+                person_id = self.keys["name"].get(row["name"])
+            if person_id is None:
+                person_id = self.next_id
+                self.next_id += 1
+            for kind, key in row.items():
+                self._register(kind, key, person_id)
+
+        # Resolve against the final state so the result matches a later lookup
+        return self._lookup_normalized(keys)
+
+    @staticmethod
+    def _user_keys(users: pd.DataFrame) -> Dict[str, Optional[pd.Series]]:
+        names = None
+        if "first_name" in users.columns and "last_name" in users.columns:
+            names = users["first_name"].astype("string") + " " + users["last_name"].astype("string")
+        return {
+            "emails": users["email"] if "email" in users.columns else None,
+            "employee_numbers": users["employee_number"] if "employee_number" in users.columns else None,
+            "names": names,
+        }
+
+    def update_from_users(self, users: pd.DataFrame) -> np.ndarray:
+        """Index a ``10k Users.csv`` frame; returns its ``person_id`` column."""
+        return self.update(**self._user_keys(users))
+
+    def lookup_users(self, users: pd.DataFrame) -> np.ndarray:
+        """``person_id`` column for a ``10k Users.csv`` frame without modifying the index."""
+        return self.lookup(**self._user_keys(users))
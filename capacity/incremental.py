@@ -0,0 +1,582 @@
+"""
+Watermark-based incremental ingestion of the Domo batch extracts.
+
+The Namely leave and Salesforce exports carry ``_BATCH_ID_`` and
+``_BATCH_LAST_RUN_`` on every row. ``IncrementalStore.refresh`` remembers,
+per source, the newest (batch id, last run) it has processed plus the byte
+offset it read up to, and on the next refresh only parses what is new:
+
+  - append:   the file grew and its header and the bytes just before the old
+              offset are unchanged, so only the appended bytes are parsed
+  - scan:     the file was rewritten; it is parsed once (needed columns only)
+              and rows of batches newer than the watermark are taken. If an
+              already processed batch changed or disappeared (e.g. a sample
+              batch was removed), the store is rebuilt from the file
+  - initial:  no state yet, everything is ingested
+
+New rows supersede the live rows that share their key (leave: employee, type
+and start date; Salesforce: the whole engagement), and a batch id that comes
+back with a newer ``_BATCH_LAST_RUN_`` retracts every row of its earlier run.
+Both sides are folded into additive aggregates (subtract the retracted rows'
+contribution, add the inserted rows'), so the work is proportional to the
+delta, not the history. A spec with a ``scope`` recomputes every live row
+sharing the scope with a changed row, for aggregates that are only additive
+per scope:
+
+  - vacation:   person x month x category leave days (Cell 7's summary), from
+                each person's coalesced leave spans (scope: the employee)
+  - salesforce: month x region scheduled, probability-weighted and committed amounts
+
+    from capacity.incremental import IncrementalStore
+    store = IncrementalStore('../data')
+    print(store.refresh('vacation'))
+    monthly = store.vacation_monthly(months=pd.date_range('2025-03-01', periods=4, freq='MS'))
+
+State lives in ``.cache/incremental/<source>/`` next to data/: ``state.json``
+(watermark, offset, per batch run row counts and digests), the ingested rows
+and the aggregate (pickle). Rows are stored append-only: each refresh writes
+its delta as one new uncompressed Feather segment under ``segments/``, and
+``index.pkl`` holds one small entry per stored row (key and scope hashes,
+batch order, segment and position, active flag). Superseded rows stay in the
+index inactive, so a re-run that drops a record brings the older version
+back. A refresh reads the index, memory-maps only the segment rows of the
+keys and scopes the delta touches and writes only the new segment; segments
+no live entry points to any more are deleted. Deleting the directory forces
+a full rebuild.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from capacity.sources import SOURCE_FILES, SOURCE_SPECS, apply_spec
+
+
+BATCH_ID = "_BATCH_ID_"
+BATCH_LAST_RUN = "_BATCH_LAST_RUN_"
+STATE_VERSION = 4
+# Bytes before the stored offset that must be unchanged for an append-only read
+TAIL_BYTES = 64 * 1024
+SCAN_CHUNK_ROWS = 500_000
+
+
+@dataclass(frozen=True)
+class IncrementalSpec:
+    """
+    How one source is maintained incrementally.
+
+    ``key`` identifies a record across batches, ``values`` are the other
+    columns the aggregate needs, and ``contributions`` turns rows into
+    additive ``group`` x ``measures`` sums. With a ``scope`` the sums are only
+    additive across scopes (e.g. people), so all rows of a touched scope are
+    re-contributed together.
+    """
+
+    source: str
+    key: Tuple[str, ...]
+    values: Tuple[str, ...]
+    group: Tuple[str, ...]
+    measures: Tuple[str, ...]
+    contributions: Callable[[pd.DataFrame], pd.DataFrame]
+    scope: Tuple[str, ...] = ()
+
+    @property
+    def columns(self) -> List[str]:
+        return list(dict.fromkeys(self.key + self.values))
+
+
+def vacation_contributions(rows: pd.DataFrame) -> pd.DataFrame:
+    """Cell 7's leave summary terms: each person's coalesced leave days (hours converted), split over the months they fall in."""
+    from capacity.stages import LEAVE_PRECEDENCE, categorize_vacation_types
+    from capacity.vacation import coalesce_leave, month_grid, prorate_leave_to_months
+
+    rows = rows[(rows["Used"] > 0) | (rows["Scheduled"] > 0)]
+    # Deterministic row order, so the per-person names match across refreshes
+    rows = rows.sort_values(["Employee Number", "Start date", "Type", "Full Name"], kind="stable")
+    rows = rows.assign(Vacation_Category=categorize_vacation_types(rows["Type"].astype("string")).astype("string"))
+    spans = coalesce_leave(
+        rows, LEAVE_PRECEDENCE, person_col="Employee Number", keep_cols=("Full Name", "First Name", "Last Name"),
+    )
+    if spans.empty:
+        return pd.DataFrame(columns=list(VACATION.group + VACATION.measures))
+    first, last = spans["Start date"].min(), spans["Departure date"].max()
+    months = month_grid(first, (last.year - first.year) * 12 + last.month - first.month + 1)
+    expanded = prorate_leave_to_months(spans, months)
+    return pd.DataFrame({
+        "Employee Number": expanded["Employee Number"].astype("string"),
+        "Full Name": expanded["Full Name"].astype("string"),
+        "First Name": expanded["First Name"].astype("string"),
+        "Last Name": expanded["Last Name"].astype("string"),
+        "Month": expanded["Month"],
+        "Vacation_Category": expanded["Vacation_Category"].astype("string"),
+        "Days_Used": expanded["Used"].astype("float64"),
+        "Days_Scheduled": expanded["Scheduled"].astype("float64"),
+        "Records": 1,
+    })
+
+
+def pipeline_contributions(rows: pd.DataFrame) -> pd.DataFrame:
+    """Salesforce schedule rows as month x region amounts: scheduled, probability-weighted, committed."""
+    from capacity.forecast import UNKNOWN_REGION
+
+    month = pd.to_datetime(rows["Schedule Month"], errors="coerce").dt.to_period("M").dt.to_timestamp()
+    amount = pd.to_numeric(rows["Schedule Amount"], errors="coerce").fillna(0.0).astype("float64")
+    probability = pd.to_numeric(rows["Probability"], errors="coerce").fillna(0.0).astype("float64")
+    out = pd.DataFrame({
+        "Schedule Month": month,
+        "Region": rows["Region"].astype("string").fillna(UNKNOWN_REGION),
+        "Schedule_Amount": amount,
+        "Weighted_Amount": amount * probability,
+        "Committed_Amount": amount.where(probability >= 1.0, 0.0),
+        "Rows": 1,
+    })
+    return out[out["Schedule Month"].notna()]
+
+
+VACATION = IncrementalSpec(
+    source="vacation",
+    key=("Employee Number", "Type", "Start date"),
+    values=("Full Name", "First Name", "Last Name", "Departure date", "Used", "Scheduled", "Units"),
+    group=("Employee Number", "Full Name", "First Name", "Last Name", "Month", "Vacation_Category"),
+    measures=("Days_Used", "Days_Scheduled", "Records"),
+    contributions=vacation_contributions,
+    scope=("Employee Number",),
+)
+
+SALESFORCE = IncrementalSpec(
+    source="salesforce",
+    key=("Engagement ID",),
+    values=("Schedule Month", "Region", "Schedule Amount", "Probability"),
+    group=("Schedule Month", "Region"),
+    measures=("Schedule_Amount", "Weighted_Amount", "Committed_Amount", "Rows"),
+    contributions=pipeline_contributions,
+)
+
+INCREMENTAL_SPECS: Dict[str, IncrementalSpec] = {"vacation": VACATION, "salesforce": SALESFORCE}
+
+
+@dataclass
+class RefreshResult:
+    source: str
+    mode: str
+    rows_read: int = 0
+    inserted: int = 0
+    retracted: int = 0
+    batches: List[int] = field(default_factory=list)
+    watermark: Optional[Tuple[int, str]] = None
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        batches = ", ".join(str(b) for b in self.batches) or "none"
+        return (f"{self.source}: {self.mode}, {self.rows_read:,} rows read (batches {batches}), "
+                f"{self.inserted:,} inserted, {self.retracted:,} retracted in {self.seconds:.2f}s")
+
+
+# ------------------------------------------------------------------ helpers
+
+def _row_order(batch_ids: pd.Series, last_runs: pd.Series) -> np.ndarray:
+    """Sortable (batch id, last run) per row: later batches, then later runs of one batch, win."""
+    ids = pd.to_numeric(batch_ids, errors="coerce").fillna(-1).astype(np.int64).to_numpy()
+    runs = pd.to_datetime(last_runs, errors="coerce")
+    seconds = (runs.astype("datetime64[s]").astype("int64")).where(runs.notna(), 0).to_numpy()
+    return ids * 10**10 + seconds
+
+
+def _key_hash(rows: pd.DataFrame, columns: Iterable[str]) -> np.ndarray:
+    text = rows[list(columns)].astype("string")
+    return pd.util.hash_pandas_object(text, index=False).to_numpy()
+
+
+def _batch_labels(rows: pd.DataFrame) -> pd.Series:
+    """``"<batch id>@<last run>"`` per row: one label per delivered run of a batch."""
+    ids = pd.to_numeric(rows[BATCH_ID], errors="coerce").fillna(-1).astype(np.int64).astype(str)
+    runs = pd.to_datetime(rows[BATCH_LAST_RUN], errors="coerce").dt.strftime("%Y-%m-%dT%H:%M:%S").fillna("")
+    return ids + "@" + runs
+
+
+def _batch_digests(rows: pd.DataFrame, spec: IncrementalSpec, labels: Optional[pd.Series] = None) -> Dict[str, dict]:
+    """Per batch run: row count and an order-insensitive sum of row hashes (additive across reads)."""
+    if rows.empty:
+        return {}
+    labels = _batch_labels(rows) if labels is None else labels
+    hashes = _key_hash(rows, spec.columns)
+    out = {}
+    for label, positions in labels.groupby(labels.to_numpy(), sort=True).indices.items():
+        out[label] = {"rows": int(len(positions)), "digest": int(hashes[positions].sum(dtype=np.uint64))}
+    return out
+
+
+def _merge_digests(old: Dict[str, dict], new: Dict[str, dict]) -> Dict[str, dict]:
+    merged = {k: dict(v) for k, v in old.items()}
+    for label, entry in new.items():
+        prev = merged.setdefault(label, {"rows": 0, "digest": 0})
+        prev["rows"] += entry["rows"]
+        prev["digest"] = int((prev["digest"] + entry["digest"]) % 2**64)
+    return merged
+
+
+def _watermark(batches: Dict[str, dict]) -> Tuple[int, str]:
+    """Newest (batch id, last run) among the processed batch runs."""
+    runs = [(int(label.split("@")[0]), label.split("@")[1]) for label in batches]
+    return max(runs, default=(-1, ""))
+
+
+def _tail_digest(path: str, offset: int) -> str:
+    with open(path, "rb") as f:
+        f.seek(max(offset - TAIL_BYTES, 0))
+        return hashlib.sha256(f.read(min(offset, TAIL_BYTES))).hexdigest()
+
+
+def _header_line(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.readline()
+
+
+def _empty_aggregate(spec: IncrementalSpec) -> pd.DataFrame:
+    return pd.DataFrame(columns=list(spec.group + spec.measures), index=pd.Index([], dtype="uint64"))
+
+
+def _patch_aggregate(aggregate: pd.DataFrame, parts: List[Optional[pd.DataFrame]], spec: IncrementalSpec) -> pd.DataFrame:
+    """
+    Add the contribution ``parts`` into ``aggregate``, which is indexed by the
+    hash of its group columns: only the groups the parts touch are looked up
+    and updated, so the cost follows the delta, not the stored history.
+    """
+    parts = [p for p in parts if p is not None and not p.empty]
+    if not parts:
+        return aggregate
+    group, measures = list(spec.group), list(spec.measures)
+    change = pd.concat(parts, ignore_index=True)
+    change = change.groupby(group, dropna=False, sort=True)[measures].sum().reset_index()
+    change.index = pd.Index(_key_hash(change, group))
+    if aggregate.empty:
+        aggregate = change
+    else:
+        pos = aggregate.index.get_indexer(change.index)
+        found = pos >= 0
+        for col in measures:
+            values = aggregate[col].to_numpy(copy=True)
+            values[pos[found]] += change[col].to_numpy()[found]
+            aggregate[col] = values
+        if not found.all():
+            aggregate = pd.concat([aggregate, change[~found]])
+    # Groups whose every contributing row was retracted disappear
+    count = aggregate[spec.measures[-1]].to_numpy()
+    return aggregate[count != 0] if (count == 0).any() else aggregate
+
+
+def _index_dtypes() -> Dict[str, str]:
+    """Columns kept per stored row in ``index.pkl``; the payload (spec columns, batch stamps) is in the segments."""
+    return {"_key": "uint64", "_scope": "uint64", "_order": "int64", "_batch": "int64",
+            "_segment": "int32", "_row": "int64", "_active": "bool"}
+
+
+def _write_pickle(path: str, value) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+# -------------------------------------------------------------------- store
+
+class IncrementalStore:
+    """Watermarked live rows and additive aggregates for the batch-stamped sources."""
+
+    def __init__(self, data_dir: str, state_dir: Optional[str] = None):
+        self.data_dir = data_dir
+        self.state_dir = state_dir or os.path.join(os.path.dirname(os.path.abspath(data_dir)), ".cache", "incremental")
+
+    def csv_path(self, name: str) -> str:
+        return os.path.join(self.data_dir, SOURCE_FILES[INCREMENTAL_SPECS[name].source])
+
+    def _dir(self, name: str) -> str:
+        return os.path.join(self.state_dir, name)
+
+    def state(self, name: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self._dir(name), "state.json"), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return state if state.get("version") == STATE_VERSION else None
+
+    def _segment_path(self, name: str, segment: int) -> str:
+        return os.path.join(self._dir(name), "segments", f"{segment:06d}.feather")
+
+    def index(self, name: str) -> pd.DataFrame:
+        """One entry per stored row: key/scope hashes, batch order, segment and position, active flag."""
+        path = os.path.join(self._dir(name), "index.pkl")
+        if not os.path.exists(path):
+            return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in _index_dtypes().items()})
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def rows(self, name: str, active_only: bool = True) -> pd.DataFrame:
+        """Stored rows of ``name``; superseded ones are kept (inactive) until their key is resolved again."""
+        index = self.index(name)
+        if active_only:
+            index = index[index["_active"]]
+        return self._payload(name, index)
+
+    def _payload(self, name: str, entries: pd.DataFrame) -> pd.DataFrame:
+        """The stored rows behind index ``entries`` (in their order), read from the memory-mapped segments."""
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        entries = entries.reset_index(drop=True)
+        if entries.empty:
+            return entries
+        parts = []
+        for segment, positions in entries.groupby("_segment", sort=True).indices.items():
+            table = feather.read_table(self._segment_path(name, int(segment)), memory_map=True)
+            part = table.take(pa.array(entries["_row"].to_numpy()[positions])).to_pandas()
+            part.index = positions
+            parts.append(part)
+        rows = pd.concat(parts).sort_index() if len(parts) > 1 else parts[0]
+        for col in entries.columns:
+            rows[col] = entries[col].to_numpy()
+        return rows.reset_index(drop=True)
+
+    def aggregate(self, name: str) -> pd.DataFrame:
+        """The ``group`` x ``measures`` sums of ``name``, ordered by group."""
+        spec = INCREMENTAL_SPECS[name]
+        return self._aggregate(name).sort_values(list(spec.group), kind="stable").reset_index(drop=True)
+
+    def _aggregate(self, name: str) -> pd.DataFrame:
+        """The stored aggregate, indexed by the hash of its group columns."""
+        path = os.path.join(self._dir(name), "aggregate.pkl")
+        if not os.path.exists(path):
+            return _empty_aggregate(INCREMENTAL_SPECS[name])
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    # ------------------------------------------------------------- reading
+
+    def _read(self, path: str, spec: IncrementalSpec, offset: int = 0, names: Optional[List[str]] = None) -> pd.DataFrame:
+        wanted = spec.columns + [BATCH_ID, BATCH_LAST_RUN]
+        with open(path, "rb") as f:
+            if offset:
+                f.seek(offset)
+                try:
+                    rows = pd.read_csv(f, header=None, names=names, usecols=lambda c: c in wanted, low_memory=False)
+                except pd.errors.EmptyDataError:
+                    return pd.DataFrame(columns=wanted)
+            else:
+                chunks = pd.read_csv(f, usecols=lambda c: c in wanted, chunksize=SCAN_CHUNK_ROWS, low_memory=False)
+                rows = pd.concat(list(chunks), ignore_index=True)
+        missing = [c for c in wanted if c not in rows.columns]
+        if missing:
+            raise ValueError(f"{os.path.basename(path)} is missing columns needed for incremental refresh: {', '.join(missing)}")
+        return apply_spec(rows[wanted], SOURCE_SPECS[spec.source])
+
+    # ------------------------------------------------------------- refresh
+
+    def refresh(self, name: str) -> RefreshResult:
+        """Bring ``name`` up to date with its CSV; returns what was read and changed."""
+        t0 = time.perf_counter()
+        spec = INCREMENTAL_SPECS[name]
+        path = self.csv_path(name)
+        size = os.path.getsize(path)
+        header = _header_line(path)
+        header_digest = hashlib.sha256(header).hexdigest()
+        state = self.state(name)
+
+        batches: Dict[str, dict] = state["batches"] if state else {}
+        rebuild = state is None
+        if state is None:
+            mode, delta = "initial", self._read(path, spec)
+        elif (
+            state["header"] == header_digest
+            and state["offset"] <= size
+            and state["tail"] == _tail_digest(path, state["offset"])
+        ):
+            if state["offset"] == size:
+                return self._finish(RefreshResult(name, "unchanged", watermark=tuple(state["watermark"])), t0)
+            names = pd.read_csv(path, nrows=0).columns.tolist()
+            mode, delta = "append", self._read(path, spec, state["offset"], names)
+        else:
+            rows = self._read(path, spec)
+            labels = _batch_labels(rows)
+            known = labels.isin(list(batches)).to_numpy()
+            current = _batch_digests(rows[known], spec, labels[known])
+            if current != batches:
+                # Processed history was rewritten or removed: start over from the file
+                mode, delta, rebuild = "rebuild", rows, True
+                batches = {}
+            else:
+                mode, delta = "scan", rows[~known]
+
+        if rebuild:
+            self._reset(name)
+            index, aggregate, segment = self.index(name), None, 0
+        else:
+            index, aggregate, segment = self.index(name), self._aggregate(name), state["next_segment"]
+        result = RefreshResult(name, mode, rows_read=len(delta))
+        index, aggregate, dropped = self._apply(name, spec, index, aggregate, delta, segment, result)
+        if len(delta):
+            segment += 1
+        batches = _merge_digests(batches, _batch_digests(delta, spec))
+        watermark = _watermark(batches)
+        result.watermark = watermark
+        self._save(name, index, aggregate, {
+            "version": STATE_VERSION,
+            "source": SOURCE_FILES[spec.source],
+            "header": header_digest,
+            "offset": size,
+            "tail": _tail_digest(path, size),
+            "watermark": list(watermark),
+            "batches": batches,
+            "next_segment": segment,
+            "rows": len(index),
+            "active_rows": int(index["_active"].sum()),
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }, dropped)
+        return self._finish(result, t0)
+
+    def _apply(
+        self,
+        name: str,
+        spec: IncrementalSpec,
+        index: pd.DataFrame,
+        aggregate: Optional[pd.DataFrame],
+        delta: pd.DataFrame,
+        segment: int,
+        result: RefreshResult,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, List[int]]:
+        """Fold ``delta`` in as segment ``segment``; returns the new index, aggregate and the segments no longer referenced."""
+        if aggregate is None:
+            aggregate = _empty_aggregate(spec)
+        if delta.empty:
+            return index, aggregate, []
+
+        delta = delta.reset_index(drop=True)
+        delta["_key"] = _key_hash(delta, spec.key)
+        delta["_scope"] = _key_hash(delta, spec.scope) if spec.scope else delta["_key"]
+        delta["_order"] = _row_order(delta[BATCH_ID], delta[BATCH_LAST_RUN])
+        delta["_batch"] = pd.to_numeric(delta[BATCH_ID], errors="coerce").fillna(-1).astype(np.int64)
+        # Only the latest run of each batch in the delta counts
+        delta = delta[delta["_order"] == delta.groupby("_batch")["_order"].transform("max")].reset_index(drop=True)
+        result.batches = sorted(int(b) for b in delta["_batch"].unique())
+        payload = [c for c in delta.columns if c not in _index_dtypes()]
+        self._write_segment(name, segment, delta[payload])
+        delta["_segment"] = np.int32(segment)
+        delta["_row"] = np.arange(len(delta), dtype=np.int64)
+
+        # Earlier runs of a batch the delta re-delivers are replaced outright
+        newest_run = delta.groupby("_batch")["_order"].max()
+        replaced = index["_batch"].map(newest_run).gt(index["_order"]).to_numpy()
+        keys = pd.Index(delta["_key"]).union(pd.Index(index.loc[replaced, "_key"]))
+        affected = index["_key"].isin(keys).to_numpy()
+        if spec.scope:
+            # Every live row of a touched scope is re-contributed with it
+            scopes = pd.Index(delta["_scope"]).union(pd.Index(index.loc[affected, "_scope"]))
+            affected = affected | index["_scope"].isin(scopes).to_numpy()
+
+        # Per affected key the newest (batch, run) is active; superseded rows are
+        # kept inactive so they come back if the batch that superseded them is re-run without them.
+        # Only the affected rows are read back from their segments
+        before = self._payload(name, index[affected])
+        pool = pd.concat([before[~replaced[affected]], delta.assign(_active=False)], ignore_index=True)
+        pool["_active"] = (pool["_order"] == pool.groupby("_key")["_order"].transform("max")).to_numpy()
+        was_active = before[before["_active"]] if len(before) else before
+        now_active = pool[pool["_active"]]
+
+        # Unchanged rows cancel out; the work is bounded by the affected keys
+        minus = spec.contributions(was_active) if len(was_active) else None
+        if minus is not None:
+            minus[list(spec.measures)] = -minus[list(spec.measures)]
+        plus = spec.contributions(now_active) if len(now_active) else None
+        aggregate = _patch_aggregate(aggregate, [minus, plus], spec)
+
+        new_keys = set(zip(now_active["_key"], now_active["_order"]))
+        old_keys = set(zip(was_active["_key"], was_active["_order"])) if len(was_active) else set()
+        result.inserted = int(sum((k, o) not in old_keys for k, o in zip(now_active["_key"], now_active["_order"])))
+        result.retracted = int(sum((k, o) not in new_keys for k, o in zip(was_active["_key"], was_active["_order"])))
+        dtypes = _index_dtypes()
+        index = pd.concat([index[~affected], pool[list(dtypes)].astype(dtypes)], ignore_index=True)
+        dropped = sorted(set(before["_segment"].unique().tolist()) - set(index["_segment"].unique().tolist())) if len(before) else []
+        return index, aggregate, [int(d) for d in dropped]
+
+    def _write_segment(self, name: str, segment: int, rows: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        path = self._segment_path(name, segment)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        table = pa.Table.from_pandas(rows, preserve_index=False)
+        # Uncompressed, one record batch: later refreshes memory-map it and take single rows
+        feather.write_feather(table, tmp, compression="uncompressed", chunksize=max(len(rows), 1))
+        os.replace(tmp, path)
+
+    def _reset(self, name: str) -> None:
+        """Drop the stored rows (the state is rewritten by the refresh)."""
+        directory = self._dir(name)
+        shutil.rmtree(os.path.join(directory, "segments"), ignore_errors=True)
+        for stale in ("index.pkl", "rows.pkl"):
+            if os.path.exists(os.path.join(directory, stale)):
+                os.remove(os.path.join(directory, stale))
+
+    def _save(self, name: str, index: pd.DataFrame, aggregate: pd.DataFrame, state: dict, dropped: Iterable[int] = ()) -> None:
+        directory = self._dir(name)
+        os.makedirs(directory, exist_ok=True)
+        _write_pickle(os.path.join(directory, "index.pkl"), index)
+        _write_pickle(os.path.join(directory, "aggregate.pkl"), aggregate)
+        tmp = os.path.join(directory, "state.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp, os.path.join(directory, "state.json"))
+        for segment in dropped:
+            try:
+                os.remove(self._segment_path(name, segment))
+            except OSError:
+                pass
+
+    @staticmethod
+    def _finish(result: RefreshResult, t0: float) -> RefreshResult:
+        result.seconds = time.perf_counter() - t0
+        return result
+
+    # -------------------------------------------------------------- views
+
+    def vacation_monthly(self, months=None, person_index=None, person_ids=None) -> pd.DataFrame:
+        """
+        ``capacity.stages.vacation_monthly``-shaped summary from the stored
+        aggregate, optionally limited to ``months`` and to ``person_ids``
+        (matched through ``person_index`` like the vacation stage).
+        Categories are listed alphabetically.
+        """
+        agg = self.aggregate("vacation")
+        if months is not None:
+            agg = agg[agg["Month"].isin(pd.DatetimeIndex(months))]
+        if person_ids is not None:
+            ids = person_index.lookup(employee_numbers=agg["Employee Number"], names=agg["Full Name"])
+            agg = agg[np.isin(ids, np.asarray(person_ids))]
+        if agg.empty:
+            return pd.DataFrame()
+        return agg.groupby(["Full Name", "Month"]).agg(
+            Days_Used=("Days_Used", "sum"),
+            Days_Scheduled=("Days_Scheduled", "sum"),
+            Vacation_Category=("Vacation_Category", lambda x: ", ".join(sorted(x.unique()))),
+            First_Name=("First Name", "first"),
+            Last_Name=("Last Name", "first"),
+            Employee_Number=("Employee Number", "first"),
+        ).reset_index().rename(columns={"Full Name": "Full_Name"})
+
+    def pipeline_monthly(self, months=None) -> pd.DataFrame:
+        """Scheduled / probability-weighted / committed Salesforce amounts per month and region."""
+        agg = self.aggregate("salesforce")
+        if months is not None:
+            agg = agg[agg["Schedule Month"].isin(pd.DatetimeIndex(months))]
+        return agg.reset_index(drop=True)
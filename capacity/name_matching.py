@@ -0,0 +1,360 @@
+"""
+Blocked fuzzy matching of leave records to 10k users for the leftovers of the exact join.
+
+The person index (capacity.identity) matches Namely rows on employee number,
+then on the Unicode-folded full name. What is left are preferred names ("Chris
+Lock" vs "Christopher Lock"), middle or double last names, swapped order and
+"(Archived)"-style suffixes, often on users whose ``employee_number`` is blank.
+Scoring every residual name against every user is O(n x m); this module keeps
+it near linear:
+
+  - blocking:  each name is reduced to canonical tokens (accents folded,
+               punctuation and parentheticals dropped, common nicknames mapped
+               to one form) and only names sharing one of their two rarest
+               tokens are compared. Tokens carried by more than ``max_block``
+               users (very common first names) are not used as blocks, so a
+               name has at most ``2 * max_block`` candidates
+  - scoring:   one numpy pass over the candidate pairs: character-trigram Dice
+               on the sorted tokens plus the share of tokens in common (a
+               first name that is a prefix of the other counts as shared)
+  - decision:  the best candidate is accepted when its score reaches
+               ``min_score`` and beats the runner-up by ``min_margin``;
+               otherwise the name is ``ambiguous`` or ``no_match``
+
+Decisions are cached in JSON per folded name together with a digest of that
+name's own blocked candidates (their names and person ids) and the options,
+so an unchanged run scores nothing, a roster change re-scores only the names
+whose blocks it touches, and a manual decision (``"manual": true``) always wins:
+
+    matcher = NameMatcher.open('../.cache/name_matches.json')
+    ids, scores = matcher.fill(df_vacation_raw['Full Name'], person_ids, person_index)
+    matcher.save()
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from capacity.identity import MISSING_ID, PersonIndex, fold_name
+
+
+MATCH_CACHE_VERSION = 2
+MATCH = "match"
+AMBIGUOUS = "ambiguous"
+NO_MATCH = "no_match"
+
+# Preferred / short forms -> one canonical first name (folded)
+NICKNAMES = {
+    "abby": "abigail", "al": "albert", "alex": "alexander", "andy": "andrew", "drew": "andrew",
+    "ben": "benjamin", "beth": "elizabeth", "bill": "william", "billy": "william", "bob": "robert",
+    "bobby": "robert", "cathy": "catherine", "kate": "catherine", "katie": "catherine", "chris": "christopher",
+    "chuck": "charles", "charlie": "charles", "dan": "daniel", "danny": "daniel", "dave": "david",
+    "deb": "deborah", "debbie": "deborah", "doug": "douglas", "ed": "edward", "eddie": "edward",
+    "fred": "frederick", "greg": "gregory", "jeff": "jeffrey", "jen": "jennifer", "jenny": "jennifer",
+    "jim": "james", "jimmy": "james", "joe": "joseph", "joey": "joseph", "jon": "jonathan",
+    "josh": "joshua", "kathy": "katherine", "ken": "kenneth", "larry": "lawrence", "liz": "elizabeth",
+    "lizzie": "elizabeth", "matt": "matthew", "mike": "michael", "mick": "michael", "nick": "nicholas",
+    "pat": "patrick", "pete": "peter", "phil": "philip", "rob": "robert", "ron": "ronald",
+    "sam": "samuel", "steve": "steven", "stephen": "steven", "sue": "susan", "ted": "edward",
+    "tim": "timothy", "tom": "thomas", "tommy": "thomas", "tony": "anthony", "vicky": "victoria",
+    "will": "william", "zach": "zachary", "zack": "zachary",
+}
+
+
+# ------------------------------------------------------------- normalization
+
+def name_tokens(values: Iterable) -> pd.Series:
+    """
+    Canonical token tuple per name: folded, parentheticals and punctuation
+    removed, hyphens split, first token mapped through ``NICKNAMES``.
+    """
+    folded = fold_name(values).fillna("")
+    cleaned = (
+        folded.str.replace(r"\(.*?\)", " ", regex=True)
+        .str.replace(r"[-_/]", " ", regex=True)
+        .str.replace(r"[^\w ]", "", regex=True)
+        .str.split()
+    )
+    return cleaned.map(lambda t: (NICKNAMES.get(t[0], t[0]), *t[1:]) if t else ())
+
+
+def _trigrams(text: str) -> list:
+    padded = f"  {text} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def _csr(items: pd.Series, vocabulary: Optional[pd.Index] = None) -> Tuple[np.ndarray, np.ndarray, pd.Index]:
+    """(indptr, sorted unique ids per row, vocabulary) for a Series of lists."""
+    lengths = items.map(len).to_numpy(dtype=np.int64)
+    flat = items.explode().dropna()
+    if vocabulary is None:
+        vocabulary = pd.Index(pd.unique(flat.to_numpy(dtype=object)))
+    ids = vocabulary.get_indexer(flat.to_numpy(dtype=object))
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    return indptr, ids.astype(np.int64), vocabulary
+
+
+def _pair_intersections(left: Tuple[np.ndarray, np.ndarray], right: Tuple[np.ndarray, np.ndarray],
+                        li: np.ndarray, ri: np.ndarray, vocabulary_size: int) -> np.ndarray:
+    """|set(left[li[p]]) & set(right[ri[p]])| for every pair p, in one sort."""
+
+    def expand(indptr, ids, rows):
+        counts = indptr[rows + 1] - indptr[rows]
+        pair = np.repeat(np.arange(len(rows)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return pair * vocabulary_size + ids[np.repeat(indptr[rows], counts) + within]
+
+    common = np.intersect1d(expand(*left, li), expand(*right, ri), assume_unique=True)
+    return np.bincount(common // vocabulary_size, minlength=len(li))
+
+
+# ------------------------------------------------------------------ matching
+
+def candidate_pairs(
+    left_tokens: pd.Series,
+    right_tokens: pd.Series,
+    max_block: int = 200,
+    block_tokens: int = 2,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unique (left, right) positions sharing a block. Each left name is blocked
+    on its ``block_tokens`` rarest tokens among the right names; tokens of
+    one character or shared by more than ``max_block`` right names are not
+    blocks. The pair count is therefore at most
+    ``len(left) * block_tokens * max_block``.
+    """
+    left = left_tokens.reset_index(drop=True).explode().dropna()
+    right = right_tokens.reset_index(drop=True).explode().dropna()
+    right = right[right.map(len) >= 2]
+    block_sizes = right.groupby(right.to_numpy(dtype=object)).size()
+    right = right[right.map(block_sizes).le(max_block).to_numpy()]
+
+    left = pd.DataFrame({"token": left.to_numpy(dtype=object), "left": left.index.to_numpy()})
+    left["size"] = left["token"].map(block_sizes).fillna(0).to_numpy()
+    left = left[(left["size"] > 0) & (left["size"] <= max_block)].drop_duplicates(["left", "token"])
+    left = left.sort_values(["left", "size"], kind="stable")
+    left = left[left.groupby("left").cumcount().to_numpy() < block_tokens]
+
+    pairs = pd.merge(
+        left[["token", "left"]],
+        pd.DataFrame({"token": right.to_numpy(dtype=object), "right": right.index.to_numpy()}),
+        on="token",
+    )[["left", "right"]].drop_duplicates()
+    return pairs["left"].to_numpy(dtype=np.int64), pairs["right"].to_numpy(dtype=np.int64)
+
+
+def score_pairs(left_tokens: pd.Series, right_tokens: pd.Series, li: np.ndarray, ri: np.ndarray) -> np.ndarray:
+    """Similarity in [0, 1] per pair: mean of trigram Dice and shared-token ratio."""
+    left_tokens = left_tokens.reset_index(drop=True)
+    right_tokens = right_tokens.reset_index(drop=True)
+    if not len(li):
+        return np.empty(0)
+
+    grams = pd.concat([left_tokens, right_tokens], ignore_index=True).map(lambda t: _trigrams(" ".join(sorted(t))))
+    indptr, ids, vocab = _csr(grams)
+    n = len(left_tokens)
+    left_g = (indptr[: n + 1], ids)
+    right_g = (indptr[n:] - indptr[n], ids[indptr[n]:])
+    shared = _pair_intersections(left_g, right_g, li, ri, len(vocab))
+    sizes = np.diff(indptr)
+    dice = 2.0 * shared / np.maximum(sizes[:n][li] + sizes[n:][ri], 1)
+
+    tokens = pd.concat([left_tokens, right_tokens], ignore_index=True).map(lambda t: list(dict.fromkeys(t)))
+    indptr, ids, vocab = _csr(tokens)
+    left_t = (indptr[: n + 1], ids)
+    right_t = (indptr[n:] - indptr[n], ids[indptr[n]:])
+    common = _pair_intersections(left_t, right_t, li, ri, len(vocab)).astype(np.float64)
+    counts = np.diff(indptr)
+
+    # "chris" / "christopher": a first name that prefixes the other counts as shared
+    first_l = left_tokens.map(lambda t: t[0] if t else "").to_numpy(dtype=str)[li]
+    first_r = right_tokens.map(lambda t: t[0] if t else "").to_numpy(dtype=str)[ri]
+    short = np.minimum(np.char.str_len(first_l), np.char.str_len(first_r))
+    prefix = (first_l != first_r) & (short >= 3) & (np.char.startswith(first_l, first_r) | np.char.startswith(first_r, first_l))
+    common += prefix
+    overlap = common / np.maximum(np.minimum(counts[:n][li], counts[n:][ri]), 2)
+    return 0.5 * dice + 0.5 * np.minimum(overlap, 1.0)
+
+
+def best_matches(scores: np.ndarray, li: np.ndarray, ri: np.ndarray, n_left: int) -> pd.DataFrame:
+    """Best and runner-up candidate per left row (by score, then right position)."""
+    frame = pd.DataFrame({"left": li, "right": ri, "score": scores}).sort_values(
+        ["left", "score", "right"], ascending=[True, False, True], kind="stable",
+    )
+    rank = frame.groupby("left").cumcount().to_numpy()
+    best = frame[rank == 0].set_index("left")
+    runner_up = frame[rank == 1].set_index("left")["score"]
+    out = pd.DataFrame(index=pd.RangeIndex(n_left))
+    out["right"] = best["right"].reindex(out.index).fillna(-1).astype(np.int64)
+    out["score"] = best["score"].reindex(out.index).fillna(0.0)
+    out["runner_up"] = runner_up.reindex(out.index).fillna(0.0)
+    return out
+
+
+# --------------------------------------------------------------- the matcher
+
+class NameMatcher:
+    """Confidence-scored, cached name -> ``person_id`` matches for records the exact join missed."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        min_score: float = 0.8,
+        min_margin: float = 0.05,
+        max_block: int = 200,
+        block_tokens: int = 2,
+    ):
+        self.path = path
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.max_block = max_block
+        self.block_tokens = block_tokens
+        self.decisions: Dict[str, dict] = {}
+        self.last_scored = 0
+
+    @classmethod
+    def open(cls, path: str, **options) -> "NameMatcher":
+        """Load cached decisions from ``path`` (if present); saves back there."""
+        matcher = cls(path, **options)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") == MATCH_CACHE_VERSION:
+                matcher.decisions = payload.get("decisions", {})
+        return matcher
+
+    def save(self, path: Optional[str] = None) -> str:
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given for saving name matches")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MATCH_CACHE_VERSION, "decisions": self.decisions}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+        self.path = path
+        return path
+
+    def _options(self) -> dict:
+        return {
+            "min_score": self.min_score,
+            "min_margin": self.min_margin,
+            "max_block": self.max_block,
+            "block_tokens": self.block_tokens,
+        }
+
+    @staticmethod
+    def candidates_from_index(person_index: PersonIndex, exclude_ids: Iterable[int] = ()) -> pd.Series:
+        """Folded user name -> ``person_id`` from the index (ambiguous names are never in it)."""
+        names = pd.Series(person_index.keys["name"], dtype="int64")
+        excluded = np.asarray(list(exclude_ids), dtype=np.int64)
+        return names[~np.isin(names.to_numpy(), excluded)].sort_index()
+
+    def _block_digests(self, n_left: int, li: np.ndarray, ri: np.ndarray, candidates: pd.Series) -> list:
+        """
+        Per left name: digest of the options and of its blocked (candidate
+        name, person_id) pairs, as an order-insensitive sum of pair hashes.
+        """
+        options = json.dumps(self._options(), sort_keys=True)
+        pair_hash = pd.util.hash_pandas_object(
+            pd.DataFrame({"name": candidates.index.astype("string"), "id": candidates.to_numpy()}), index=False,
+        ).to_numpy()
+        sums = np.zeros(n_left, dtype=np.uint64)
+        np.add.at(sums, li, pair_hash[ri])
+        counts = np.bincount(li, minlength=n_left)
+        return [
+            hashlib.sha256(f"{options}|{count}|{total}".encode("utf-8")).hexdigest()[:16]
+            for count, total in zip(counts.tolist(), sums.tolist())
+        ]
+
+    def match(self, names: Iterable, candidates: Mapping[str, int]) -> pd.DataFrame:
+        """
+        One decision per distinct folded name in ``names`` against
+        ``candidates`` (folded name -> person_id). Columns: name, person_id
+        (``-1`` unless decision is ``match``), candidate, score, runner_up,
+        decision, cached.
+
+        Every name is blocked (cheap); only names whose blocked candidates or
+        the options changed since their cached decision are scored.
+        """
+        candidates = pd.Series(candidates, dtype="int64").sort_index()
+        wanted = pd.Index(fold_name(names).dropna().unique())
+        left = name_tokens(wanted)
+        right = name_tokens(candidates.index)
+        li, ri = candidate_pairs(left, right, self.max_block, self.block_tokens)
+        digests = self._block_digests(len(wanted), li, ri, candidates)
+
+        stale = np.array([
+            not (n in self.decisions and (self.decisions[n].get("manual") or self.decisions[n].get("candidates") == d))
+            for n, d in zip(wanted, digests)
+        ], dtype=bool)
+        todo = wanted[stale]
+        self.last_scored = len(todo)
+
+        if len(todo):
+            # Only the pairs of the names being scored, renumbered to their position in ``todo``
+            positions = np.full(len(wanted), -1, dtype=np.int64)
+            positions[stale] = np.arange(len(todo))
+            keep = stale[li]
+            li, ri = positions[li[keep]], ri[keep]
+            scores = score_pairs(left[stale], right, li, ri)
+            best = best_matches(scores, li, ri, len(todo))
+            candidate_names = candidates.index.to_numpy(dtype=object)
+            candidate_ids = candidates.to_numpy()
+            decided = time.strftime("%Y-%m-%dT%H:%M:%S")
+            todo_digests = [d for d, s in zip(digests, stale) if s]
+            for name, digest, right_pos, score, runner_up in zip(todo, todo_digests, best["right"], best["score"], best["runner_up"]):
+                if score >= self.min_score and score - runner_up >= self.min_margin:
+                    decision = MATCH
+                elif score >= self.min_score:
+                    decision = AMBIGUOUS
+                else:
+                    decision = NO_MATCH
+                self.decisions[name] = {
+                    "person_id": int(candidate_ids[right_pos]) if decision == MATCH else MISSING_ID,
+                    "candidate": candidate_names[right_pos] if right_pos >= 0 else None,
+                    "score": round(float(score), 4),
+                    "runner_up": round(float(runner_up), 4),
+                    "decision": decision,
+                    "candidates": digest,
+                    "decided": decided,
+                }
+
+        scored = set(todo)
+        rows = [{"name": n, **{k: self.decisions[n].get(k) for k in ("person_id", "candidate", "score", "runner_up", "decision")},
+                 "cached": n not in scored} for n in wanted]
+        return pd.DataFrame(rows, columns=["name", "person_id", "candidate", "score", "runner_up", "decision", "cached"])
+
+    def fill(self, names: Iterable, person_ids: np.ndarray, person_index: PersonIndex) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fill the ``-1`` entries of ``person_ids`` with accepted fuzzy matches.
+
+        People already matched exactly by another row are not candidates, so a
+        nickname cannot steal a colleague's identity. Returns the new ids and a
+        confidence per row: 1.0 for exact matches, the match score for fuzzy
+        ones, 0.0 for rows still unmatched.
+        """
+        person_ids = np.asarray(person_ids, dtype=np.int64).copy()
+        confidence = np.where(person_ids != MISSING_ID, 1.0, 0.0)
+        unmatched = person_ids == MISSING_ID
+        if not unmatched.any():
+            return person_ids, confidence
+
+        folded = fold_name(pd.Series(names).reset_index(drop=True)[unmatched])
+        candidates = self.candidates_from_index(person_index, np.unique(person_ids[~unmatched]))
+        decisions = self.match(folded, candidates).set_index("name")
+        accepted = decisions[decisions["decision"] == MATCH]
+        found = folded.map(accepted["person_id"]).to_numpy(dtype="float64", na_value=np.nan)
+        scores = folded.map(accepted["score"]).to_numpy(dtype="float64", na_value=np.nan)
+        hit = ~np.isnan(found)
+        positions = np.flatnonzero(unmatched)[hit]
+        person_ids[positions] = found[hit].astype(np.int64)
+        confidence[positions] = scores[hit]
+        return person_ids, confidence
@@ -0,0 +1,196 @@
+"""
+Point-in-time interval index over ``employee_org_units_dept_div_loc``.
+
+The misalignment and projection dataflows look up, for every comp row, the
+Department / Division / Office Location assignment covering the comp date:
+
+    LOWER(TRIM(Email)) = LOWER(TRIM(c.`Work Email`))
+    AND TRIM(`Org Type`) IN (...)
+    AND comp_date BETWEEN DATE(`Assignment Start Date`)
+                      AND COALESCE(DATE(`Assignment End Date`), '9999-12-31')
+
+as a correlated subquery per row. Here the assignments of each org type are
+sorted once by (email, start date) with a running maximum of the end date, so
+"is this date covered" is one binary search and "which assignment" (the
+latest start covering the date, the projection's ``MAX(start_date)``) is a
+binary search plus a short backward walk over overlapping assignments:
+
+    index = OrgUnitIndex(df_org_units)
+    index.covers('Department', comp['Work Email'], comp['comp_effective_date'])
+    index.resolve(comp['Work Email'], comp['comp_effective_date'])
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# ``TRIM(`Org Type`) IN (...)`` lists used by the dataflows
+ORG_TYPE_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "Department": ("Department", "Departments"),
+    "Division": ("Division", "Divisions"),
+    "Office Location": ("Office Location", "Office Locations", "Location", "Locations", "Office"),
+}
+ORG_TYPES = tuple(ORG_TYPE_ALIASES)
+
+OPEN_END = np.datetime64("9999-12-31", "D").astype(np.int64)
+NO_MATCH = -1
+_DAY_OFFSET = 1 << 31
+
+
+def normalize_email(values: Iterable) -> pd.Series:
+    """``LOWER(TRIM(email))``; blank stays blank (it matches other blanks, as in SQL)."""
+    return pd.Series(values, dtype="object").astype("string").str.strip().str.lower()
+
+
+def _days(values) -> np.ndarray:
+    """Dates -> float days since epoch (``DATE()``), NaN when missing or unparseable."""
+    dt = pd.to_datetime(pd.Series(values), errors="coerce").dt.normalize()
+    days = dt.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64).astype(np.float64)
+    days[dt.isna().to_numpy()] = np.nan
+    return days
+
+
+class _TypeIntervals:
+    """Assignments of one org type, sorted by (email code, start day)."""
+
+    def __init__(self, codes: np.ndarray, start: np.ndarray, end: np.ndarray, raw_end: np.ndarray, unit: np.ndarray):
+        keys = (codes << 32) | (start + _DAY_OFFSET)
+        order = np.lexsort((end, keys))
+        self.keys = keys[order]
+        self.codes = codes[order]
+        self.start = start[order]
+        self.end = end[order]
+        self.raw_end = raw_end[order]
+        self.unit = unit[order]
+
+        # Running max of end dates within each email, for O(1) "anything covers?"
+        self.max_end = pd.Series(self.end).groupby(self.codes).cummax().to_numpy(dtype=np.int64)
+
+    def last_started(self, codes: np.ndarray, days: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """Last assignment of the same email starting on/before ``days``."""
+        keys = (codes << 32) | (days + _DAY_OFFSET)
+        if len(self.keys) == 0:
+            return np.full(len(keys), NO_MATCH, dtype=np.int64)
+        pos = np.searchsorted(self.keys, keys, side="right") - 1
+        safe = np.clip(pos, 0, len(self.keys) - 1)
+        ok = valid & (pos >= 0) & (self.codes[safe] == codes)
+        return np.where(ok, safe, NO_MATCH)
+
+    def covers(self, codes, days, valid) -> np.ndarray:
+        pos = self.last_started(codes, days, valid)
+        hit = pos >= 0
+        out = np.zeros(len(pos), dtype=bool)
+        out[hit] = self.max_end[pos[hit]] >= days[hit]
+        return out
+
+    def covering(self, codes, days, valid) -> np.ndarray:
+        """Position of the latest-starting assignment covering ``days`` (``NO_MATCH`` if none)."""
+        pos = self.last_started(codes, days, valid)
+        live = pos >= 0
+        live[live] = self.max_end[pos[live]] >= days[live]
+        result = np.full(len(pos), NO_MATCH, dtype=np.int64)
+        # Walk back over overlapping assignments; the running max guarantees a hit
+        while live.any():
+            idx = np.flatnonzero(live)
+            p = pos[idx]
+            found = self.end[p] >= days[idx]
+            result[idx[found]] = p[found]
+            live[idx[found]] = False
+            pos[idx[~found]] -= 1
+        return result
+
+
+class OrgUnitIndex:
+    """Interval index per (email, org type) over the Org Units table."""
+
+    def __init__(
+        self,
+        org_units: pd.DataFrame,
+        email_col: str = "Email",
+        type_col: str = "Org Type",
+        unit_col: str = "Org Unit",
+        start_col: str = "Assignment Start Date",
+        end_col: str = "Assignment End Date",
+    ):
+        email = normalize_email(org_units[email_col])
+        org_type = org_units[type_col].astype("string").str.strip()
+        start = _days(org_units[start_col])
+        raw_end = _days(org_units[end_col])
+        end = np.where(np.isnan(raw_end), OPEN_END, raw_end)
+
+        self.emails = pd.Index(pd.unique(email.dropna().to_numpy(dtype=object)))
+        codes = self.emails.get_indexer(email.to_numpy(dtype=object, na_value=None)).astype(np.int64)
+        unit = org_units[unit_col].to_numpy(dtype=object)
+
+        self.types: Dict[str, _TypeIntervals] = {}
+        for name, aliases in ORG_TYPE_ALIASES.items():
+            rows = (org_type.isin(aliases).fillna(False).to_numpy()) & (codes >= 0) & ~np.isnan(start)
+            self.types[name] = _TypeIntervals(
+                codes[rows],
+                start[rows].astype(np.int64),
+                end[rows].astype(np.int64),
+                raw_end[rows],
+                unit[rows],
+            )
+
+    def _encode(self, emails, dates) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        codes = self.emails.get_indexer(normalize_email(emails).to_numpy(dtype=object, na_value=None)).astype(np.int64)
+        days = _days(dates)
+        valid = (codes >= 0) & ~np.isnan(days)
+        return codes, np.where(valid, days, 0).astype(np.int64), valid
+
+    def has_email(self, emails) -> np.ndarray:
+        """Email has any Org Units row (the ``ou_any`` EXISTS)."""
+        return self.emails.get_indexer(normalize_email(emails).to_numpy(dtype=object, na_value=None)) >= 0
+
+    def covers(self, org_type: str, emails, dates) -> np.ndarray:
+        """Some ``org_type`` assignment of the email covers the date."""
+        return self.types[org_type].covers(*self._encode(emails, dates))
+
+    def lookup(self, org_type: str, emails, dates) -> pd.DataFrame:
+        """
+        The covering assignment with the latest start: ``Org Unit``, start and
+        end date (end left missing when the assignment is open).
+        """
+        intervals = self.types[org_type]
+        pos = intervals.covering(*self._encode(emails, dates))
+        hit = pos >= 0
+        unit = np.full(len(pos), None, dtype=object)
+        start = np.full(len(pos), np.nan)
+        end = np.full(len(pos), np.nan)
+        unit[hit] = intervals.unit[pos[hit]]
+        start[hit] = intervals.start[pos[hit]]
+        end[hit] = intervals.raw_end[pos[hit]]
+        return pd.DataFrame({
+            org_type: unit,
+            f"{org_type} Start Date": pd.to_datetime(start, unit="D"),
+            f"{org_type} End Date": pd.to_datetime(end, unit="D"),
+        })
+
+    def resolve(self, emails, dates, org_types: Sequence[str] = ORG_TYPES) -> pd.DataFrame:
+        """Batch lookup of every org type for a whole comp table (one row per input row)."""
+        frames = [self.lookup(org_type, emails, dates) for org_type in org_types]
+        return pd.concat(frames, axis=1)
+
+
+def org_units_notes(index: OrgUnitIndex, work_emails, dates) -> pd.Series:
+    """
+    The misalignment report's ``Org Units Notes`` column: the same four checks
+    joined with ``'; '`` (``CONCAT_WS`` skips the checks that pass).
+    """
+    emails = pd.Series(work_emails, dtype="object").astype("string")
+    blank = (emails.isna() | (emails.str.strip() == "")).fillna(True).to_numpy()
+    notes = [np.where(blank, "missing work email", None)]
+    notes.append(np.where(~blank & ~index.has_email(emails), "no org-units for email", None))
+    messages = {
+        "Department": "no Department covering comp date",
+        "Division": "no Division covering comp date",
+        "Office Location": "no Office Location covering comp date",
+    }
+    for org_type, message in messages.items():
+        notes.append(np.where(~blank & ~index.covers(org_type, emails, dates), message, None))
+    return pd.Series(["; ".join(n for n in row if n is not None) for row in zip(*notes)], index=emails.index)
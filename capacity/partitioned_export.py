@@ -0,0 +1,244 @@
+"""
+Month / role partitioned, incremental exports of the notebook DataFrames.
+
+Cell 6a used to write a full timestamped CSV of every DataFrame on each run.
+Here each logical dataset is split into partitions
+
+    <outdir>/<dataset>/month=2025-07/role=Strategy/part.parquet
+
+and every partition's content hash (``pd.util.hash_pandas_object`` over its
+rows plus its column names and dtypes) is compared with the one recorded in
+``<outdir>/manifest.json``. Only partitions whose hash changed are rewritten;
+partitions that no longer have rows are deleted. The manifest maps each
+dataset to its current partitions with their hash, row count and the export
+run that last wrote them, so a downstream upload (Domo) only has to pull what
+changed since the run it last saw:
+
+    from capacity.partitioned_export import PartitionedExporter, DatasetSpec
+
+    exporter = PartitionedExporter('../CSV review/partitioned')
+    result = exporter.export(df_vacation_monthly, DatasetSpec('df_vacation_monthly', month=('Month',)))
+    print(result.written, result.unchanged, result.removed)
+
+    for path in exporter.changed_since(last_pulled_run):
+        upload(path)
+    for rel in exporter.removed_since(last_pulled_run):
+        delete_remote(rel)
+
+Rows without a month or role go to ``month=unknown`` / ``role=unknown``.
+Parquet (pyarrow) is the default format; ``fmt='csv.gz'`` works without it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+UNKNOWN = "unknown"
+FORMATS: Dict[str, str] = {"parquet": ".parquet", "csv.gz": ".csv.gz"}
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """
+    One logical dataset. ``month`` / ``role`` list candidate column names; the
+    first one present in the frame is used, and a dataset with none of them is
+    simply not partitioned on that key.
+    """
+
+    name: str
+    month: Tuple[str, ...] = ()
+    role: Tuple[str, ...] = ()
+    description: str = ""
+
+    def resolve(self, columns) -> Tuple[Optional[str], Optional[str]]:
+        columns = list(columns)
+        month = next((c for c in self.month if c in columns), None)
+        role = next((c for c in self.role if c in columns), None)
+        return month, role
+
+
+@dataclass
+class ExportResult:
+    dataset: str
+    run: int
+    rows: int
+    written: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    bytes_written: int = 0
+
+
+def _path_value(value) -> str:
+    text = str(value).strip()
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text) or UNKNOWN
+
+
+def partition_keys(df: pd.DataFrame, month_column: Optional[str], role_column: Optional[str]) -> pd.Series:
+    """Relative partition directory of every row, e.g. ``month=2025-07/role=Strategy``."""
+    parts = []
+    if month_column is not None:
+        months = pd.to_datetime(df[month_column], errors="coerce")
+        label = months.dt.strftime("%Y-%m").fillna(UNKNOWN)
+        parts.append("month=" + label.astype(str))
+    if role_column is not None:
+        roles = df[role_column].astype("string").fillna(UNKNOWN).map(_path_value)
+        parts.append("role=" + roles.astype(str))
+    if not parts:
+        return pd.Series("all", index=df.index)
+    key = parts[0]
+    for part in parts[1:]:
+        key = key + "/" + part
+    return key
+
+
+def content_hash(df: pd.DataFrame) -> str:
+    """Order-sensitive hash of a frame's rows, column names and dtypes."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class PartitionedExporter:
+    """Writes datasets as hashed partitions under ``outdir`` and keeps ``manifest.json`` in sync."""
+
+    def __init__(self, outdir: str, fmt: str = "parquet"):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown partition format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        self.outdir = outdir
+        self.fmt = fmt
+        self.manifest_path = os.path.join(outdir, MANIFEST_NAME)
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {"version": MANIFEST_VERSION, "run": 0, "datasets": {}}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {"version": MANIFEST_VERSION, "run": manifest.get("run", 0), "datasets": {}}
+        return manifest
+
+    def _write_manifest(self) -> None:
+        os.makedirs(self.outdir, exist_ok=True)
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+
+    def _write_partition(self, part: pd.DataFrame, path: str) -> int:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        if self.fmt == "parquet":
+            part.to_parquet(tmp, index=False)
+        else:
+            part.to_csv(tmp, index=False, compression="gzip")
+        os.replace(tmp, path)
+        return os.path.getsize(path)
+
+    def _remove(self, rel: str) -> None:
+        path = os.path.join(self.outdir, rel)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        # Drop now-empty partition directories up to the output root
+        parent = os.path.dirname(path)
+        while os.path.abspath(parent) != os.path.abspath(self.outdir):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+
+    def export(self, df: pd.DataFrame, spec: DatasetSpec) -> ExportResult:
+        """Rewrite the changed partitions of one dataset and record it in the manifest."""
+        month_column, role_column = spec.resolve(df.columns)
+        run = self.manifest["run"] + 1
+        entry = self.manifest["datasets"].get(spec.name, {})
+        previous = entry.get("partitions", {})
+        ext = FORMATS[self.fmt]
+        result = ExportResult(dataset=spec.name, run=run, rows=len(df))
+
+        partitions: Dict[str, dict] = {}
+        keys = partition_keys(df, month_column, role_column)
+        for key, positions in sorted(keys.groupby(keys, sort=False).indices.items()):
+            part = df.iloc[positions].reset_index(drop=True)
+            rel = f"{spec.name}/{key}/part{ext}"
+            digest = content_hash(part)
+            old = previous.get(rel)
+            if old is not None and old["hash"] == digest and os.path.exists(os.path.join(self.outdir, rel)):
+                partitions[rel] = old
+                result.unchanged.append(rel)
+                continue
+            size = self._write_partition(part, os.path.join(self.outdir, rel))
+            partitions[rel] = {"hash": digest, "rows": len(part), "bytes": size, "run": run}
+            result.written.append(rel)
+            result.bytes_written += size
+
+        for rel in sorted(set(previous) - set(partitions)):
+            self._remove(rel)
+            result.removed.append(rel)
+
+        if result.written or result.removed or not entry:
+            self.manifest["run"] = run
+        else:
+            result.run = self.manifest["run"]
+        # Deletions stay listed (with the run that made them) until the partition comes back
+        removed = {rel: r for rel, r in entry.get("removed", {}).items() if rel not in partitions}
+        removed.update({rel: run for rel in result.removed})
+        self.manifest["datasets"][spec.name] = {
+            "description": spec.description,
+            "format": self.fmt,
+            "month_column": month_column,
+            "role_column": role_column,
+            "columns": [str(c) for c in df.columns],
+            "rows": len(df),
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "removed": removed,
+            "partitions": partitions,
+        }
+        self._write_manifest()
+        return result
+
+    def changed_since(self, run: int, dataset: Optional[str] = None) -> List[str]:
+        """Absolute paths of partitions written after export run ``run`` (0 = everything)."""
+        paths = []
+        for name, entry in sorted(self.manifest["datasets"].items()):
+            if dataset is not None and name != dataset:
+                continue
+            for rel, meta in sorted(entry["partitions"].items()):
+                if meta["run"] > run:
+                    paths.append(os.path.join(self.outdir, rel))
+        return paths
+
+    def removed_since(self, run: int, dataset: Optional[str] = None) -> List[str]:
+        """Relative paths of partitions deleted after export run ``run``."""
+        paths = []
+        for name, entry in sorted(self.manifest["datasets"].items()):
+            if dataset is None or name == dataset:
+                paths.extend(rel for rel, r in sorted(entry.get("removed", {}).items()) if r > run)
+        return paths
+
+    def read(self, dataset: str) -> pd.DataFrame:
+        """Concatenate a dataset's current partitions back into one frame."""
+        entry = self.manifest["datasets"][dataset]
+        frames = []
+        for rel in sorted(entry["partitions"]):
+            path = os.path.join(self.outdir, rel)
+            frames.append(pd.read_parquet(path) if entry["format"] == "parquet" else pd.read_csv(path))
+        if not frames:
+            return pd.DataFrame(columns=entry["columns"])
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,344 @@
+"""
+Content-hashed, on-disk cached stage DAG.
+
+A ``Pipeline`` is a set of named ``Stage`` objects. Each stage declares
+
+  - ``files``:  source files it reads (argument name -> path relative to data_dir)
+  - ``deps``:   upstream stages whose results it receives
+  - ``params``: pipeline parameters it depends on (e.g. ``selected_roles``)
+  - ``param_files``: params whose value is a path to a file the stage reads
+    (e.g. the name-match cache); its content is part of the key, not just the path
+
+and returns a single result (usually a DataFrame). A stage's cache key is the
+SHA-256 of its own code and of every module in its package (the helpers it
+calls change results too), the content hash of its files, the values of its
+declared params, the content of its param files and the keys of its upstream
+stages. Results are pickled under
+``cache_dir/<stage>/<key>.pkl``; on a re-run only stages whose key changed are
+recomputed, so editing one CSV only invalidates the stages downstream of it.
+
+File content hashes are memoized by (size, mtime) in ``file_hashes.json`` so
+unchanged multi-gigabyte sources are not re-read just to be hashed. A stage
+that also writes one of its param files (the name matcher saving new
+decisions) would otherwise invalidate itself on the next run; the content it
+leaves behind is recorded in ``param_files.json`` as equivalent to the content
+it started from, so only outside edits to the file cause a recompute.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    files: Mapping[str, str] = field(default_factory=dict)
+    deps: Tuple[str, ...] = ()
+    params: Tuple[str, ...] = ()
+    param_files: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageRun:
+    name: str
+    key: str
+    cached: bool
+    seconds: float
+
+
+def _stable_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+
+
+def _code_fingerprint(func: Callable[..., Any]) -> str:
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, "__qualname__", repr(func))
+    h = hashlib.sha256(source.encode("utf-8"))
+    h.update(_package_fingerprint(func).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _package_fingerprint(func: Callable[..., Any]) -> str:
+    """SHA-256 of every module in the top-level package ``func`` is defined in ('' outside a package)."""
+    package = sys.modules.get((getattr(func, "__module__", None) or "").split(".")[0])
+    roots = list(getattr(package, "__path__", None) or [])
+    if not roots:
+        return ""
+    modules = []
+    for dirpath, dirnames, filenames in os.walk(roots[0]):
+        dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+        modules.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith(".py"))
+    stats = tuple((path, os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in modules)
+    return _hash_modules(roots[0], stats)
+
+
+@functools.lru_cache(maxsize=8)
+def _hash_modules(root: str, stats: Tuple[Tuple[str, int, int], ...]) -> str:
+    # Keyed by (path, size, mtime_ns), so an edited module is re-read even mid-session
+    h = hashlib.sha256()
+    for path, _, _ in stats:
+        h.update(os.path.relpath(path, root).encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
+
+
+class FileHasher:
+    """SHA-256 of file contents, memoized on disk by (size, mtime_ns)."""
+
+    def __init__(self, memo_path: Optional[str] = None):
+        self.memo_path = memo_path
+        self._memo: Dict[str, List[Any]] = {}
+        if memo_path and os.path.exists(memo_path):
+            try:
+                with open(memo_path, "r", encoding="utf-8") as f:
+                    self._memo = json.load(f)
+            except (OSError, ValueError):
+                self._memo = {}
+
+    def digest(self, path: str) -> str:
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        cached = self._memo.get(path)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._memo[path] = [st.st_size, st.st_mtime_ns, digest]
+        self._save()
+        return digest
+
+    def _save(self) -> None:
+        if not self.memo_path:
+            return
+        os.makedirs(os.path.dirname(self.memo_path), exist_ok=True)
+        tmp = f"{self.memo_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._memo, f)
+        os.replace(tmp, self.memo_path)
+
+
+class Pipeline:
+    def __init__(
+        self,
+        data_dir: str,
+        cache_dir: str,
+        params: Optional[Mapping[str, Any]] = None,
+        keep_versions: int = 3,
+        verbose: bool = True,
+    ):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+        self.params: Dict[str, Any] = dict(params or {})
+        self.keep_versions = keep_versions
+        self.verbose = verbose
+        self.stages: Dict[str, Stage] = {}
+        self.hasher = FileHasher(os.path.join(cache_dir, "file_hashes.json"))
+        self._written_path = os.path.join(cache_dir, "param_files.json")
+        self._written: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(self._written_path):
+            try:
+                with open(self._written_path, "r", encoding="utf-8") as f:
+                    self._written = json.load(f)
+            except (OSError, ValueError):
+                self._written = {}
+        self.last_run: List[StageRun] = []
+
+    # ------------------------------------------------------------------ graph
+
+    def add(self, stage: Stage) -> Stage:
+        if stage.name in self.stages:
+            raise ValueError(f"Duplicate stage name: {stage.name}")
+        for dep in stage.deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+        self.stages[stage.name] = stage
+        return stage
+
+    def stage(
+        self,
+        name: Optional[str] = None,
+        files: Optional[Mapping[str, str]] = None,
+        deps: Iterable[str] = (),
+        params: Iterable[str] = (),
+        param_files: Iterable[str] = (),
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator form of ``add``; ``param_files`` are passed to the stage as params too."""
+        params, param_files = tuple(params), tuple(param_files)
+        params += tuple(p for p in param_files if p not in params)
+
+        def register(func: Callable[..., Any]) -> Callable[..., Any]:
+            self.add(Stage(name or func.__name__, func, dict(files or {}), tuple(deps), params, param_files))
+            return func
+        return register
+
+    def upstream(self, targets: Iterable[str]) -> List[str]:
+        """Stages needed for ``targets``, in dependency order."""
+        order: List[str] = []
+        seen = set()
+
+        def visit(name: str) -> None:
+            if name in seen:
+                return
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage: {name}")
+            seen.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    # ------------------------------------------------------------------- keys
+
+    def file_path(self, relative: str) -> str:
+        return relative if os.path.isabs(relative) else os.path.join(self.data_dir, relative)
+
+    def _param_file_digest(self, param: str) -> str:
+        """Content hash of a param file ('' while it does not exist), mapped back past the stages' own writes."""
+        path = os.path.abspath(self.params[param])
+        digest = self.hasher.digest(path) if os.path.exists(path) else ""
+        return self._written.get(path, {}).get(digest, digest)
+
+    def _record_written(self, before: Mapping[str, str]) -> None:
+        """Remember the content a stage left in its param files as equivalent to what it read."""
+        changed = False
+        for param, digest in before.items():
+            path = os.path.abspath(self.params[param])
+            if not os.path.exists(path):
+                continue
+            after = self.hasher.digest(path)
+            if after != digest and self._written.get(path, {}).get(after) != digest:
+                self._written.setdefault(path, {})[after] = digest
+                changed = True
+        if not changed:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{self._written_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._written, f)
+        os.replace(tmp, self._written_path)
+
+    def keys(self, targets: Iterable[str]) -> Dict[str, str]:
+        keys: Dict[str, str] = {}
+        for name in self.upstream(targets):
+            stage = self.stages[name]
+            files = {}
+            for arg, rel in sorted(stage.files.items()):
+                path = self.file_path(rel)
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"Stage '{name}' input not found: {path}")
+                files[arg] = self.hasher.digest(path)
+            missing = [p for p in stage.params if p not in self.params]
+            if missing:
+                raise KeyError(f"Stage '{name}' needs missing params: {', '.join(missing)}")
+            payload = {
+                "stage": name,
+                "code": _code_fingerprint(stage.func),
+                "files": files,
+                "params": {p: self.params[p] for p in stage.params},
+                "param_files": {p: self._param_file_digest(p) for p in sorted(stage.param_files)},
+                "deps": {d: keys[d] for d in stage.deps},
+            }
+            keys[name] = hashlib.sha256(_stable_json(payload).encode("utf-8")).hexdigest()[:32]
+        return keys
+
+    def _cache_path(self, name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, name, f"{key}.pkl")
+
+    def status(self, targets: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Map each needed stage to 'cached' or 'stale' without running anything."""
+        keys = self.keys(targets or list(self.stages))
+        return {
+            name: "cached" if os.path.exists(self._cache_path(name, key)) else "stale"
+            for name, key in keys.items()
+        }
+
+    # -------------------------------------------------------------------- run
+
+    def run(self, *targets: str, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Compute ``targets`` (all stages when empty) and return their results.
+
+        Cached results are loaded lazily: an upstream stage is only unpickled
+        when a downstream stage actually needs to recompute.
+        """
+        targets = targets or tuple(self.stages)
+        keys = self.keys(targets)
+        results: Dict[str, Any] = {}
+        self.last_run = []
+
+        def load(name: str) -> Any:
+            if name in results:
+                return results[name]
+            path = self._cache_path(name, keys[name])
+            with open(path, "rb") as f:
+                results[name] = pickle.load(f)
+            return results[name]
+
+        for name in keys:
+            stage = self.stages[name]
+            path = self._cache_path(name, keys[name])
+            t0 = time.perf_counter()
+            if not refresh and os.path.exists(path):
+                self.last_run.append(StageRun(name, keys[name], True, time.perf_counter() - t0))
+                if self.verbose:
+                    print(f"✅ {name}: cache hit")
+                continue
+
+            kwargs: Dict[str, Any] = {arg: self.file_path(rel) for arg, rel in stage.files.items()}
+            kwargs.update({dep: load(dep) for dep in stage.deps})
+            kwargs.update({p: self.params[p] for p in stage.params})
+            before = {p: self._param_file_digest(p) for p in stage.param_files}
+            results[name] = stage.func(**kwargs)
+            self._record_written(before)
+            self._write(name, keys[name], results[name])
+            elapsed = time.perf_counter() - t0
+            self.last_run.append(StageRun(name, keys[name], False, elapsed))
+            if self.verbose:
+                print(f"🔄 {name}: recomputed in {elapsed:.2f}s")
+
+        return {name: load(name) for name in targets}
+
+    def _write(self, name: str, key: str, value: Any) -> None:
+        stage_dir = os.path.join(self.cache_dir, name)
+        os.makedirs(stage_dir, exist_ok=True)
+        path = self._cache_path(name, key)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._prune(stage_dir)
+
+    def _prune(self, stage_dir: str) -> None:
+        entries = [
+            os.path.join(stage_dir, f) for f in os.listdir(stage_dir) if f.endswith(".pkl")
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for stale in entries[self.keep_versions:]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
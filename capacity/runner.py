@@ -0,0 +1,211 @@
+"""
+Headless pipeline run: the notebook's load / merge / vacation stages without a kernel.
+
+``run_pipeline`` executes the cached stages from capacity.stages, exports the
+results through capacity.partitioned_export and returns per-step timings.
+Nothing heavy is imported at module load (pandas, the stages and matplotlib
+are imported where they are used), so ``--help`` and quiet runs start fast.
+
+Output is gated by a verbosity level shared with the notebook (``VERBOSE`` in
+Cell 3):
+
+  - QUIET (0):   errors only
+  - NORMAL (1):  one line per step
+  - DEBUG (2):   diagnostics - deep memory usage, value counts, unique counts
+
+Diagnostics are passed as callables so their cost is only paid at DEBUG:
+
+    report = Reporter(NORMAL)
+    report.debug(lambda: f"memory: {df.memory_usage(deep=True).sum() / 2**20:.1f} MB")
+
+Plotting imports matplotlib (Agg backend when there is no display) only when
+a plot is actually requested:
+
+    plt = pyplot()
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+
+QUIET = 0
+NORMAL = 1
+DEBUG = 2
+
+Message = Union[str, Callable[[], str]]
+
+
+class Reporter:
+    """Prints messages at or below its verbosity level; callables are only evaluated when printed."""
+
+    def __init__(self, level: int = NORMAL, stream=None):
+        self.level = level
+        self.stream = stream
+
+    def _emit(self, message: Message) -> None:
+        text = message() if callable(message) else message
+        print(text, file=self.stream or sys.stdout)
+
+    def info(self, message: Message) -> None:
+        if self.level >= NORMAL:
+            self._emit(message)
+
+    def debug(self, message: Message) -> None:
+        if self.level >= DEBUG:
+            self._emit(message)
+
+    def error(self, message: Message) -> None:
+        text = message() if callable(message) else message
+        print(text, file=sys.stderr)
+
+
+def pyplot():
+    """``matplotlib.pyplot``, imported on first use; headless sessions get the Agg backend."""
+    import matplotlib
+
+    if not os.environ.get("DISPLAY") and "ipykernel" not in sys.modules:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def describe_frame(name: str, df) -> str:
+    """DEBUG summary of a frame: shape, deep memory and the most common role / type values."""
+    lines = [f"   {name}: {df.shape[0]:,} rows x {df.shape[1]} columns, "
+             f"{df.memory_usage(deep=True).sum() / 1024**2:.1f} MB"]
+    for column in ("role", "Type", "Vacation_Category", "Month"):
+        if column in df.columns:
+            counts = df[column].value_counts().head(5)
+            if counts.empty:
+                continue
+            lines.append(f"     {column} ({df[column].nunique()} unique): "
+                         + ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+    return "\n".join(lines)
+
+
+@dataclass
+class RunResult:
+    frames: Dict[str, object] = field(default_factory=dict)
+    seconds: Dict[str, float] = field(default_factory=dict)
+    stages: Dict[str, dict] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    exported: Dict[str, int] = field(default_factory=dict)
+    plot: Optional[str] = None
+
+
+def plot_vacation_monthly(vacation_monthly, path: str) -> str:
+    """Bar chart of used + scheduled leave days per month."""
+    plt = pyplot()
+    totals = vacation_monthly.groupby("Month")[["Days_Used", "Days_Scheduled"]].sum()
+    fig, ax = plt.subplots(figsize=(8, 4))
+    totals.plot.bar(stacked=True, ax=ax)
+    ax.set_xticklabels([m.strftime("%Y-%m") for m in totals.index], rotation=0)
+    ax.set_ylabel("Days")
+    ax.set_title("Leadership leave by month")
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+    return path
+
+
+def run_pipeline(
+    data_dir: str,
+    outdir: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    selected_roles: Optional[Iterable[str]] = None,
+    horizon_months: int = 4,
+    verbosity: int = NORMAL,
+    plot: Optional[str] = None,
+    export_format: str = "parquet",
+) -> RunResult:
+    """
+    Run the stages, export every produced frame to ``outdir`` (if given) and
+    draw the monthly leave chart to ``plot`` (if given).
+    """
+    report = Reporter(verbosity)
+    result = RunResult()
+
+    t0 = time.perf_counter()
+    from capacity.stages import DEFAULT_SELECTED_ROLES, build_pipeline
+
+    result.seconds["imports"] = time.perf_counter() - t0
+
+    pipeline = build_pipeline(
+        data_dir,
+        cache_dir,
+        selected_roles=selected_roles or DEFAULT_SELECTED_ROLES,
+        horizon_months=horizon_months,
+        verbose=verbosity >= DEBUG,
+    )
+    outputs = {
+        "df_filtered_users": "filtered_users",
+        "df_vacation": "vacation_detail",
+        "df_vacation_spans": "vacation_spans",
+        "df_vacation_monthly": "vacation_monthly",
+        "df_users_with_org": "users_with_org",
+        "df_10k": "bookings_with_org",
+    }
+    # Outputs whose source CSVs are missing are skipped instead of failing the run
+    targets = {}
+    for name, stage in outputs.items():
+        missing = sorted({
+            rel for upstream in pipeline.upstream([stage])
+            for rel in pipeline.stages[upstream].files.values()
+            if not os.path.exists(pipeline.file_path(rel))
+        })
+        if missing:
+            result.skipped.append(name)
+            report.info(f"⏭️  {name}: missing {', '.join(missing)}")
+        else:
+            targets[name] = stage
+
+    t0 = time.perf_counter()
+    computed = pipeline.run(*targets.values()) if targets else {}
+    result.seconds["stages"] = time.perf_counter() - t0
+    for stage_run in pipeline.last_run:
+        result.stages[stage_run.name] = {"seconds": round(stage_run.seconds, 4), "cached": stage_run.cached}
+    for name, stage in targets.items():
+        frame = computed[stage]
+        result.frames[name] = frame
+        report.info(f"✅ {name}: {len(frame):,} rows")
+        report.debug(lambda: describe_frame(name, frame))
+    cached = sum(r["cached"] for r in result.stages.values())
+    report.info(f"⚙️  {len(result.stages)} stages in {result.seconds['stages']:.2f}s ({cached} from cache)")
+
+    if outdir:
+        from capacity.partitioned_export import DatasetSpec, PartitionedExporter
+
+        t0 = time.perf_counter()
+        exporter = PartitionedExporter(outdir, fmt=export_format)
+        specs = {
+            "df_10k": DatasetSpec("df_10k", month=("date", "Date", "start_date"), role=("role", "Role")),
+            "df_filtered_users": DatasetSpec("df_filtered_users", role=("role", "Role")),
+            "df_users_with_org": DatasetSpec("df_users_with_org", role=("role", "Role")),
+            "df_vacation": DatasetSpec("df_vacation", month=("Start date",)),
+            "df_vacation_spans": DatasetSpec("df_vacation_spans", month=("Start date",)),
+            "df_vacation_monthly": DatasetSpec("df_vacation_monthly", month=("Month",)),
+        }
+        for name, frame in result.frames.items():
+            export = exporter.export(frame, specs[name])
+            result.exported[name] = len(export.written)
+            report.info(f"💾 {name}: {len(export.written)} partitions written, {len(export.unchanged)} unchanged")
+        result.seconds["export"] = time.perf_counter() - t0
+
+    frame = result.frames.get("df_vacation_monthly")
+    if plot and frame is not None and len(frame):
+        t0 = time.perf_counter()
+        try:
+            result.plot = plot_vacation_monthly(frame, plot)
+        except ImportError:
+            result.skipped.append("plot")
+            report.error("⚠️  matplotlib is not installed; plot skipped")
+        else:
+            result.seconds["plot"] = time.perf_counter() - t0
+            report.info(f"📈 Plot saved to {plot}")
+    return result
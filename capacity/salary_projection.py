@@ -0,0 +1,594 @@
+"""
+Local port of ``Consultants_Salary_Data_projection.SQL``.
+
+The projection dataflow gives every comp row of
+``namely_comp_data_history_w_notes`` its override title, its Office Location
+/ Department / Division assignment on the comp date, the MLT transition
+cut-off and the salary philosophy level, step and target. Inside Domo each
+of those is a derived table joined back with a range predicate, and the
+philosophy dates go through ``STR_TO_DATE`` on every joined row.
+
+Here the four input tables are loaded once and everything that does not
+depend on the comp rows is parsed and indexed up front:
+
+  - titles: ``comp_titles.TitleHistory`` (sorted as-of keys, ±15 day window)
+  - org units: ``org_units.OrgUnitIndex`` (latest start covering the date)
+  - MLT: earliest Division = MLT start per email
+  - philosophy: ``PhilosophyIndex``, dates parsed once per distinct text,
+    rows indexed by ``step_level_key`` (``Level - Step``), by role title and
+    by (row, department)
+
+Each join is then a ``searchsorted`` over those indexes plus a vectorized
+range filter on the candidates, and LEFT JOIN row multiplication (several
+titles on the matched date, several assignments with the matched start,
+several philosophy rows in range) is reproduced with ``np.repeat``, so the
+output is the same multiset of rows as the SQL:
+
+    projection = SalaryProjection.from_directory('CSV review/projection_inputs')
+    rows = projection.project(employees=['EMP-001098', 'EMP-001178'])
+    monthly = monthly_salary(rows, month_grid('2024-01-01', 24))
+
+The SQL ends with a hard-coded ``Employee Number IN (...)`` list; pass
+``employees`` for the same filter or leave it out for every employee.
+``ph_map`` (the Level / Step join) adds no column to the select list, but
+its matches still multiply rows, so it is applied for parity.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .comp_titles import WINDOW_DAYS, TitleHistory
+from .org_units import ORG_TYPE_ALIASES, OrgUnitIndex, normalize_email
+from .vacation import MonthsLike, expand_leave_to_months
+
+
+# Input tables as the dataflow names them (``schema.table`` as in sqlite_standin.load_tables)
+PROJECTION_TABLES: Dict[str, str] = {
+    "comp": "namely_comp_data_history_w_notes",
+    "titles": "namely_title_history_data_aq",
+    "org_units": "dataflow_schema.employee_org_units_dept_div_loc",
+    "philosophy": "dataflow_schema.consulting_comp_philosophy",
+}
+
+# MySQL reads `Annual Salary\nUSD` literally; exports may carry a real line break instead
+PHILOSOPHY_SALARY_COLUMNS = ("Annual Salary\\nUSD", "Annual Salary\nUSD", "Annual Salary USD")
+
+# ``STR_TO_DATE`` formats tried in order before plain ``DATE()``
+PHILOSOPHY_DATE_FORMATS = ("%B %d, %Y", "%b %d, %Y")
+
+PROJECTION_SINCE = "2016-01-01"
+
+# SELECT list of the dataflow, in order
+OUTPUT_COLUMNS = (
+    "Salary Currency",
+    "Job Title",
+    "Title Change Date (Used)",
+    "Comp Effective Date",
+    "Office Location",
+    "Office Location Start Date",
+    "Office Location End Date",
+    "Department",
+    "Department Start Date",
+    "Department End Date",
+    "Division",
+    "Division Start Date",
+    "Division End Date",
+    "Salary Notes",
+    "Hire Date",
+    "Employee Number",
+    "Level",
+    "Salary End Date",
+    "Step",
+    "Salary Start Date",
+    "User Status",
+    "Last Name",
+    "Salary",
+    "Type",
+    "Employee Type",
+    "First Name",
+    "Preferred First Name",
+    "Termination Date",
+    "Target Annual Salary USD",
+)
+
+MONTHLY_COLUMNS = (
+    "Employee Number",
+    "Month",
+    "Salary Currency",
+    "Annual Salary",
+    "Monthly Salary",
+    "Target Annual Salary USD",
+    "Monthly Target USD",
+    "Covered_Days",
+)
+
+OPEN_END = float(np.datetime64("9999-12-31", "D").astype(np.int64))
+NO_MATCH = -1
+
+
+def _days(values) -> np.ndarray:
+    """MySQL ``DATE()``: ISO dates (or datetimes) -> float days since epoch, NaN when NULL or unparseable."""
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        dt = values.dt.normalize()
+    else:
+        text = values.astype("string").str.strip().str[:10]
+        dt = pd.to_datetime(text, format="%Y-%m-%d", errors="coerce")
+    days = dt.to_numpy(dtype="datetime64[s]").astype("datetime64[D]").astype(np.int64).astype(np.float64)
+    days[dt.isna().to_numpy()] = np.nan
+    return days
+
+
+def _dates(days: np.ndarray) -> pd.Series:
+    """Float days (NaN = NULL) -> datetime column."""
+    out = np.full(len(days), np.datetime64("NaT"), dtype="datetime64[D]")
+    known = ~np.isnan(days)
+    out[known] = days[known].astype(np.int64)
+    return pd.Series(out).astype("datetime64[s]")
+
+
+def _philosophy_days(values) -> np.ndarray:
+    """``COALESCE(STR_TO_DATE(x, '%M %d, %Y'), STR_TO_DATE(x, '%b %d, %Y'), DATE(x))``, parsed once per distinct text."""
+    text = pd.Series(values).astype("string").str.strip()
+    distinct = pd.Series(text.dropna().unique(), dtype="string")
+    parsed = pd.Series(pd.NaT, index=distinct.index, dtype="datetime64[s]")
+    for fmt in PHILOSOPHY_DATE_FORMATS:
+        missing = parsed.isna()
+        parsed[missing] = pd.to_datetime(distinct[missing], format=fmt, errors="coerce")
+    days = pd.Series(_days(distinct), index=distinct.index)
+    days = days.where(parsed.isna(), _days(parsed))
+    lookup = pd.Series(days.to_numpy(), index=pd.Index(distinct.to_numpy(dtype=object)))
+    return text.map(lookup).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _decimal(values) -> np.ndarray:
+    """``CAST(REPLACE(REPLACE(x, '$', ''), ',', '') AS DECIMAL(12,2))``: leading number, 0 when there is none."""
+    text = pd.Series(values).astype("string").str.replace("$", "", regex=False).str.replace(",", "", regex=False)
+    number = text.str.extract(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)", expand=False)
+    amount = pd.to_numeric(number, errors="coerce").fillna(0.0).round(2)
+    return amount.where(text.notna()).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _upper_trim(values) -> pd.Series:
+    return pd.Series(values, dtype="object").astype("string").str.strip().str.upper()
+
+
+def _like_consult(values) -> np.ndarray:
+    """``UPPER(TRIM(x)) LIKE '%CONSULT%'`` (NULL -> False)."""
+    return _upper_trim(values).str.contains("CONSULT", regex=False).fillna(False).to_numpy(dtype=bool)
+
+
+def _set_items(values) -> list:
+    """``REPLACE(UPPER(x), ', ', ',')`` split the way ``FIND_IN_SET`` reads it."""
+    return [[] if pd.isna(v) else str(v).upper().replace(", ", ",").split(",") for v in values]
+
+
+def _left_join(first: np.ndarray, count: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row multiplication of a LEFT JOIN: row ``i`` is repeated ``max(1, count[i])``
+    times with the matched positions ``first[i] + k`` (``NO_MATCH`` when none).
+    """
+    reps = np.maximum(count, 1)
+    row = np.repeat(np.arange(len(reps)), reps)
+    within = np.arange(int(reps.sum())) - np.repeat(np.cumsum(reps) - reps, reps)
+    pos = np.where(count[row] > 0, first[row] + within, NO_MATCH)
+    return row, pos
+
+
+def _range_candidates(sorted_codes: np.ndarray, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(query row, position in ``sorted_codes``) for every equal code; ``codes < 0`` match nothing."""
+    lo = np.searchsorted(sorted_codes, codes, side="left")
+    hi = np.searchsorted(sorted_codes, codes, side="right")
+    count = np.where(codes >= 0, hi - lo, 0)
+    row = np.repeat(np.arange(len(codes)), count)
+    within = np.arange(int(count.sum())) - np.repeat(np.cumsum(count) - count, count)
+    return row, lo[row] + within
+
+
+def _grouped(row: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(first, count) per query row of candidate pairs sorted by ``row``."""
+    count = np.bincount(row, minlength=n)
+    return np.cumsum(count) - count, count
+
+
+class PhilosophyIndex:
+    """
+    ``consulting_comp_philosophy`` parsed once: trimmed Level / Step, target
+    salary, start / end days, and sorted indexes by ``step_level_key``, by
+    role title and by (row, department) for the three philosophy joins.
+    """
+
+    def __init__(self, philosophy: pd.DataFrame):
+        salary_col = next((c for c in PHILOSOPHY_SALARY_COLUMNS if c in philosophy.columns), None)
+        if salary_col is None:
+            raise KeyError(f"philosophy table has none of the salary columns {PHILOSOPHY_SALARY_COLUMNS}")
+
+        self.level = philosophy["Level"].astype("string").str.strip().to_numpy(dtype=object, na_value=None)
+        self.step = philosophy["Step"].astype("string").str.strip().to_numpy(dtype=object, na_value=None)
+        self.target = _decimal(philosophy[salary_col])
+        self.start = _philosophy_days(philosophy["Salary Start Effective Date"])
+        self.end = _philosophy_days(philosophy["Salary End Effective Date"])
+
+        keys = self.step_level_key(self.level, self.step)
+        self.step_levels = pd.Index(pd.unique(keys.dropna().to_numpy(dtype=object)))
+        codes = self.step_levels.get_indexer(keys.to_numpy(dtype=object, na_value=None))
+        self._by_step_level = self._sorted(codes, np.arange(len(codes)))
+
+        titles = _set_items(philosophy["Roles/ Titles"])
+        title_rows = np.repeat(np.arange(len(titles)), [len(t) for t in titles])
+        title_items = [item for items in titles for item in items]
+        self.titles = pd.Index(pd.unique(np.array(title_items, dtype=object)))
+        self._by_title = self._sorted(self.titles.get_indexer(title_items), title_rows)
+
+        departments = _set_items(philosophy["Department"])
+        dept_rows = np.repeat(np.arange(len(departments)), [len(d) for d in departments])
+        dept_items = [item for items in departments for item in items]
+        self.departments = pd.Index(pd.unique(np.array(dept_items, dtype=object)))
+        self._row_departments = np.unique(dept_rows.astype(np.int64) * (len(self.departments) + 1)
+                                          + self.departments.get_indexer(dept_items))
+
+    @staticmethod
+    def step_level_key(level, step) -> pd.Series:
+        """``CONCAT(TRIM(Level), ' - Step ', TRIM(Step))`` (NULL if either is NULL)."""
+        level = pd.Series(level, dtype="object").astype("string").str.strip()
+        step = pd.Series(step, dtype="object").astype("string").str.strip()
+        return level + " - Step " + step
+
+    @staticmethod
+    def _sorted(codes: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        keep = codes >= 0
+        order = np.argsort(codes[keep], kind="stable")
+        return codes[keep][order], rows[keep][order]
+
+    def _active(self, ph: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """``day >= ph_start_date AND (ph_end_date IS NULL OR day <= ph_end_date)``."""
+        end = self.end[ph]
+        return (days >= self.start[ph]) & (np.isnan(end) | (days <= end))
+
+    def by_step_level(self, level, step, days: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(query row, philosophy row) pairs with the same Level / Step in effect on ``days``."""
+        keys = self.step_level_key(level, step).to_numpy(dtype=object, na_value=None)
+        sorted_codes, rows = self._by_step_level
+        q, pos = _range_candidates(sorted_codes, self.step_levels.get_indexer(keys))
+        ph = rows[pos]
+        keep = self._active(ph, days[q])
+        return q[keep], ph[keep]
+
+    def by_title(self, titles, days: np.ndarray, departments=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (query row, philosophy row) pairs whose ``Roles/ Titles`` list holds
+        ``UPPER(TRIM(title))`` and in effect on ``days``; with ``departments``
+        the ``Department`` list must hold it too.
+        """
+        needles = _upper_trim(titles).to_numpy(dtype=object, na_value=None)
+        sorted_codes, rows = self._by_title
+        q, pos = _range_candidates(sorted_codes, self.titles.get_indexer(needles))
+        ph = rows[pos]
+        keep = self._active(ph, days[q])
+        if departments is not None:
+            dept = _upper_trim(departments).to_numpy(dtype=object, na_value=None)
+            codes = self.departments.get_indexer(dept)[q]
+            member = np.isin(ph.astype(np.int64) * (len(self.departments) + 1) + codes, self._row_departments)
+            keep &= (codes >= 0) & member
+        order = np.argsort(q[keep], kind="stable")
+        return q[keep][order], ph[keep][order]
+
+
+class SalaryProjection:
+    """
+    The projection dataflow over in-memory copies of its four input tables.
+
+    Construction parses and indexes the inputs once; ``project`` can then be
+    called for any employee subset without re-reading or re-parsing them.
+    """
+
+    def __init__(
+        self,
+        comp: pd.DataFrame,
+        titles: pd.DataFrame,
+        org_units: pd.DataFrame,
+        philosophy: pd.DataFrame,
+        since: str = PROJECTION_SINCE,
+    ):
+        self.comp = comp.reset_index(drop=True)
+        self.since = float(np.datetime64(since, "D").astype(np.int64))
+
+        # COALESCE(DATE(`Salary Start Date`), DATE(`Start Date`))
+        salary_start = _days(self.comp["Salary Start Date"])
+        self.comp_day = np.where(np.isnan(salary_start), _days(self.comp["Start Date"]), salary_start)
+        self.salary_end = _days(self.comp["Salary End Date"])
+        self.employee = self.comp["Employee Number"].astype("string")
+        self.email = normalize_email(self.comp["Work Email"])
+        self.inactive = (_upper_trim(self.comp["User Status"]) == "INACTIVE EMPLOYEE").fillna(False).to_numpy()
+
+        self.titles = TitleHistory(titles)
+        self.org_units = OrgUnitIndex(org_units)
+        self.philosophy = PhilosophyIndex(philosophy)
+
+        # tmeta: MAX(`Termination Date`), MAX(`Preferred First Name`) over every title row
+        meta = pd.DataFrame({
+            "Employee Number": titles["Employee Number"].astype("string"),
+            "Termination Date": titles["Termination Date"].astype("string"),
+            "Preferred First Name": titles["Preferred First Name"].astype("string"),
+        })
+        meta = meta.groupby("Employee Number", dropna=True).max()
+        self.termination = self.employee.map(meta["Termination Date"]).astype("string")
+        self.preferred_first_name = self.employee.map(meta["Preferred First Name"]).astype("string")
+        self.termination_day = _days(self.termination)
+
+        # mlt_transition: earliest Division = MLT start per email
+        division = org_units["Org Type"].astype("string").str.strip().isin(ORG_TYPE_ALIASES["Division"]).fillna(False)
+        mlt = division & (_upper_trim(org_units["Org Unit"]) == "MLT").fillna(False)
+        starts = pd.Series(_days(org_units.loc[mlt.to_numpy(), "Assignment Start Date"]))
+        first_mlt = starts.groupby(normalize_email(org_units.loc[mlt.to_numpy(), "Email"]).to_numpy(dtype=object)).min()
+        self.mlt_day = self.email.map(first_mlt).to_numpy(dtype=np.float64, na_value=np.nan)
+
+        # div_match only reads (email, date) keys of comp rows whose UPPER(Division) = 'CONSULTING'
+        keys = pd.MultiIndex.from_arrays([self.email.to_numpy(dtype=object, na_value=None), self.comp_day])
+        consulting = (self.comp["Division"].astype("string").str.upper() == "CONSULTING").fillna(False).to_numpy()
+        self.division_eligible = keys.isin(keys[consulting])
+
+    @classmethod
+    def from_tables(cls, tables: Mapping[str, pd.DataFrame], **kwargs) -> "SalaryProjection":
+        """Build from a mapping keyed by the dataflow's table names (``PROJECTION_TABLES`` values)."""
+        return cls(**{arg: tables[name] for arg, name in PROJECTION_TABLES.items()}, **kwargs)
+
+    @classmethod
+    def from_directory(cls, directory: str, **kwargs) -> "SalaryProjection":
+        """Build from exported tables in ``directory`` (see ``load_projection_tables``)."""
+        return cls.from_tables(load_projection_tables(directory), **kwargs)
+
+    def _org_unit_ties(self, org_type: str, rows: np.ndarray, eligible: Optional[np.ndarray] = None):
+        """
+        (first, count) into the sorted assignments of ``org_type`` for the
+        ``<type>_match`` + ``<type>_ou`` joins: every assignment of the email
+        starting on the latest start that covers the comp date.
+        """
+        intervals = self.org_units.types[org_type]
+        dates = _dates(self.comp_day[rows])
+        pos = intervals.covering(*self.org_units._encode(self.email.iloc[rows].to_numpy(dtype=object, na_value=None), dates))
+        if eligible is not None:
+            pos = np.where(eligible[rows], pos, NO_MATCH)
+        hit = pos >= 0
+        key = intervals.keys[np.where(hit, pos, 0)] if len(intervals.keys) else np.zeros(len(pos), np.int64)
+        first = np.searchsorted(intervals.keys, key, side="left")
+        count = np.searchsorted(intervals.keys, key, side="right") - first
+        return np.where(hit, first, NO_MATCH), np.where(hit, count, 0)
+
+    def project(self, employees: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Projected salary rows (``OUTPUT_COLUMNS``), optionally for ``employees`` only."""
+        rows = np.arange(len(self.comp))
+        if employees is not None:
+            wanted = self.employee.isin([str(e) for e in employees]).fillna(False).to_numpy()
+            rows = rows[wanted]
+
+        # Title override: chosen (±15 days) and fallback dates per comp row
+        keys, days, valid = self.titles.encode(
+            self.employee.iloc[rows].to_numpy(dtype=object, na_value=None), _dates(self.comp_day[rows])
+        )
+        before = self.titles.on_or_before(keys, days, valid, max_days=WINDOW_DAYS)
+        after = self.titles.on_or_after(keys, days, valid, max_days=WINDOW_DAYS)
+        chosen = np.where(before >= 0, before, after)
+        fallback = self.titles.on_or_before(keys, days, valid)
+        chosen_first, chosen_count = self.titles.ties(chosen)
+        fallback_first, fallback_count = self.titles.ties(fallback)
+
+        # Every LEFT JOIN repeats the rows so far; ``joined`` holds one array per join, aligned
+        joined: Dict[str, np.ndarray] = {"row": np.arange(len(rows))}
+
+        def join(name: str, first: np.ndarray, count: np.ndarray) -> None:
+            nonlocal joined
+            at, pos = _left_join(first, count)
+            joined = {k: v[at] for k, v in joined.items()}
+            joined[name] = pos
+
+        join("mtit", chosen_first, chosen_count)
+        join("fbtit", fallback_first[joined["row"]], fallback_count[joined["row"]])
+        for org_type in ("Department", "Office Location", "Division"):
+            eligible = self.division_eligible if org_type == "Division" else None
+            join(org_type, *self._org_unit_ties(org_type, rows[joined["row"]], eligible))
+
+        # WHERE: before the MLT move, or Consulting by Division / Department; still running in 2016+
+        c = rows[joined["row"]]
+        mlt = self.mlt_day[c]
+        has_mlt = ~np.isnan(mlt)
+        consulting = _like_consult(self._division(joined, c)) | _like_consult(self._unit("Department", joined))
+        keep = np.where(has_mlt, self.comp_day[c] < mlt, consulting)
+        keep &= self._salary_end(c, open_end=True) >= self.since
+        keep &= self.termination.iloc[c].isna().to_numpy() | (self.termination_day[c] >= self.since)
+        joined = {k: v[keep] for k, v in joined.items()}
+
+        c = rows[joined["row"]]
+        joined["title"] = (self._take(self.titles.titles, joined["mtit"])
+                           .fillna(self._take(self.titles.titles, joined["fbtit"]))
+                           .fillna(self._comp_column("Job Title", c))).to_numpy()
+        joined["title_used"] = np.where(chosen[joined["row"]] >= 0, chosen[joined["row"]], fallback[joined["row"]])
+
+        # Philosophy: ph_map (multiplies rows only), then ph_title_dept and ph_title_any
+        day = np.maximum(self.comp_day[c], self.since)
+        q, _ = self.philosophy.by_step_level(self.comp["Level"].iloc[c], self.comp["Step"].iloc[c], day)
+        q = q[_like_consult(self._division(joined, c))[q]]
+        join("ph_map", np.zeros(len(c), dtype=np.int64), np.bincount(q, minlength=len(c)))
+
+        c = rows[joined["row"]]
+        day = np.maximum(self.comp_day[c], self.since)
+        departments = self._unit("Department", joined).fillna(self._division(joined, c))
+        q, ph = self.philosophy.by_title(joined["title"], day, departments)
+        join("ph_title_dept", *_grouped(q, len(c)))
+        joined["ph_title_dept"] = self._positions(ph, joined["ph_title_dept"])
+
+        c = rows[joined["row"]]
+        day = np.maximum(self.comp_day[c], self.since)
+        q, ph = self.philosophy.by_title(joined["title"], day)
+        join("ph_title_any", *_grouped(q, len(c)))
+        joined["ph_title_any"] = self._positions(ph, joined["ph_title_any"])
+
+        joined["c"] = rows[joined["row"]]
+        return self._assemble(joined)
+
+    @staticmethod
+    def _positions(values: np.ndarray, pos: np.ndarray) -> np.ndarray:
+        """``values[pos]`` for integer positions, ``NO_MATCH`` kept."""
+        return np.where(pos >= 0, values[np.maximum(pos, 0)], NO_MATCH) if len(values) else np.full(len(pos), NO_MATCH)
+
+    def _comp_column(self, col: str, c: np.ndarray) -> pd.Series:
+        return self.comp[col].iloc[c].reset_index(drop=True).astype(object)
+
+    def _unit(self, org_type: str, joined: Dict[str, np.ndarray]) -> pd.Series:
+        return self._take(self.org_units.types[org_type].unit, joined[org_type])
+
+    def _division(self, joined: Dict[str, np.ndarray], c: np.ndarray) -> pd.Series:
+        """``COALESCE(div_ou.Division, c.Division)``."""
+        return self._unit("Division", joined).fillna(self._comp_column("Division", c))
+
+    def _salary_end(self, c: np.ndarray, open_end: bool = False) -> np.ndarray:
+        """Salary End Date cut at the day before the MLT move (``OPEN_END`` for NULL when ``open_end``)."""
+        salary_end = self.salary_end[c]
+        mlt = self.mlt_day[c]
+        capped = np.minimum(np.where(np.isnan(salary_end), OPEN_END, salary_end), mlt - 1)
+        end = np.where(np.isnan(mlt), salary_end, capped)
+        return np.where(np.isnan(end), OPEN_END, end) if open_end else end
+
+    @staticmethod
+    def _take(values: np.ndarray, pos: np.ndarray) -> pd.Series:
+        """``values[pos]`` with ``NO_MATCH`` positions as missing."""
+        out = pd.Series([None] * len(pos), dtype=object)
+        hit = pos >= 0
+        out[hit] = values[pos[hit]]
+        return out
+
+    @staticmethod
+    def _take_days(values: np.ndarray, pos: np.ndarray) -> np.ndarray:
+        """Day numbers at ``pos``, NaN for ``NO_MATCH``."""
+        out = np.full(len(pos), np.nan)
+        hit = pos >= 0
+        out[hit] = values[pos[hit]]
+        return out
+
+    def _assemble(self, joined: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """The dataflow's SELECT list for the joined rows."""
+        c = joined["c"]
+        src = self.comp.iloc[c].reset_index(drop=True)
+        termination_day = self.termination_day[c]
+        ph = self.philosophy
+        title_dept, title_any = joined["ph_title_dept"], joined["ph_title_any"]
+
+        out = pd.DataFrame({
+            "Salary Currency": src["Salary Currency"],
+            "Job Title": joined["title"],
+            "Title Change Date (Used)": _dates(self._take_days(self.titles.days, joined["title_used"])),
+            "Comp Effective Date": _dates(np.maximum(self.comp_day[c], self.since)),
+        })
+        for org_type in ("Office Location", "Department", "Division"):
+            intervals = self.org_units.types[org_type]
+            pos = joined[org_type]
+            # Inactive employees: an open (or missing) assignment ends on the Termination Date
+            end = self._take_days(intervals.raw_end, pos)
+            end = np.where(self.inactive[c] & np.isnan(end), termination_day, end)
+            out[org_type] = self._take(intervals.unit, pos).to_numpy()
+            out[f"{org_type} Start Date"] = _dates(self._take_days(intervals.start, pos))
+            out[f"{org_type} End Date"] = _dates(end)
+
+        out["Salary Notes"] = src["Salary Notes"]
+        out["Hire Date"] = _dates(_days(src["Start Date"]))
+        out["Employee Number"] = src["Employee Number"]
+        out["Level"] = self._take(ph.level, title_dept).fillna(self._take(ph.level, title_any)).to_numpy()
+        out["Salary End Date"] = _dates(self._salary_end(c))
+        out["Step"] = self._take(ph.step, title_dept).fillna(self._take(ph.step, title_any)).to_numpy()
+        out["Salary Start Date"] = _dates(_days(src["Salary Start Date"]))
+        for col in ("User Status", "Last Name", "Salary", "Type", "Employee Type", "First Name"):
+            out[col] = src[col]
+        out["Preferred First Name"] = self.preferred_first_name.iloc[c].to_numpy(dtype=object, na_value=None)
+        out["Termination Date"] = _dates(termination_day)
+        target = self._take_days(ph.target, title_dept)
+        out["Target Annual Salary USD"] = np.where(np.isnan(target), self._take_days(ph.target, title_any), target)
+        return out[list(OUTPUT_COLUMNS)]
+
+
+def monthly_salary(
+    rows: pd.DataFrame,
+    months: MonthsLike,
+    person_col: str = "Employee Number",
+) -> pd.DataFrame:
+    """
+    Per-person monthly salary time series from ``SalaryProjection.project`` rows.
+
+    Rows that only differ by join multiplication collapse to one comp period
+    (their philosophy targets averaged). Each period runs from its Comp
+    Effective Date until the day before the person's next period starts,
+    its Salary End Date or the Termination Date, whichever is first; open
+    periods run to the end of ``months``. Salaries are prorated by the
+    calendar days each period covers in each month.
+    """
+    if rows.empty:
+        return pd.DataFrame(columns=list(MONTHLY_COLUMNS))
+    periods = rows.assign(
+        Salary=pd.to_numeric(rows["Salary"], errors="coerce"),
+        **{"Termination Date": pd.to_datetime(rows["Termination Date"])},
+    )
+    key = [person_col, "Comp Effective Date", "Salary End Date", "Salary Currency", "Salary"]
+    periods = (periods.groupby(key, dropna=False, sort=False)
+               .agg({"Target Annual Salary USD": "mean", "Termination Date": "first"})
+               .reset_index())
+    periods = periods[periods["Comp Effective Date"].notna()]
+    periods = (periods.sort_values([person_col, "Comp Effective Date", "Salary End Date"], na_position="last")
+               .drop_duplicates([person_col, "Comp Effective Date"], keep="last"))
+
+    grid_end = pd.DatetimeIndex(months).max() + pd.offsets.MonthEnd(0)
+    next_start = periods.groupby(person_col)["Comp Effective Date"].shift(-1) - pd.Timedelta(days=1)
+    end = pd.concat([periods["Salary End Date"], next_start, periods["Termination Date"]], axis=1).min(axis=1)
+    periods["Period End"] = end.fillna(grid_end).clip(upper=grid_end)
+    periods = periods[periods["Period End"] >= periods["Comp Effective Date"]]
+
+    expanded = expand_leave_to_months(periods, months, "Comp Effective Date", "Period End", "Month", "Covered_Days")
+    month_days = expanded["Month"].dt.days_in_month.to_numpy()
+    share = expanded["Covered_Days"].to_numpy() / month_days
+    expanded["Monthly Salary"] = expanded["Salary"].to_numpy(dtype=np.float64) / 12 * share
+    expanded["Monthly Target USD"] = expanded["Target Annual Salary USD"].to_numpy(dtype=np.float64) / 12 * share
+    monthly = (expanded.groupby([person_col, "Month", "Salary Currency"], dropna=False, sort=True)
+               [["Monthly Salary", "Monthly Target USD", "Covered_Days"]].sum(min_count=1).reset_index())
+    days = monthly["Month"].dt.days_in_month.to_numpy()
+    monthly["Annual Salary"] = monthly["Monthly Salary"] * 12 * days / monthly["Covered_Days"]
+    monthly["Target Annual Salary USD"] = monthly["Monthly Target USD"] * 12 * days / monthly["Covered_Days"]
+    return monthly[list(MONTHLY_COLUMNS)]
+
+
+def load_projection_tables(directory: str, tables: Mapping[str, str] = PROJECTION_TABLES) -> Dict[str, pd.DataFrame]:
+    """
+    Read the exported input tables from ``directory``.
+
+    Each table is looked up as ``<name>`` or ``<table>`` (without the schema)
+    with a ``.parquet``, ``.csv`` or ``.csv.gz`` extension, falling back to
+    the newest timestamped ``<name>_<timestamp>`` export. CSVs are read as
+    text with empty fields as NULL, the way the SQL export writes them.
+    """
+    loaded = {}
+    for name in tables.values():
+        path = _table_file(directory, name)
+        if path.endswith(".parquet"):
+            loaded[name] = pd.read_parquet(path)
+        else:
+            loaded[name] = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""])
+    return loaded
+
+
+def _table_file(directory: str, name: str) -> str:
+    stems = [name, name.rpartition(".")[2]]
+    extensions = (".parquet", ".csv", ".csv.gz")
+    for stem in stems:
+        for ext in extensions:
+            path = os.path.join(directory, stem + ext)
+            if os.path.exists(path):
+                return path
+    exports: Sequence[str] = sorted(
+        p for stem in stems for ext in extensions for p in glob.glob(os.path.join(directory, f"{glob.escape(stem)}_*{ext}"))
+    )
+    if not exports:
+        raise FileNotFoundError(f"No export of {name} in {directory}")
+    return exports[-1]
@@ -0,0 +1,376 @@
+"""
+Typed columnar cache for the raw CSV sources under data/.
+
+Each source is converted once into an uncompressed Feather (Arrow IPC) file
+with dates parsed, low-cardinality text stored as dictionary-encoded
+categoricals, ids / hours downcast to 32 bits, ``true``/``false`` flags stored
+as booleans and ``Probability`` stored as a 0-1 float, as declared per source
+in ``SOURCE_SPECS``. The Feather file is rebuilt only when the CSV changes: a
+matching (size, mtime) is trusted outright, otherwise the CSV is re-hashed and
+only rebuilt if its contents actually differ.
+
+Feather is used instead of Parquet because uncompressed Arrow IPC files can be
+memory-mapped: loads read pages straight from the OS page cache, so startup is
+near-instant and several processes reading the same source share memory.
+
+    from capacity.sources import load_source
+    df_vacation_raw = load_source('vacation', '../data')
+    df_10k_users = load_source('users', '../data', columns='needed')  # declared columns only
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+# Logical source name -> file name under data/
+SOURCE_FILES: Dict[str, str] = {
+    "bookings": "10k Data for S3 (1).csv",
+    "users": "10k Users.csv",
+    "org_units": "Employee Org Units (Dept, Div, Loc).csv",
+    "vacation": "Namely Vacation and Leave Dataset.csv",
+    "salesforce": "Salesforce Opportunity Data.csv",
+    "us_hours": "Working Hours For US.csv",
+    "uae_hours": "UAE Working Hours.csv",
+}
+
+CACHE_FORMAT_VERSION = 2
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+ColumnsArg = Union[None, str, List[str]]
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """
+    Declared schema of one CSV source. Columns missing from a file are ignored.
+
+    ``columns`` lists the columns the pipeline needs (empty = all of them);
+    ``load(name, columns="needed")`` projects to it. The remaining fields say
+    how each column is stored: parsed dates (``date_formats`` gives explicit
+    formats), categoricals, 0-1 percents, 32-bit ints / floats and booleans.
+    Integer and boolean columns with gaps use the nullable ``Int32`` /
+    ``boolean`` dtypes.
+    """
+
+    columns: Tuple[str, ...] = ()
+    dates: Tuple[str, ...] = ()
+    date_patterns: Tuple[str, ...] = ()
+    date_formats: Dict[str, str] = field(default_factory=dict)
+    categories: Tuple[str, ...] = ()
+    percents: Tuple[str, ...] = ()
+    int32: Tuple[str, ...] = ()
+    float32: Tuple[str, ...] = ()
+    bools: Tuple[str, ...] = ()
+
+    def date_columns(self, columns: Iterable[str]) -> List[str]:
+        columns = list(columns)
+        out = [c for c in self.dates if c in columns]
+        for pattern in self.date_patterns:
+            out.extend(c for c in columns if re.fullmatch(pattern, c) and c not in out)
+        return out
+
+    def needed(self, columns: Iterable[str]) -> List[str]:
+        """``columns`` restricted to the declared ones, in file order."""
+        columns = list(columns)
+        if not self.columns:
+            return columns
+        return [c for c in columns if c in self.columns]
+
+
+WORKING_HOURS_SPEC = SourceSpec(
+    dates=("Month", "Start Date", "End Date", "First Closure Day"),
+    date_patterns=(r"Holiday #\d+",),
+    date_formats={"First Closure Day": "%m-%d-%Y"},
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+
+SOURCE_SPECS: Dict[str, SourceSpec] = {
+    "bookings": SourceSpec(
+        columns=(
+            "user_id", "assignable_id", "client", "project_name", "phase_name", "date",
+            "incurred_hours", "scheduled_hours", "total_hours",
+        ),
+        dates=("date",),
+        date_formats={"date": DATE_FORMAT},
+        categories=("client", "project_name", "phase_name"),
+        int32=("user_id", "assignable_id"),
+        float32=("incurred_hours", "scheduled_hours", "total_hours"),
+    ),
+    "users": SourceSpec(
+        columns=(
+            "id", "first_name", "last_name", "email", "employee_number", "role", "discipline", "location",
+            "type", "archived", "deleted", "billable", "billability_target", "hire_date", "termination_date",
+        ),
+        dates=(
+            "last_login_time", "created_at", "deleted_at", "hire_date", "termination_date",
+            "updated_at", "archived_at", "_BATCH_LAST_RUN_",
+        ),
+        date_formats={
+            "last_login_time": TIMESTAMP_FORMAT, "created_at": TIMESTAMP_FORMAT, "deleted_at": TIMESTAMP_FORMAT,
+            "updated_at": TIMESTAMP_FORMAT, "archived_at": TIMESTAMP_FORMAT, "_BATCH_LAST_RUN_": TIMESTAMP_FORMAT,
+            "hire_date": DATE_FORMAT, "termination_date": DATE_FORMAT,
+        },
+        categories=("role", "discipline", "location", "license_type", "type", "login_type"),
+        int32=("id", "user_type_id", "location_id", "_BATCH_ID_"),
+        float32=("billrate", "billability_target"),
+        bools=("archived", "deleted", "billable", "account_owner", "invitation_pending", "has_login"),
+    ),
+    "org_units": SourceSpec(),
+    "vacation": SourceSpec(
+        dates=("Start date", "Departure date", "_BATCH_LAST_RUN_"),
+        date_formats={"Start date": DATE_FORMAT, "Departure date": DATE_FORMAT, "_BATCH_LAST_RUN_": TIMESTAMP_FORMAT},
+        categories=(
+            "Type", "Office Location", "User status", "Employee Type", "Departments", "Units",
+        ),
+        int32=("Accrual Year", "_BATCH_ID_"),
+        float32=("Used", "Scheduled", "Scheduled From Accrued"),
+    ),
+    "salesforce": SourceSpec(
+        dates=(
+            "Created Date", "Schedule Month", "Engagement Launch Date", "Engagement End Date",
+            "_BATCH_LAST_RUN_",
+        ),
+        categories=("Region", "Office", "Industry"),
+        percents=("Probability",),
+    ),
+    "us_hours": WORKING_HOURS_SPEC,
+    "uae_hours": WORKING_HOURS_SPEC,
+}
+
+
+def default_cache_dir(data_dir: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(data_dir)), ".cache", "columnar")
+
+
+def parse_percent(values: pd.Series) -> pd.Series:
+    """'100%' -> 1.0, '65%' -> 0.65; unparseable values become NaN."""
+    text = values.astype("string").str.strip().str.rstrip("%")
+    numbers = pd.to_numeric(text, errors="coerce").astype("float64")
+    return numbers / 100.0
+
+
+def parse_dates(values: pd.Series, fmt: Optional[str] = None) -> pd.Series:
+    """``pd.to_datetime`` with ``fmt``; falls back to inference if the format drops values."""
+    parsed = pd.to_datetime(values, errors="coerce", format=fmt)
+    if fmt is not None and parsed.isna().sum() > values.isna().sum():
+        parsed = pd.to_datetime(values, errors="coerce")
+    return parsed
+
+
+def to_int32(values: pd.Series) -> pd.Series:
+    """Downcast to ``int32`` (``Int32`` when there are gaps); out-of-range data stays 64-bit."""
+    numbers = pd.to_numeric(values, errors="coerce")
+    if numbers.notna().any() and (numbers.abs().max() >= 2**31 or (numbers.dropna() % 1 != 0).any()):
+        return numbers
+    return numbers.astype("Int32" if numbers.isna().any() else "int32")
+
+
+def to_bool(values: pd.Series) -> pd.Series:
+    """'true' / 'false' text (any case) or Python bools to ``bool`` (``boolean`` when there are gaps)."""
+    if pd.api.types.is_bool_dtype(values):
+        return values
+    text = values.astype("string").str.strip().str.lower()
+    flags = text.map({"true": True, "false": False, "1": True, "0": False}).astype("boolean")
+    return flags.astype(bool) if not flags.isna().any() else flags
+
+
+def apply_spec(df: pd.DataFrame, spec: SourceSpec) -> pd.DataFrame:
+    """Type a freshly read CSV frame according to ``spec`` (in place, returned)."""
+    for col in spec.date_columns(df.columns):
+        df[col] = parse_dates(df[col], spec.date_formats.get(col))
+    for col in spec.categories:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in spec.percents:
+        if col in df.columns:
+            df[col] = parse_percent(df[col])
+    for col in spec.int32:
+        if col in df.columns:
+            df[col] = to_int32(df[col])
+    for col in spec.float32:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+    for col in spec.bools:
+        if col in df.columns:
+            df[col] = to_bool(df[col])
+    return df
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _spec_digest(spec: SourceSpec) -> str:
+    payload = json.dumps({"version": CACHE_FORMAT_VERSION, **asdict(spec)}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ColumnarCache:
+    """Feather copies of CSV sources, kept in sync with the CSVs."""
+
+    def __init__(self, data_dir: str, cache_dir: Optional[str] = None):
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir or default_cache_dir(data_dir)
+
+    def csv_path(self, name: str) -> str:
+        if name not in SOURCE_FILES:
+            raise KeyError(f"Unknown source '{name}'. Known: {', '.join(SOURCE_FILES)}")
+        return os.path.join(self.data_dir, SOURCE_FILES[name])
+
+    def feather_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}.feather")
+
+    def _meta_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}.meta.json")
+
+    def _read_meta(self, name: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, name: str, meta: dict) -> None:
+        tmp = f"{self._meta_path(name)}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, self._meta_path(name))
+
+    def is_fresh(self, name: str) -> bool:
+        """True when the Feather file reflects the current CSV; refreshes stale stat info."""
+        csv_path = self.csv_path(name)
+        meta = self._read_meta(name)
+        if meta is None or not os.path.exists(self.feather_path(name)):
+            return False
+        if meta.get("spec") != _spec_digest(SOURCE_SPECS[name]):
+            return False
+
+        st = os.stat(csv_path)
+        if meta.get("size") == st.st_size and meta.get("mtime_ns") == st.st_mtime_ns:
+            return True
+        # Touched but possibly unchanged (e.g. re-downloaded): compare contents
+        if meta.get("size") == st.st_size and meta.get("sha256") == _file_digest(csv_path):
+            meta.update(mtime_ns=st.st_mtime_ns)
+            self._write_meta(name, meta)
+            return True
+        return False
+
+    def build(self, name: str) -> str:
+        """Convert the CSV to a typed Feather file and return its path."""
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        csv_path = self.csv_path(name)
+        st = os.stat(csv_path)
+        digest = _file_digest(csv_path)
+        df = apply_spec(pd.read_csv(csv_path, low_memory=False), SOURCE_SPECS[name])
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.feather_path(name)
+        tmp = f"{path}.tmp"
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # Uncompressed so the file can be memory-mapped on load, and one record batch
+        # so every column maps as a single zero-copy array (chunks are concatenated on load)
+        feather.write_feather(table, tmp, compression="uncompressed", chunksize=max(len(df), 1))
+        os.replace(tmp, path)
+        self._write_meta(name, {
+            "source": SOURCE_FILES[name],
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest,
+            "spec": _spec_digest(SOURCE_SPECS[name]),
+            "rows": len(df),
+        })
+        return path
+
+    def ensure(self, name: str) -> str:
+        if not self.is_fresh(name):
+            return self.build(name)
+        return self.feather_path(name)
+
+    def load(self, name: str, columns: ColumnsArg = None, writable: bool = True) -> pd.DataFrame:
+        """
+        Memory-mapped load of a source, rebuilding its Feather copy if stale.
+
+        ``columns`` is ``None`` for every column, ``"needed"`` for the columns
+        declared in the source's ``SourceSpec`` or an explicit list.
+
+        Numeric, boolean, date and categorical columns come back as zero-copy
+        views of the read-only map. By default they are copied so the frame can be written
+        to like a ``read_csv`` result (``df.loc[mask, 'Used'] = 0``).
+        ``writable=False`` skips the copies, keeping pages shared between
+        processes, for callers that only read or that replace whole columns.
+        In-place writes to such a frame raise ``ValueError: assignment
+        destination is read-only``.
+        """
+        spec = SOURCE_SPECS[name]
+        try:
+            import pyarrow.feather as feather
+        except ImportError:
+            # Without pyarrow there is no columnar cache; still return typed data
+            if columns == "needed":
+                usecols = (lambda c: c in spec.columns) if spec.columns else None
+            else:
+                usecols = columns
+            df = pd.read_csv(self.csv_path(name), usecols=usecols, low_memory=False)
+            return apply_spec(df, spec)
+
+        path = self.ensure(name)
+        if columns == "needed":
+            columns = spec.needed(feather.read_table(path, memory_map=True).column_names)
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        df = table.to_pandas(split_blocks=True)
+        if writable:
+            # Text is already materialized; numbers, dates and categorical codes view the map
+            mapped = [
+                col for col, dtype in df.dtypes.items()
+                if isinstance(dtype, pd.CategoricalDtype) or (isinstance(dtype, np.dtype) and dtype.kind != "O")
+            ]
+            for col in mapped:
+                df[col] = df[col].copy(deep=True)
+        return df
+
+
+def load_source(
+    name: str,
+    data_dir: str,
+    cache_dir: Optional[str] = None,
+    columns: ColumnsArg = None,
+    writable: bool = True,
+) -> pd.DataFrame:
+    """Typed DataFrame for a logical source name (see ``SOURCE_FILES``)."""
+    return ColumnarCache(data_dir, cache_dir).load(name, columns=columns, writable=writable)
+
+
+def source_name_for(csv_path: str) -> Optional[str]:
+    """Logical source name for a CSV path, or None if it is not a known source."""
+    base = os.path.basename(csv_path)
+    return next((name for name, fname in SOURCE_FILES.items() if fname == base), None)
+
+
+def read_source_csv(
+    csv_path: str,
+    cache_dir: Optional[str] = None,
+    columns: ColumnsArg = None,
+    writable: bool = True,
+) -> pd.DataFrame:
+    """``pd.read_csv`` replacement that goes through the columnar cache for known sources."""
+    name = source_name_for(csv_path)
+    if name is None:
+        return pd.read_csv(csv_path, usecols=None if columns == "needed" else columns)
+    return load_source(name, os.path.dirname(csv_path), cache_dir, columns=columns, writable=writable)
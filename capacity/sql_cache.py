@@ -0,0 +1,225 @@
+"""
+On-disk cache of SQL export files, keyed by query text and source-table fingerprints.
+
+The misalignment report reads ``namely_comp_data_history_w_notes``,
+``namely_title_history_data_aq`` and ``employee_org_units_dept_div_loc``;
+when none of them changed since the last export there is no reason to run the
+query again. An export's cache key is the SHA-256 of
+
+  - the SQL text (whitespace-normalized) and the output format
+  - a fingerprint of every table named after ``FROM`` / ``JOIN`` in the SQL:
+    ``COUNT(*)`` plus ``CHECKSUM TABLE`` on MySQL, row count plus a hash of
+    the rows on SQLite
+
+and the exported file is kept as ``cache_dir/<key><ext>`` with a small
+``<key>.json`` sidecar. A hit hands back that file without touching the query:
+
+    cache = ExportCache('.cache/sql_exports', max_bytes=2 * 2**30, max_age_days=7)
+    key = cache.key(conn, query, fmt='csv.gz')
+    hit = cache.lookup(key)
+    if hit is None:
+        stats = stream_query(conn, query, outfile, fmt='csv.gz')
+        cache.store(key, outfile, rows=stats.rows, name='misalignment_report')
+
+Entries older than ``max_age_days`` are dropped and the least recently used
+ones go first once the cache exceeds ``max_bytes``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from capacity.sql_export import FORMATS
+
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+DEFAULT_MAX_AGE_DAYS = 7.0
+
+_TOKEN = re.compile(r"`[^`]*`|'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|[A-Za-z_][A-Za-z0-9_$]*|\S")
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def _is_identifier(token: str) -> bool:
+    return token.startswith("`") or token[0].isalpha() or token[0] == "_"
+
+
+def _table_name(tokens: List[str], i: int) -> Optional[str]:
+    """``schema.table`` / ``table`` starting at ``tokens[i]``, or None if it is not an identifier."""
+    if i >= len(tokens) or not _is_identifier(tokens[i]):
+        return None
+    parts = [tokens[i]]
+    if i + 2 < len(tokens) and tokens[i + 1] == "." and _is_identifier(tokens[i + 2]):
+        parts.append(tokens[i + 2])
+    return ".".join(part.strip("`") for part in parts)
+
+
+def referenced_tables(sql: str) -> List[str]:
+    """
+    ``schema.table`` / ``table`` names after FROM and JOIN (subqueries skipped),
+    sorted; tables the script creates itself (staged temporary tables) are left out.
+    """
+    tokens = _TOKEN.findall(_COMMENT.sub(" ", sql))
+    names, created = set(), set()
+    for i, token in enumerate(tokens):
+        word = token.upper()
+        if word in ("FROM", "JOIN"):
+            name = _table_name(tokens, i + 1)
+            if name is not None:
+                names.add(name)
+        elif word == "TABLE" and i > 0 and tokens[i - 1].upper() in ("CREATE", "TEMPORARY"):
+            j = i + 1
+            if [t.upper() for t in tokens[j:j + 3]] == ["IF", "NOT", "EXISTS"]:
+                j += 3
+            name = _table_name(tokens, j)
+            if name is not None:
+                created.add(name)
+    return sorted(names - created)
+
+
+def _normalized_sql(sql: str) -> str:
+    return " ".join(_COMMENT.sub(" ", sql).split())
+
+
+def _quoted(table: str) -> str:
+    return ".".join(f"`{part}`" for part in table.split("."))
+
+
+def table_fingerprint(conn, table: str) -> str:
+    """Row count and content checksum of one table: ``CHECKSUM TABLE`` on MySQL, a row hash on SQLite."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {_quoted(table)}")
+        rows = cursor.fetchone()[0]
+        if isinstance(conn, sqlite3.Connection):
+            digest = hashlib.sha256()
+            cursor.execute(f"SELECT * FROM {_quoted(table)}")
+            for batch in iter(lambda: cursor.fetchmany(10_000), []):
+                digest.update(repr(batch).encode("utf-8"))
+            checksum = digest.hexdigest()
+        else:
+            cursor.execute(f"CHECKSUM TABLE {_quoted(table)}")
+            checksum = cursor.fetchone()[1]
+    finally:
+        cursor.close()
+    return f"{rows}:{checksum}"
+
+
+@dataclass
+class CacheHit:
+    key: str
+    path: str
+    rows: Optional[int]
+    created: float
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.created
+
+
+class ExportCache:
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+
+    def fingerprints(self, conn, sql: str) -> Dict[str, str]:
+        return {table: table_fingerprint(conn, table) for table in referenced_tables(sql)}
+
+    def key(self, conn, sql: str, fmt: str = "csv") -> str:
+        payload = {"sql": _normalized_sql(sql), "format": fmt, "tables": self.fingerprints(conn, sql)}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_meta(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, key: str) -> Optional[CacheHit]:
+        """The cached export for ``key`` if present and not expired; marks it recently used."""
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        path = os.path.join(self.cache_dir, meta["file"])
+        expired = time.time() - meta["created"] > self.max_age_days * 86400
+        if expired or not os.path.exists(path):
+            self._remove(key)
+            return None
+        os.utime(self._meta_path(key))
+        self.evict()
+        if not os.path.exists(path):
+            # Larger than max_bytes on its own
+            return None
+        return CacheHit(key=key, path=path, rows=meta.get("rows"), created=meta["created"])
+
+    def store(self, key: str, export_path: str, rows: Optional[int] = None, name: str = "") -> CacheHit:
+        """Copy a finished export into the cache under ``key``, then evict."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        ext = next((e for e in sorted(FORMATS.values(), key=len, reverse=True) if export_path.endswith(e)), "")
+        file = f"{key}{ext}"
+        target = os.path.join(self.cache_dir, file)
+        shutil.copyfile(export_path, f"{target}.tmp")
+        os.replace(f"{target}.tmp", target)
+        meta = {"file": file, "rows": rows, "name": name, "created": time.time()}
+        tmp = f"{self._meta_path(key)}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(key))
+        self.evict()
+        return CacheHit(key=key, path=os.path.join(self.cache_dir, file), rows=rows, created=meta["created"])
+
+    def _remove(self, key: str) -> None:
+        meta = self._read_meta(key)
+        paths = [self._meta_path(key)]
+        if meta is not None:
+            paths.append(os.path.join(self.cache_dir, meta["file"]))
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def evict(self) -> List[str]:
+        """Drop expired entries, then least recently used ones until under ``max_bytes``."""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            key = name[:-len(".json")]
+            meta = self._read_meta(key)
+            if meta is None:
+                continue
+            data = os.path.join(self.cache_dir, meta["file"])
+            size = os.path.getsize(data) if os.path.exists(data) else 0
+            entries.append((os.path.getmtime(self._meta_path(key)), meta["created"], key, size))
+
+        removed = []
+        now = time.time()
+        entries.sort(reverse=True)  # most recently used first
+        total = 0
+        for _, created, key, size in entries:
+            if now - created > self.max_age_days * 86400 or total + size > self.max_bytes:
+                self._remove(key)
+                removed.append(key)
+            else:
+                total += size
+        return removed
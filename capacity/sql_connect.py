@@ -0,0 +1,108 @@
+"""
+Connection settings and SQL file loading shared by the SQL export scripts.
+
+``scripts/export_misalignment_report.py`` and ``scripts/export_sql_batch.py``
+both read the query from a file, take MySQL credentials from the ``DB_*``
+environment variables and, with ``--sqlite``, open the SQLite stand-in with
+``--attach NAME=PATH`` schemas:
+
+    query = load_sql_file(os.path.join(PROJECT_ROOT, 'SQL', 'misalignment_report_mysql57.sql'))
+    try:
+        settings = mysql_settings_from_env()
+    except ValueError as err:
+        ...  # missing DB_* variables or a bad DB_PORT
+    conn = settings.connect()
+
+Environment variables:
+  - DB_HOST: MySQL host (required)
+  - DB_PORT: MySQL port (default: 3306)
+  - DB_USER: MySQL username (required)
+  - DB_PASSWORD: MySQL password (required)
+  - DB_NAME: MySQL database name (required)
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DB_ENV_EXAMPLE = "export DB_HOST=localhost DB_PORT=3306 DB_USER=user DB_PASSWORD=pass DB_NAME=dbname"
+
+
+def read_env(name: str, default: Optional[str] = None) -> Optional[str]:
+    value = os.environ.get(name, default)
+    return value
+
+
+def load_sql_file(sql_path: str) -> str:
+    with open(sql_path, "r", encoding="utf-8") as f:
+        sql_text = f.read()
+    # Trim trailing semicolons and whitespace; some drivers are picky
+    return sql_text.rstrip().rstrip(";")
+
+
+@dataclass(frozen=True)
+class MySQLSettings:
+    host: str
+    port: int
+    user: str
+    password: str
+    database: str
+
+    def connect(self):
+        import mysql.connector
+
+        return mysql.connector.connect(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            database=self.database,
+            connect_timeout=15,
+            use_pure=True,
+        )
+
+
+def mysql_settings_from_env() -> MySQLSettings:
+    """Connection settings from the ``DB_*`` environment variables; ``ValueError`` names what is missing or malformed."""
+    host = read_env("DB_HOST")
+    user = read_env("DB_USER")
+    password = read_env("DB_PASSWORD")
+    database = read_env("DB_NAME")
+    port_str = read_env("DB_PORT", "3306")
+
+    missing = [name for name, val in {
+        "DB_HOST": host,
+        "DB_USER": user,
+        "DB_PASSWORD": password,
+        "DB_NAME": database,
+    }.items() if not val]
+    if missing:
+        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+    try:
+        port = int(port_str)
+    except ValueError:
+        raise ValueError(f"DB_PORT must be an integer, got '{port_str}'") from None
+    return MySQLSettings(host=host, port=port, user=user, password=password, database=database)
+
+
+def parse_attach(items: Iterable[str]) -> Dict[str, str]:
+    """``--attach NAME=PATH`` values -> {schema name: SQLite file}."""
+    schemas = {}
+    for item in items:
+        name, sep, file = item.partition("=")
+        if not sep:
+            raise ValueError(f"--attach expects NAME=PATH, got '{item}'")
+        schemas[name] = file
+    return schemas
+
+
+def connect_sqlite(path: str, attach: Iterable[str] = (), **kwargs):
+    """The MySQL stand-in on SQLite ``path`` with the ``--attach`` schemas."""
+    from capacity.sqlite_standin import connect
+
+    return connect(path, schemas=parse_attach(attach), **kwargs)
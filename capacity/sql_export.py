@@ -0,0 +1,406 @@
+"""
+Streaming export of SQL results to CSV, gzip-compressed CSV or Parquet.
+
+``pd.read_sql`` holds the whole result set in memory before anything is
+written. Here rows are pulled from an unbuffered (server-side) cursor in
+fixed-size ``fetchmany`` batches and each batch goes straight to the output
+file, so memory stays flat no matter how many rows the query returns:
+
+    conn = mysql.connector.connect(..., use_pure=True)
+    stats = stream_query(conn, query, 'CSV review/report.csv.gz', fmt='csv.gz')
+    print(stats.rows, stats.rows_per_sec)
+
+Any DB-API connection works; with mysql-connector the cursor is opened with
+``buffered=False`` so rows stay on the server until fetched. The SQLite
+stand-in (``capacity.sqlite_standin``) streams the same way for local tests.
+
+A multi-statement script (e.g. a staged dataflow that first builds indexed
+temporary tables) is run statement by statement: everything before the last
+``SELECT`` prepares the session, the last ``SELECT`` is streamed, and any
+statements after it (``DROP TEMPORARY TABLE ...``) always run at the end.
+
+Several queries run concurrently over a bounded pool of connections, so the
+wall time of a batch is about that of its slowest query:
+
+    pool = ConnectionPool(lambda: mysql.connector.connect(...), size=3)
+    jobs = [ExportJob('misalignment_report', query, 'out/misalignment_report.csv'), ...]
+    results = export_many(pool, jobs, fmt='csv.gz')
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+
+# --format value -> file extension
+FORMATS = {
+    "csv": ".csv",
+    "csv.gz": ".csv.gz",
+    "parquet": ".parquet",
+}
+DEFAULT_BATCH_SIZE = 10_000
+
+
+@dataclass
+class ExportStats:
+    path: str
+    rows: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float("nan")
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split on ``;`` outside quotes, backticks and comments; empty statements dropped."""
+    statements, current = [], []
+    i, n = 0, len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch in "'\"`":
+            end = i + 1
+            while end < n and sql[end] != ch:
+                end += 2 if sql[end] == "\\" and ch != "`" else 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+        elif sql.startswith("--", i) or ch == "#":
+            end = sql.find("\n", i)
+            end = n if end < 0 else end
+            current.append(sql[i:end])
+            i = end
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            current.append(sql[i:end])
+            i = end
+        elif ch == ";":
+            statements.append("".join(current))
+            current = []
+            i += 1
+        else:
+            current.append(ch)
+            i += 1
+    statements.append("".join(current))
+    return [s.strip() for s in statements if _strip_comments(s).strip()]
+
+
+def _strip_comments(sql: str) -> str:
+    return re.sub(r"--[^\n]*|#[^\n]*|/\*.*?\*/", " ", sql, flags=re.DOTALL)
+
+
+def result_statement(statements: Sequence[str]) -> int:
+    """Index of the statement whose rows are exported: the last one starting with SELECT."""
+    for i in range(len(statements) - 1, -1, -1):
+        if _strip_comments(statements[i]).lstrip().upper().startswith("SELECT"):
+            return i
+    raise ValueError("SQL script has no SELECT statement to export")
+
+
+def staged_variant(sql_path: str) -> Optional[str]:
+    """``<name>_staged<ext>`` next to ``sql_path`` if it exists (the indexed temp-table version)."""
+    root, ext = os.path.splitext(sql_path)
+    staged = f"{root}_staged{ext}"
+    return staged if os.path.exists(staged) else None
+
+
+def sql_stem(sql_path: str) -> str:
+    """Output name for ``sql_path``: its file stem without a ``_staged`` suffix, so both variants export under one name."""
+    stem = os.path.splitext(os.path.basename(sql_path))[0]
+    return stem[:-len("_staged")] if stem.endswith("_staged") and stem != "_staged" else stem
+
+
+def run_statements(conn, statements: Sequence[str]) -> None:
+    for statement in statements:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(statement)
+            if cursor.description is not None:
+                cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def open_cursor(conn):
+    """Unbuffered cursor where the driver distinguishes (mysql-connector), plain cursor otherwise."""
+    try:
+        return conn.cursor(buffered=False)
+    except TypeError:
+        return conn.cursor()
+
+
+def iter_batches(cursor, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[tuple]]:
+    """``fetchmany`` until the cursor is exhausted."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+class CsvBatchWriter:
+    """CSV (optionally gzip) written one batch at a time; NULL is an empty field."""
+
+    def __init__(self, path: str, columns: Sequence[str], compress: bool = False):
+        if compress:
+            self._file = io.TextIOWrapper(gzip.open(path, "wb", compresslevel=6), encoding="utf-8", newline="")
+        else:
+            self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows: Sequence[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetBatchWriter:
+    """
+    One Parquet row group per batch. Column types come from the first batch;
+    columns that are entirely NULL there are written as strings.
+    """
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        self.path = path
+        self.columns = list(columns)
+        self._schema = None
+        self._writer = None
+
+    def _arrays(self, rows: Sequence[tuple]):
+        import pyarrow as pa
+
+        values = list(zip(*rows)) if rows else [()] * len(self.columns)
+        if self._schema is None:
+            arrays = []
+            for column in values:
+                array = pa.array(column)
+                if pa.types.is_null(array.type):
+                    array = pa.array(column, type=pa.string())
+                arrays.append(array)
+            self._schema = pa.schema([pa.field(name, a.type) for name, a in zip(self.columns, arrays)])
+            return arrays
+        arrays = []
+        for column, field in zip(values, self._schema):
+            if pa.types.is_string(field.type):
+                column = [None if v is None else str(v) for v in column]
+            arrays.append(pa.array(column, type=field.type))
+        return arrays
+
+    def write(self, rows: Sequence[tuple]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrays = self._arrays(rows)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression="snappy")
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        if self._writer is None:
+            # Empty result: still leave a valid file with the column names
+            self.write([])
+        self._writer.close()
+
+
+def open_writer(path: str, columns: Sequence[str], fmt: str):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    if fmt == "parquet":
+        return ParquetBatchWriter(path, columns)
+    return CsvBatchWriter(path, columns, compress=fmt == "csv.gz")
+
+
+def stream_query(
+    conn,
+    query: str,
+    path: str,
+    fmt: str = "csv",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    params: Optional[tuple] = None,
+    progress: Optional[Callable[[int, float], None]] = None,
+) -> ExportStats:
+    """
+    Execute ``query`` and write its rows to ``path`` batch by batch.
+
+    ``query`` may be a multi-statement script (see the module docstring).
+    The file is written under a ``.tmp`` name and renamed at the end, so a
+    failed export never leaves a truncated report behind. ``progress`` is
+    called with (rows so far, seconds so far) after every batch.
+    """
+    start = time.perf_counter()
+    statements = split_statements(query)
+    result = result_statement(statements)
+    try:
+        run_statements(conn, statements[:result])
+        stats = _stream_select(conn, statements[result], path, fmt, batch_size, params, progress, start)
+    except Exception:
+        try:
+            run_statements(conn, statements[result + 1:])
+        except Exception:
+            pass  # report the original failure, not the cleanup's
+        raise
+    run_statements(conn, statements[result + 1:])
+    return stats
+
+
+def _stream_select(conn, query, path, fmt, batch_size, params, progress, start) -> ExportStats:
+    cursor = open_cursor(conn)
+    tmp = f"{path}.tmp"
+    writer = None
+    rows = batches = 0
+    try:
+        if params is None:
+            cursor.execute(query)
+        else:
+            cursor.execute(query, params)
+        columns = [d[0] for d in cursor.description]
+        writer = open_writer(tmp, columns, fmt)
+        for batch in iter_batches(cursor, batch_size):
+            writer.write(batch)
+            rows += len(batch)
+            batches += 1
+            if progress is not None:
+                progress(rows, time.perf_counter() - start)
+        writer.close()
+        writer = None
+        os.replace(tmp, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        try:
+            cursor.close()
+        except Exception:
+            # An unbuffered cursor abandoned mid-result refuses to close; the connection owner cleans up
+            pass
+    return ExportStats(path=path, rows=rows, batches=batches, seconds=time.perf_counter() - start)
+
+
+def output_path(outdir: str, stem: str, fmt: str, timestamp: str) -> str:
+    """``<outdir>/<stem>_<timestamp><ext>``, creating ``outdir``."""
+    os.makedirs(outdir, exist_ok=True)
+    return os.path.join(outdir, f"{stem}_{timestamp}{FORMATS[fmt]}")
+
+
+class ConnectionPool:
+    """
+    At most ``size`` connections, opened on first demand and reused.
+
+    Connections are handed to one thread at a time; a connection whose
+    export raised is closed rather than returned, since an abandoned
+    unbuffered result leaves it unusable.
+    """
+
+    def __init__(self, connect: Callable[[], Any], size: int):
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        self.size = size
+        self._connect = connect
+        self._idle: "queue.Queue[Any]" = queue.Queue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                grow = self._opened < self.size
+                if grow:
+                    self._opened += 1
+            if grow:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            # Poll so a slot freed by a discarded connection is picked up too
+            try:
+                return self._idle.get(timeout=0.05)
+            except queue.Empty:
+                continue
+
+    def _discard(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._opened -= 1
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            self._discard(conn)
+            raise
+        self._idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+@dataclass
+class ExportJob:
+    name: str
+    query: str
+    path: str
+    sql_path: Optional[str] = None  # where the query was read from, for summaries
+
+
+@dataclass
+class ExportResult:
+    job: ExportJob
+    stats: Optional[ExportStats] = None
+    error: Optional[str] = None
+    wait_seconds: float = 0.0  # time spent waiting for a pooled connection
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def export_many(
+    pool: ConnectionPool,
+    jobs: Sequence[ExportJob],
+    fmt: str = "csv",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[ExportResult]:
+    """Run every job on ``pool`` concurrently; results come back in job order, failures included."""
+
+    def run(job: ExportJob) -> ExportResult:
+        queued = time.perf_counter()
+        try:
+            with pool.connection() as conn:
+                waited = time.perf_counter() - queued
+                stats = stream_query(conn, job.query, job.path, fmt=fmt, batch_size=batch_size)
+        except Exception as err:
+            return ExportResult(job, error=f"{type(err).__name__}: {err}", wait_seconds=time.perf_counter() - queued)
+        return ExportResult(job, stats=stats, wait_seconds=waited)
+
+    with ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="sql-export") as executor:
+        return list(executor.map(run, jobs))
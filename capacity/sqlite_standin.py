@@ -0,0 +1,201 @@
+"""
+Local SQLite stand-in for the Domo MySQL 5.7 dataflows.
+
+Runs the files in ``SQL/`` unchanged against in-memory tables so the Python
+ports can be checked for parity without database credentials. SQLite already
+understands backtick identifiers, ``DATE()``, ``COALESCE`` and ``UPPER`` /
+``LOWER`` / ``TRIM``; the MySQL-only functions are registered on the
+connection, the little MySQL-only syntax the dataflows use
+(``DATE_SUB(d, INTERVAL n DAY)``, ``DROP TEMPORARY TABLE``) is rewritten as
+statements are executed, and ``schema``.``table`` names resolve through
+attached schemas:
+
+    conn = connect(schemas=['dataflow_schema'])
+    load_tables(conn, {'namely_comp_data_history_w_notes': comp,
+                       'dataflow_schema.employee_org_units_dept_div_loc': org_units})
+    result = run_sql(conn, open('SQL/misalignment_report_mysql57.sql').read())
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from datetime import date, datetime
+from typing import Iterable, Mapping, Optional, Union
+
+import pandas as pd
+
+
+def _as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _datediff(a, b) -> Optional[int]:
+    """MySQL ``DATEDIFF(a, b)``: whole days from ``b`` to ``a``."""
+    da, db = _as_date(a), _as_date(b)
+    if da is None or db is None:
+        return None
+    return (da - db).days
+
+
+def _concat(*values) -> Optional[str]:
+    """MySQL ``CONCAT``: NULL if any argument is NULL."""
+    if any(v is None for v in values):
+        return None
+    return "".join(_text(v) for v in values)
+
+
+def _concat_ws(sep, *values) -> Optional[str]:
+    """MySQL ``CONCAT_WS``: NULL arguments are skipped, not propagated."""
+    if sep is None:
+        return None
+    return str(sep).join(_text(v) for v in values if v is not None)
+
+
+def _greatest(*values):
+    """MySQL ``GREATEST``: NULL if any argument is NULL."""
+    if any(v is None for v in values):
+        return None
+    return max(values)
+
+
+def _least(*values):
+    """MySQL ``LEAST``: NULL if any argument is NULL."""
+    if any(v is None for v in values):
+        return None
+    return min(values)
+
+
+def _find_in_set(needle, haystack) -> Optional[int]:
+    """MySQL ``FIND_IN_SET``: 1-based position in a comma-separated list, 0 if absent."""
+    if needle is None or haystack is None:
+        return None
+    items = str(haystack).split(",")
+    return items.index(str(needle)) + 1 if str(needle) in items else 0
+
+
+# MySQL date format specifiers -> strptime (only the ones the dataflows use, plus neighbours)
+_STRPTIME = {"%M": "%B", "%b": "%b", "%d": "%d", "%e": "%d", "%m": "%m", "%c": "%m", "%Y": "%Y", "%y": "%y"}
+
+
+def _str_to_date(value, fmt) -> Optional[str]:
+    """MySQL ``STR_TO_DATE`` for date-only formats; NULL when the text does not parse."""
+    if value is None or fmt is None:
+        return None
+    pattern = re.sub(r"%[A-Za-z]", lambda m: _STRPTIME.get(m.group(0), m.group(0)), str(fmt))
+    try:
+        return datetime.strptime(str(value).strip(), pattern).date().isoformat()
+    except ValueError:
+        return None
+
+
+def _text(value) -> str:
+    # SQLite hands integers back for DATEDIFF results; MySQL prints them plainly
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+_INTERVAL = re.compile(
+    r"\bDATE_(ADD|SUB)\(\s*((?:[^(),]|\([^()]*\))+?)\s*,\s*INTERVAL\s+(-?\d+)\s+(DAY|MONTH|YEAR)\s*\)",
+    re.IGNORECASE,
+)
+_DROP_TEMPORARY = re.compile(r"\bDROP\s+TEMPORARY\s+TABLE\b", re.IGNORECASE)
+
+
+def translate(sql: str) -> str:
+    """Rewrite the MySQL-only syntax used in ``SQL/`` into SQLite equivalents."""
+
+    def interval(match: re.Match) -> str:
+        sign = "-" if match.group(1).upper() == "SUB" else "+"
+        amount = int(match.group(3))
+        if amount < 0:
+            sign, amount = ("+" if sign == "-" else "-"), -amount
+        return f"DATE({match.group(2)}, '{sign}{amount} {match.group(4).lower()}')"
+
+    return _DROP_TEMPORARY.sub("DROP TABLE", _INTERVAL.sub(interval, sql))
+
+
+class StandinCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        return super().execute(translate(sql), parameters)
+
+
+class StandinConnection(sqlite3.Connection):
+    """``sqlite3.Connection`` whose statements pass through ``translate``."""
+
+    def cursor(self, factory=StandinCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return super().execute(translate(sql), parameters)
+
+
+def connect(
+    path: str = ":memory:",
+    schemas: Union[Iterable[str], Mapping[str, str]] = (),
+    check_same_thread: bool = True,
+) -> sqlite3.Connection:
+    """
+    SQLite connection with the MySQL functions (``DATEDIFF``, ``CONCAT``,
+    ``CONCAT_WS``, ``GREATEST``, ``LEAST``, ``FIND_IN_SET``, ``STR_TO_DATE``)
+    registered and MySQL syntax translated on execute.
+
+    ``schemas`` names are attached as empty in-memory databases; a mapping of
+    name -> database file attaches existing files instead. Pass
+    ``check_same_thread=False`` when a pool hands the connection between threads.
+    """
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread, factory=StandinConnection)
+    conn.create_function("DATEDIFF", 2, _datediff, deterministic=True)
+    conn.create_function("CONCAT", -1, _concat, deterministic=True)
+    conn.create_function("CONCAT_WS", -1, _concat_ws, deterministic=True)
+    conn.create_function("GREATEST", -1, _greatest, deterministic=True)
+    conn.create_function("LEAST", -1, _least, deterministic=True)
+    conn.create_function("FIND_IN_SET", 2, _find_in_set, deterministic=True)
+    conn.create_function("STR_TO_DATE", 2, _str_to_date, deterministic=True)
+    files = schemas if isinstance(schemas, Mapping) else {schema: ":memory:" for schema in schemas}
+    for schema, file in files.items():
+        conn.execute(f"ATTACH DATABASE ? AS {_quote(schema)}", (file,))
+    return conn
+
+
+def _sqlite_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Dates as ISO text (what MySQL's ``DATE()`` compares), everything else as is."""
+    out = df.copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            text = out[col].dt.strftime("%Y-%m-%d")
+            out[col] = text.astype(object).where(out[col].notna(), None)
+    return out
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def load_tables(conn: sqlite3.Connection, tables: Mapping[str, pd.DataFrame]) -> None:
+    """Create (or replace) one table per frame; ``schema.table`` keys go to attached schemas."""
+    for name, frame in tables.items():
+        schema, _, table = name.rpartition(".")
+        target = f"{_quote(schema)}.{_quote(table)}" if schema else _quote(table)
+        frame = _sqlite_frame(frame)
+        conn.execute(f"DROP TABLE IF EXISTS {target}")
+        conn.execute(f"CREATE TABLE {target} ({', '.join(_quote(str(c)) for c in frame.columns)})")
+        rows = frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None)
+        placeholders = ", ".join("?" for _ in frame.columns)
+        conn.executemany(f"INSERT INTO {target} VALUES ({placeholders})", [tuple(_plain(v) for v in row) for row in rows])
+    conn.commit()
+
+
+def _plain(value):
+    """numpy scalars -> Python values sqlite3 can bind."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def run_sql(conn: sqlite3.Connection, sql: str) -> pd.DataFrame:
+    return pd.read_sql_query(sql.rstrip().rstrip(";"), conn)
@@ -0,0 +1,309 @@
+"""
+The notebook's load/merge stages as a cached pipeline.
+
+Mirrors Cell 5 (booking/user merge), Cell 5b (Org Units merge) and Cell 7
+(vacation summary) so a refresh only recomputes what changed. Overlapping
+leave rows are coalesced into disjoint per-person spans (``vacation_spans``)
+before the monthly summary, so no day is counted twice:
+
+    from capacity.stages import build_pipeline
+    pipeline = build_pipeline('../data', '../.cache/pipeline')
+    out = pipeline.run('bookings_with_org', 'vacation_monthly')
+
+``capacity_cube`` is Cell 10's cube for every user rather than the selected
+roles; it depends on no role parameter, so one cached copy answers the
+what-if queries of ``capacity.whatif`` for any role set.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from capacity.bookings import load_role_bookings
+from capacity.cube import CapacityCube, build_cube
+from capacity.identity import PersonIndex
+from capacity.name_matching import NameMatcher
+from capacity.pipeline import Pipeline
+from capacity.sources import SOURCE_FILES, read_source_csv
+from capacity.vacation import coalesce_leave, prorate_leave_to_months
+from capacity.workdays import CapacityCalendar
+
+
+DEFAULT_SELECTED_ROLES = (
+    "Design",
+    "Principal",
+    "Program Management",
+    "Strategy",
+    "Studio",
+    "Tech",
+)
+
+VACATION_CATEGORIES = {
+    "Vacation": ["Vacation", "UAE Vacation", "Work From Anywhere"],
+    "Sick Leave": ["Sick", "UAE Sick Time"],
+    "Parental Leave": ["Parental Leave (UAE)", "Prenatal Leave"],
+    "Family Leave": ["Family Caregiver Leave", "Family Caregiver Leave (UAE)", "Bereavement"],
+    "Other": ["Jury Duty", "UAE Study Leave"],
+}
+
+# Which category owns a day covered by several leave records: protected leave
+# first, so a sick day inside a vacation is counted as sick leave
+LEAVE_PRECEDENCE = ("Parental Leave", "Family Leave", "Sick Leave", "Other", "Vacation")
+
+ORG_COLUMNS = ("location", "department", "division")
+
+
+# --------------------------------------------------------------- stage bodies
+
+def person_index(users_csv: str, person_index_path: str) -> PersonIndex:
+    """Shared person identity index, updated in place with any new users."""
+    index = PersonIndex.open(person_index_path)
+    index.update_from_users(read_source_csv(users_csv, columns="needed", writable=False))
+    index.save()
+    return index
+
+
+def filtered_users(users_csv: str, person_index: PersonIndex, selected_roles: Optional[Iterable[str]]) -> pd.DataFrame:
+    """Cell 5: users restricted to the selected leadership roles (all users for ``None``), with ``person_id``."""
+    users = read_source_csv(users_csv, columns="needed")
+    users["person_id"] = person_index.lookup_users(users).astype(np.int32)
+    role_column = next(
+        (c for c in ["role", "Role", "job_title", "Job_Title", "position", "Position"] if c in users.columns),
+        None,
+    )
+    if role_column is None or selected_roles is None:
+        return users
+    users = users[users[role_column].isin(list(selected_roles))].copy()
+    if isinstance(users[role_column].dtype, pd.CategoricalDtype):
+        users[role_column] = users[role_column].cat.remove_unused_categories()
+    return users
+
+
+def all_users(users_csv: str, person_index: PersonIndex) -> pd.DataFrame:
+    """Every user with ``person_id``: Cell 5 without the role filter."""
+    return filtered_users(users_csv, person_index, None)
+
+
+def bookings(bookings_csv: str, filtered_users: pd.DataFrame) -> pd.DataFrame:
+    """Cell 5: the 10k booking export, streamed and filtered to the selected users."""
+    return load_role_bookings(bookings_csv, filtered_users)
+
+
+def normalize_org_units(raw: pd.DataFrame) -> pd.DataFrame:
+    """Cell 5b: canonical email / Org_Department / Org_Division / Org_Office_Location."""
+    df = raw.rename(columns=lambda c: c.strip().lower())
+
+    def resolve(variants):
+        return next((v for v in variants if v in df.columns), None)
+
+    email_col = resolve(["email", "work email", "employee email", "e-mail"])
+    dept_col = resolve(["department", "dept"])
+    div_col = resolve(["division", "div"])
+    loc_col = resolve(["office location", "location", "office", "current office location"])
+    if any(col is None for col in (email_col, dept_col, div_col, loc_col)):
+        raise ValueError(
+            "Missing required columns in Org Units. Found: "
+            f"email={email_col}, department={dept_col}, division={div_col}, location={loc_col}"
+        )
+
+    df = df[[email_col, dept_col, div_col, loc_col]].rename(columns={
+        email_col: "email",
+        dept_col: "Org_Department",
+        div_col: "Org_Division",
+        loc_col: "Org_Office_Location",
+    })
+    df["email"] = df["email"].astype(str).str.strip().str.lower()
+    return df.dropna(subset=["email"]).drop_duplicates(subset=["email"], keep="last")
+
+
+def org_units(org_units_csv: str, person_index: PersonIndex) -> pd.DataFrame:
+    """Normalized Org Units keyed by ``person_id``; rows for unknown people are dropped."""
+    org = normalize_org_units(read_source_csv(org_units_csv))
+    org["person_id"] = person_index.lookup(emails=org["email"])
+    return org[org["person_id"] >= 0].drop_duplicates(subset=["person_id"], keep="last")
+
+
+def merge_org_units(frame: pd.DataFrame, org: pd.DataFrame) -> pd.DataFrame:
+    """Replace location/department/division with the Org Units columns, joined on ``person_id``."""
+    if "person_id" not in frame.columns:
+        raise ValueError("Cannot merge Org Units: frame has no 'person_id' column")
+    out = frame.drop(columns=[c for c in ORG_COLUMNS if c in frame.columns])
+    return out.merge(org.drop(columns=["email"]), on="person_id", how="left")
+
+
+def users_with_org(filtered_users: pd.DataFrame, org_units: pd.DataFrame) -> pd.DataFrame:
+    return merge_org_units(filtered_users, org_units)
+
+
+def bookings_with_org(bookings: pd.DataFrame, org_units: pd.DataFrame) -> pd.DataFrame:
+    return merge_org_units(bookings, org_units)
+
+
+def categorize_vacation_types(types: pd.Series) -> pd.Series:
+    lookup = {t: category for category, members in VACATION_CATEGORIES.items() for t in members}
+    return types.map(lookup).fillna("Other")
+
+
+def vacation_detail(
+    vacation_csv: str,
+    filtered_users: pd.DataFrame,
+    person_index: PersonIndex,
+    name_matches_path: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Cell 7 steps 1-2: leadership leave rows with actual time off, categorized.
+
+    Rows the exact person index misses are matched by name through the cached
+    fuzzy matcher (``name_matches_path``); ``Match_Score`` is 1.0 for exact
+    matches and the match confidence otherwise.
+    """
+    raw = read_source_csv(vacation_csv)
+    person_ids = person_index.lookup(employee_numbers=raw["Employee Number"], names=raw["Full Name"])
+    match_score = np.where(person_ids >= 0, 1.0, 0.0)
+    if name_matches_path:
+        matcher = NameMatcher.open(name_matches_path)
+        person_ids, match_score = matcher.fill(raw["Full Name"], person_ids, person_index)
+        matcher.save()
+
+    # Dates and numbers are already typed by the vacation SourceSpec; one mask, then an
+    # explicit copy since columns are added to it
+    leadership_ids = filtered_users.loc[filtered_users["person_id"] >= 0, "person_id"].unique()
+    keep = np.isin(person_ids, leadership_ids) & ((raw["Used"] > 0) | (raw["Scheduled"] > 0)).to_numpy()
+    vacation = raw[keep].copy()
+    vacation["person_id"] = person_ids[keep].astype(np.int32)
+    vacation["Match_Score"] = match_score[keep].astype(np.float32)
+    vacation["Vacation_Category"] = categorize_vacation_types(vacation["Type"])
+    return vacation
+
+
+def vacation_window(vacation: pd.DataFrame, horizon_months: int) -> pd.DatetimeIndex:
+    """The last ``horizon_months`` months of available leave data (Cell 7 step 3)."""
+    if not vacation.empty and vacation["Start date"].notna().any():
+        start = (vacation["Start date"].max() - pd.DateOffset(months=horizon_months - 1)).replace(day=1)
+    else:
+        start = pd.Timestamp.now().replace(day=1)
+    return pd.date_range(start=start.normalize(), periods=horizon_months, freq="MS")
+
+
+def vacation_spans(vacation_detail: pd.DataFrame, leave_precedence: Iterable[str]) -> pd.DataFrame:
+    """Cell 7 step 2b: each person's overlapping leave merged into disjoint, categorized spans."""
+    return coalesce_leave(
+        vacation_detail,
+        list(leave_precedence),
+        keep_cols=("Full Name", "First Name", "Last Name", "Employee Number"),
+    )
+
+
+def vacation_monthly(vacation_detail: pd.DataFrame, vacation_spans: pd.DataFrame, horizon_months: int) -> pd.DataFrame:
+    """Cell 7 steps 3-4: person x month leave days over the dashboard window, from the disjoint spans."""
+    months = vacation_window(vacation_detail, horizon_months)
+    overlaps = prorate_leave_to_months(vacation_spans, months)
+    if overlaps.empty:
+        return pd.DataFrame()
+    return overlaps.groupby(["Full Name", "Month"]).agg(
+        Days_Used=("Used", "sum"),
+        Days_Scheduled=("Scheduled", "sum"),
+        Vacation_Category=("Vacation_Category", lambda x: ", ".join(x.unique())),
+        First_Name=("First Name", "first"),
+        Last_Name=("Last Name", "first"),
+        Employee_Number=("Employee Number", "first"),
+    ).reset_index().rename(columns={"Full Name": "Full_Name"})
+
+
+def capacity_cube(
+    all_users: pd.DataFrame,
+    org_units: pd.DataFrame,
+    person_index: PersonIndex,
+    bookings_csv: str,
+    vacation_csv: str,
+    salesforce_csv: str,
+    us_hours_csv: str,
+    uae_hours_csv: Optional[str] = None,
+    name_matches_path: Optional[str] = None,
+    leave_precedence: Iterable[str] = LEAVE_PRECEDENCE,
+) -> CapacityCube:
+    """
+    Cell 10's person x month cube for every user (role-independent aggregates).
+
+    Bookings, leave and pipeline are read for all users once; the role is only
+    a person attribute of the cube, so any role set is a mask over it. The
+    calendar is built from the directory of the Working Hours files (both are
+    stage inputs so an edit to either rebuilds the cube). Leave is coalesced
+    with ``leave_precedence`` like ``vacation_spans``, so ``vacation_days``
+    agrees with ``vacation_monthly``.
+    """
+    users = merge_org_units(all_users, org_units)
+    return build_cube(
+        users,
+        bookings=load_role_bookings(bookings_csv, users),
+        vacation=vacation_detail(vacation_csv, users, person_index, name_matches_path),
+        salesforce=read_source_csv(salesforce_csv, writable=False),
+        calendar=CapacityCalendar.from_data_dir(os.path.dirname(us_hours_csv)),
+        person_index=person_index,
+        leave_precedence=list(leave_precedence),
+    )
+
+
+# ------------------------------------------------------------------ assembly
+
+def build_pipeline(
+    data_dir: str,
+    cache_dir: Optional[str] = None,
+    selected_roles: Iterable[str] = DEFAULT_SELECTED_ROLES,
+    horizon_months: int = 4,
+    leave_precedence: Iterable[str] = LEAVE_PRECEDENCE,
+    verbose: bool = True,
+    **params: Any,
+) -> Pipeline:
+    """Wire the notebook stages into a ``Pipeline`` rooted at ``data_dir``."""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(data_dir)), ".cache", "pipeline")
+    params.setdefault("person_index_path", os.path.join(os.path.dirname(cache_dir), "person_index.json"))
+    params.setdefault("name_matches_path", os.path.join(os.path.dirname(cache_dir), "name_matches.json"))
+
+    pipeline = Pipeline(
+        data_dir,
+        cache_dir,
+        params={
+            "selected_roles": sorted(selected_roles),
+            "horizon_months": int(horizon_months),
+            "leave_precedence": list(leave_precedence),
+            **params,
+        },
+        verbose=verbose,
+    )
+    pipeline.stage("person_index", files={"users_csv": SOURCE_FILES["users"]}, param_files=["person_index_path"])(person_index)
+    pipeline.stage(
+        "filtered_users", files={"users_csv": SOURCE_FILES["users"]}, deps=["person_index"], params=["selected_roles"],
+    )(filtered_users)
+    pipeline.stage("bookings", files={"bookings_csv": SOURCE_FILES["bookings"]}, deps=["filtered_users"])(bookings)
+    pipeline.stage("all_users", files={"users_csv": SOURCE_FILES["users"]}, deps=["person_index"])(all_users)
+    pipeline.stage("org_units", files={"org_units_csv": SOURCE_FILES["org_units"]}, deps=["person_index"])(org_units)
+    pipeline.stage("users_with_org", deps=["filtered_users", "org_units"])(users_with_org)
+    pipeline.stage("bookings_with_org", deps=["bookings", "org_units"])(bookings_with_org)
+    pipeline.stage(
+        "vacation_detail",
+        files={"vacation_csv": SOURCE_FILES["vacation"]},
+        deps=["filtered_users", "person_index"],
+        param_files=["name_matches_path"],
+    )(vacation_detail)
+    pipeline.stage("vacation_spans", deps=["vacation_detail"], params=["leave_precedence"])(vacation_spans)
+    pipeline.stage("vacation_monthly", deps=["vacation_detail", "vacation_spans"], params=["horizon_months"])(vacation_monthly)
+    pipeline.stage(
+        "capacity_cube",
+        files={
+            "bookings_csv": SOURCE_FILES["bookings"],
+            "vacation_csv": SOURCE_FILES["vacation"],
+            "salesforce_csv": SOURCE_FILES["salesforce"],
+            "us_hours_csv": SOURCE_FILES["us_hours"],
+            "uae_hours_csv": SOURCE_FILES["uae_hours"],
+        },
+        deps=["all_users", "org_units", "person_index"],
+        params=["leave_precedence"],
+        param_files=["name_matches_path"],
+    )(capacity_cube)
+    return pipeline
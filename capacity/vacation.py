@@ -0,0 +1,331 @@
+"""
+Vectorized leave-interval to month expansion.
+
+Replaces the nested ``iterrows`` / ``date_range`` loop from the vacation cell
+with a single array operation. Each leave record (Start date / Departure date)
+is matched against a grid of months; a record produces one output row for every
+month it overlaps, exactly like the original loop:
+
+    start <= month_end and end >= month_start
+
+where ``end`` falls back to ``start`` when the departure date is missing and
+records without a start date are skipped.
+
+Cost is O(n log m) to locate the first/last overlapping month of every record
+plus O(output) to materialize the pairs, so horizons of any length and
+multi-million row exports are handled without a Python-level loop.
+
+Namely exports overlap: a ``Vacation`` and a ``Work From Anywhere`` row for
+the same days, or a re-scheduled row next to the original. ``coalesce_leave``
+turns each person's records into disjoint spans in one sort-and-sweep pass
+(O(n log n)); where records overlap the category earliest in ``precedence``
+owns the days, so every calendar day is counted at most once:
+
+    spans = coalesce_leave(leave, ["Parental Leave", "Sick Leave", "Vacation"])
+    monthly = prorate_leave_to_months(spans, month_grid("2025-03-01", 4))
+
+Namely books some leave in hours (``Units == "hours"``). ``coalesce_leave``
+converts those rows to days (``leave_in_days``, ``HOURS_PER_DAY`` per day)
+before it lays records out on the calendar, so every consumer of the spans
+(the vacation stages, the cube, the incremental store) counts days.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from capacity.workdays import HOURS_PER_DAY
+
+
+MonthsLike = Union[pd.DatetimeIndex, "pd.Series", list]
+
+
+def month_grid(start, months: int = 4) -> pd.DatetimeIndex:
+    """Return ``months`` consecutive month starts beginning at ``start``'s month."""
+    first = pd.Timestamp(start).normalize().replace(day=1)
+    return pd.date_range(start=first, periods=months, freq="MS")
+
+
+def _month_bounds(months: MonthsLike) -> Tuple[np.ndarray, np.ndarray, pd.DatetimeIndex]:
+    grid = pd.DatetimeIndex(months)
+    if grid.has_duplicates or not grid.is_monotonic_increasing:
+        raise ValueError("months must be sorted and unique")
+    grid = grid.normalize()
+    starts = grid.values.astype("datetime64[ns]")
+    # Midnight of each month's last day (``month_start + MonthEnd(0)``), not its last
+    # instant: a leave starting later on that day is compared as after the month
+    ends = (grid + pd.offsets.MonthEnd(0)).values.astype("datetime64[ns]")
+    return starts, ends, grid
+
+
+def leave_month_overlaps(
+    start: np.ndarray,
+    end: np.ndarray,
+    months: MonthsLike,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Core overlap kernel on raw datetime64 arrays.
+
+    Returns ``(row_idx, month_idx)``: positional indices into the input records
+    and into ``months`` for every overlapping (record, month) pair. Pairs are
+    ordered by record, then month, which is the order the original loop emitted.
+    """
+    start = np.asarray(start, dtype="datetime64[ns]")
+    end = np.asarray(end, dtype="datetime64[ns]")
+    if start.shape != end.shape:
+        raise ValueError("start and end must have the same length")
+
+    month_starts, month_ends, _ = _month_bounds(months)
+
+    valid = ~np.isnat(start)
+    end = np.where(np.isnat(end), start, end)
+
+    # First month whose end is on/after the leave start, last month whose start
+    # is on/before the leave end. Everything in between overlaps.
+    first = np.searchsorted(month_ends, start, side="left")
+    last = np.searchsorted(month_starts, end, side="right") - 1
+    counts = np.where(valid, last - first + 1, 0)
+    counts = np.clip(counts, 0, None)
+
+    total = int(counts.sum())
+    row_idx = np.repeat(np.arange(len(start)), counts)
+    if total == 0:
+        return row_idx, np.empty(0, dtype=np.int64)
+
+    # Position of each output pair within its record's run, offset by ``first``
+    run_starts = np.cumsum(counts) - counts
+    within = np.arange(total) - np.repeat(run_starts, counts)
+    month_idx = np.repeat(first, counts) + within
+    return row_idx, month_idx.astype(np.int64)
+
+
+def expand_leave_to_months(
+    leave: pd.DataFrame,
+    months: MonthsLike,
+    start_col: str = "Start date",
+    end_col: str = "Departure date",
+    month_col: str = "Month",
+    overlap_days_col: Optional[str] = "Overlap_Days",
+) -> pd.DataFrame:
+    """
+    Expand leave records into one row per (record, overlapping month).
+
+    ``leave`` keeps all of its columns and ``month_col`` holds the start of
+    the overlapping month. When ``overlap_days_col`` is set, the number of
+    calendar days of the leave that fall inside that month is added as well.
+    """
+    start = pd.to_datetime(leave[start_col], errors="coerce")
+    end = pd.to_datetime(leave[end_col], errors="coerce") if end_col in leave.columns else start
+
+    start_values = start.values.astype("datetime64[ns]")
+    end_values = end.values.astype("datetime64[ns]")
+    row_idx, month_idx = leave_month_overlaps(start_values, end_values, months)
+
+    month_starts, month_ends, grid = _month_bounds(months)
+    out = leave.iloc[row_idx].reset_index(drop=True)
+    out[month_col] = grid[month_idx]
+
+    if overlap_days_col:
+        s = start_values[row_idx]
+        e = end_values[row_idx]
+        e = np.where(np.isnat(e), s, e)
+        lo = np.maximum(s.astype("datetime64[D]"), month_starts[month_idx].astype("datetime64[D]"))
+        hi = np.minimum(e.astype("datetime64[D]"), month_ends[month_idx].astype("datetime64[D]"))
+        out[overlap_days_col] = np.clip((hi - lo).astype(np.int64) + 1, 0, None)
+
+    return out
+
+
+def leave_in_days(
+    leave: pd.DataFrame,
+    quantity_cols: Sequence[str] = ("Used", "Scheduled"),
+    units_col: str = "Units",
+    hours_per_day: float = HOURS_PER_DAY,
+) -> pd.DataFrame:
+    """
+    ``leave`` with ``quantity_cols`` in days: rows whose ``units_col`` is
+    ``hours`` are divided by ``hours_per_day`` and relabelled ``days``, so a
+    second call changes nothing. Frames without ``units_col`` or without hour
+    rows are returned as they are.
+    """
+    if units_col not in leave.columns:
+        return leave
+    in_hours = leave[units_col].astype("string").str.lower().eq("hours").fillna(False).to_numpy()
+    if not in_hours.any():
+        return leave
+    converted = {
+        col: pd.to_numeric(leave[col], errors="coerce").astype("float64").where(~in_hours, leave[col] / hours_per_day)
+        for col in quantity_cols
+    }
+    converted[units_col] = leave[units_col].astype("string").where(~in_hours, "days")
+    return leave.assign(**converted)
+
+
+def _leave_days(
+    leave: pd.DataFrame,
+    start_col: str,
+    end_col: str,
+    quantity_cols: Sequence[str],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calendar-day span ``[start, end)`` (int days since epoch) and a validity mask.
+
+    Without a departure date a record covers its day count from the start
+    date (the quantities summed and rounded up, at least one day), so a
+    10-day leave with no departure date overlaps the 10 days it actually takes.
+    """
+    start = pd.to_datetime(leave[start_col], errors="coerce").values.astype("datetime64[D]")
+    if end_col in leave.columns:
+        end = pd.to_datetime(leave[end_col], errors="coerce").values.astype("datetime64[D]")
+    else:
+        end = np.full(len(leave), np.datetime64("NaT"), dtype="datetime64[D]")
+    valid = ~np.isnat(start)
+    start_day = np.where(valid, start.astype(np.int64), 0)
+    days = np.zeros(len(leave))
+    for col in quantity_cols:
+        days += pd.to_numeric(leave[col], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+    inferred = start_day + np.maximum(np.ceil(days), 1).astype(np.int64)
+    end_day = np.where(np.isnat(end), inferred, end.astype(np.int64) + 1)
+    end_day = np.maximum(end_day, start_day + 1)
+    return start_day, end_day, valid
+
+
+def coalesce_leave(
+    leave: pd.DataFrame,
+    precedence: Sequence[str] = (),
+    person_col: str = "person_id",
+    start_col: str = "Start date",
+    end_col: str = "Departure date",
+    category_col: str = "Vacation_Category",
+    quantity_cols: Sequence[str] = ("Used", "Scheduled"),
+    keep_cols: Sequence[str] = (),
+    units_col: Optional[str] = "Units",
+) -> pd.DataFrame:
+    """
+    Merge each person's overlapping leave records into disjoint spans.
+
+    Records booked in hours (``units_col``) are first converted to days
+    (``leave_in_days``). Every record spreads its ``quantity_cols`` evenly over its calendar days.
+    The records are swept per person in start order; on each day the category
+    that comes first in ``precedence`` wins (categories not listed follow in
+    alphabetical order) and that day carries the mean daily quantity of the
+    winning category's overlapping records, so duplicated rows count once and
+    a ``Vacation`` under a ``Sick Leave`` row is dropped for the shared days.
+    Consecutive days with the same winner form one span.
+
+    Returns one row per span: ``person_col``, ``keep_cols`` (first value per
+    person), ``start_col`` / ``end_col`` (inclusive), ``category_col``, the
+    span's share of every quantity, ``Span_Days`` and ``Max_Overlap`` (the
+    most records covering any day of the span; 1 means nothing was merged).
+    Records without a start date are skipped.
+    """
+    columns = [person_col, *keep_cols, start_col, end_col, category_col, *quantity_cols, "Span_Days", "Max_Overlap"]
+    if units_col:
+        leave = leave_in_days(leave, quantity_cols, units_col)
+    start_day, end_day, valid = _leave_days(leave, start_col, end_col, quantity_cols)
+    if not valid.any():
+        return pd.DataFrame(columns=columns)
+    positions = np.flatnonzero(valid)
+    start_day, end_day = start_day[positions], end_day[positions]
+    length = (end_day - start_day).astype(np.float64)
+
+    person_codes, persons = pd.factorize(leave[person_col].iloc[positions], use_na_sentinel=False)
+    category_codes, categories = pd.factorize(leave[category_col].iloc[positions].astype("string"), use_na_sentinel=False)
+    listed = [c for c in precedence if c in set(categories)]
+    order = listed + sorted((c for c in categories if c not in set(listed)), key=lambda c: (pd.isna(c), str(c)))
+    rank = pd.Index(order).get_indexer(categories)[category_codes]
+
+    # Sweep events: +1 at a record's first day, -1 the day after its last
+    n = len(positions)
+    event_person = np.concatenate([person_codes, person_codes])
+    event_day = np.concatenate([start_day, end_day])
+    sort = np.lexsort((event_day, event_person))
+    event_person, event_day = event_person[sort], event_day[sort]
+    event_rank = np.concatenate([rank, rank])[sort]
+    sign = np.concatenate([np.ones(n), -np.ones(n)])[sort]
+    record = np.concatenate([np.arange(n), np.arange(n)])[sort]
+    daily = [
+        (pd.to_numeric(leave[col].iloc[positions], errors="coerce").fillna(0.0).to_numpy(dtype=np.float64) / length)[record]
+        for col in quantity_cols
+    ]
+
+    # State after the last event of each (person, day) holds until the next event day
+    last = np.ones(2 * n, dtype=bool)
+    last[:-1] = (event_person[1:] != event_person[:-1]) | (event_day[1:] != event_day[:-1])
+    idx = np.flatnonzero(last)
+    seg_person, seg_start = event_person[idx], event_day[idx]
+    seg_end = np.append(seg_start[1:], seg_start[-1])
+
+    # One running coverage / daily-quantity sum per category, highest precedence first;
+    # the first category covering a segment wins it
+    winner = np.full(len(idx), -1)
+    covered = np.zeros(len(idx), dtype=np.int64)
+    total = np.zeros(len(idx), dtype=np.int64)
+    rates = np.zeros((len(idx), len(quantity_cols)))
+    for c in range(len(order)):
+        in_category = event_rank == c
+        count = np.rint(np.cumsum(np.where(in_category, sign, 0.0))[idx]).astype(np.int64)
+        total += count
+        wins = (winner < 0) & (count > 0)
+        winner[wins] = c
+        covered[wins] = count[wins]
+        for j, values in enumerate(daily):
+            rates[wins, j] = np.cumsum(np.where(in_category, sign * values, 0.0))[idx][wins]
+
+    keep = np.zeros(len(idx), dtype=bool)
+    keep[:-1] = (seg_person[1:] == seg_person[:-1]) & (total[:-1] > 0)
+    seg_person, seg_start, seg_end = seg_person[keep], seg_start[keep], seg_end[keep]
+    winner, covered, total, rates = winner[keep], covered[keep], total[keep], rates[keep]
+    if not len(winner):
+        return pd.DataFrame(columns=columns)
+
+    # Running sums of +rate / -rate leave float residue where a category ends
+    rates[np.isclose(rates, 0.0, atol=1e-12)] = 0.0
+    seg_days = (seg_end - seg_start).astype(np.float64)
+    amounts = seg_days[:, None] * rates / covered[:, None]
+
+    # Adjacent segments with the same winner form one span
+    new_span = np.ones(len(winner), dtype=bool)
+    new_span[1:] = (
+        (seg_person[1:] != seg_person[:-1]) | (winner[1:] != winner[:-1]) | (seg_start[1:] != seg_end[:-1])
+    )
+    first = np.flatnonzero(new_span)
+    span_last = np.append(first[1:], len(winner)) - 1
+    span_person = seg_person[first]
+
+    out = pd.DataFrame({person_col: np.asarray(persons)[span_person]})
+    if keep_cols:
+        _, person_first = np.unique(person_codes, return_index=True)
+        attributes = leave[list(keep_cols)].iloc[positions[person_first[span_person]]].reset_index(drop=True)
+        out = pd.concat([out, attributes], axis=1)
+    out[start_col] = pd.to_datetime(seg_start[first].astype("datetime64[D]"))
+    out[end_col] = pd.to_datetime((seg_end[span_last] - 1).astype("datetime64[D]"))
+    out[category_col] = np.asarray(order, dtype=object)[winner[first]]
+    for j, col in enumerate(quantity_cols):
+        out[col] = np.add.reduceat(amounts[:, j], first)
+    out["Span_Days"] = (seg_end[span_last] - seg_start[first]).astype(np.int64)
+    out["Max_Overlap"] = np.maximum.reduceat(total, first)
+    return out[columns]
+
+
+def prorate_leave_to_months(
+    spans: pd.DataFrame,
+    months: MonthsLike,
+    start_col: str = "Start date",
+    end_col: str = "Departure date",
+    quantity_cols: Sequence[str] = ("Used", "Scheduled"),
+    days_col: str = "Span_Days",
+    month_col: str = "Month",
+) -> pd.DataFrame:
+    """
+    Expand disjoint spans (``coalesce_leave``) into (span, month) rows whose
+    quantities are the share of the span's days that fall in that month.
+    """
+    out = expand_leave_to_months(spans, months, start_col, end_col, month_col, "Overlap_Days")
+    share = out["Overlap_Days"].to_numpy(dtype=np.float64) / out[days_col].to_numpy(dtype=np.float64)
+    for col in quantity_cols:
+        out[col] = out[col].to_numpy(dtype=np.float64) * share
+    return out
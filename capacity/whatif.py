@@ -0,0 +1,212 @@
+"""
+Memoized what-if capacity queries for any role set and horizon.
+
+Cell 5 hard-codes ``selected_roles`` and Cell 7 a fixed 4-month grid, so
+asking about another role mix or a 6-month window meant re-running the
+notebook. ``CapacityQuery`` answers those questions from a cube built once
+for every user (the ``capacity_cube`` pipeline stage, which has no role
+parameter): a role set is a person mask, a horizon is a month slice and a
+grouping is one sorted reduction, so a query takes milliseconds.
+
+Results are memoized in an LRU cache keyed on the normalized arguments:
+roles are matched case-insensitively, de-duplicated and sorted, ``start`` is
+resolved to its month and ``group_by`` / ``metrics`` become tuples, so
+``roles=['tech', 'Design']`` and ``roles=('Design', 'Tech')`` share one entry
+and a dashboard repeating its queries never recomputes them:
+
+    from capacity.stages import build_pipeline
+    from capacity.whatif import CapacityQuery
+
+    capacity = CapacityQuery.from_pipeline(build_pipeline('../data'))
+    capacity(roles=['Design', 'Tech'], start='2025-07', months=6, group_by='Org_Department')
+    capacity(months=4)                          # every role, firm totals, last 4 cube months
+    capacity.cache_info()
+
+Each result has one row per group and month with the ``people`` in the group
+and the cube metrics, plus ``free_hours`` (available - booked) and
+``utilization`` (booked / available). Without ``start`` the window is the
+cube's last ``months`` months. Months outside the cube are clipped, as in
+``CapacityCube.select``; a window that misses the cube entirely returns an
+empty frame and a ``UserWarning``.
+"""
+
+from __future__ import annotations
+
+import functools
+import warnings
+from typing import Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from capacity.cube import AXES, MISSING_LABEL, CapacityCube, MonthArg
+
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_MONTHS = 4
+DERIVED_METRICS = ("free_hours", "utilization")
+
+# Cube metrics each derived metric is computed from
+_DERIVED_INPUTS = {
+    "free_hours": ("booked_hours", "available_hours"),
+    "utilization": ("booked_hours", "available_hours"),
+}
+
+RolesArg = Union[None, str, Iterable[str]]
+GroupArg = Union[None, str, Sequence[str]]
+
+
+class CapacityQuery:
+    """
+    ``capacity(roles=..., start=..., months=..., group_by=..., metrics=...)``
+    over a role-independent ``CapacityCube``, memoized per normalized query.
+    """
+
+    def __init__(
+        self,
+        cube: CapacityCube,
+        maxsize: Optional[int] = DEFAULT_CACHE_SIZE,
+        default_months: int = DEFAULT_MONTHS,
+    ):
+        self.cube = cube
+        self.default_months = int(default_months)
+        self._roles = {str(role).strip().casefold(): role for role in cube.attributes["role"].cat.categories}
+        self._cached = functools.lru_cache(maxsize=maxsize)(self._compute)
+
+    @classmethod
+    def from_pipeline(cls, pipeline, **kwargs) -> "CapacityQuery":
+        """Query object over the pipeline's (cached) ``capacity_cube`` stage."""
+        return cls(pipeline.run("capacity_cube")["capacity_cube"], **kwargs)
+
+    def __repr__(self) -> str:
+        info = self.cache_info()
+        return f"CapacityQuery({self.cube!r}, cache {info.currsize}/{info.maxsize}, {info.hits} hits)"
+
+    def __call__(
+        self,
+        roles: RolesArg = None,
+        start: MonthArg = None,
+        months: Optional[int] = None,
+        group_by: GroupArg = None,
+        metrics: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Group x month capacity for people in ``roles`` (every role for
+        ``None``) over ``months`` months from ``start`` (default: the cube's
+        last ``months`` months). ``group_by`` is ``None`` for firm totals or
+        any of ``AXES``.
+        """
+        return self._cached(*self.normalize(roles, start, months, group_by, metrics)).copy()
+
+    # ------------------------------------------------------------------ cache
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    def cache_clear(self) -> None:
+        self._cached.cache_clear()
+
+    def normalize(
+        self,
+        roles: RolesArg = None,
+        start: MonthArg = None,
+        months: Optional[int] = None,
+        group_by: GroupArg = None,
+        metrics: Optional[Sequence[str]] = None,
+    ) -> Tuple:
+        """The cache key: canonical roles, month start, month count, group axes and metrics."""
+        if roles is not None:
+            wanted = [roles] if isinstance(roles, str) else list(roles)
+            unknown = [r for r in wanted if str(r).strip().casefold() not in self._roles]
+            if unknown:
+                raise KeyError(f"Unknown roles {unknown}; expected some of {sorted(self._roles.values())}")
+            roles = tuple(sorted({self._roles[str(r).strip().casefold()] for r in wanted}))
+
+        months = self.default_months if months is None else int(months)
+        if months < 1:
+            raise ValueError(f"months must be at least 1, got {months}")
+
+        if start is None:
+            # The cube's last ``months`` months, as in CapacityCube.rolling
+            cube_months = self.cube.months
+            start = cube_months[max(len(cube_months) - months, 0)] if len(cube_months) else pd.Timestamp.now()
+        start = pd.Timestamp(start).to_period("M").to_timestamp()
+
+        axes = () if group_by is None else ((group_by,) if isinstance(group_by, str) else tuple(group_by))
+        unknown = [a for a in axes if a not in AXES]
+        if unknown:
+            raise KeyError(f"Unknown group_by {unknown}; expected any of {list(AXES)}")
+        axes = tuple(dict.fromkeys(axes))
+
+        available = tuple(self.cube.metrics) + tuple(
+            m for m in DERIVED_METRICS if all(k in self.cube.metrics for k in _DERIVED_INPUTS[m])
+        )
+        metrics = available if metrics is None else ((metrics,) if isinstance(metrics, str) else tuple(metrics))
+        unknown = [m for m in metrics if m not in available]
+        if unknown:
+            raise KeyError(f"Unknown metrics {unknown}; expected any of {list(available)}")
+        return roles, start, months, axes, tuple(dict.fromkeys(metrics))
+
+    # ---------------------------------------------------------------- compute
+
+    def _group_codes(self, axes: Tuple[str, ...], people: np.ndarray) -> Tuple[np.ndarray, pd.DataFrame]:
+        """Dense group number per selected person and the label columns of each group."""
+        if not axes:
+            return np.zeros(len(people), dtype=np.int64), pd.DataFrame(index=range(1 if len(people) else 0))
+        codes, labels = [], []
+        for axis in axes:
+            cat = self.cube.attributes[axis].cat
+            values = list(cat.categories) + [MISSING_LABEL]
+            code = cat.codes.to_numpy().astype(np.int64)[people]
+            codes.append(np.where(code < 0, len(values) - 1, code))
+            labels.append(np.asarray(values, dtype=object))
+        combined = np.ravel_multi_index(codes, [len(v) for v in labels]) if len(people) else np.empty(0, np.int64)
+        present, group = np.unique(combined, return_inverse=True)
+        parts = np.unravel_index(present, [len(v) for v in labels])
+        return group.astype(np.int64), pd.DataFrame({axis: labels[i][parts[i]] for i, axis in enumerate(axes)})
+
+    def _compute(
+        self,
+        roles: Optional[Tuple[str, ...]],
+        start: pd.Timestamp,
+        months: int,
+        axes: Tuple[str, ...],
+        metrics: Tuple[str, ...],
+    ) -> pd.DataFrame:
+        cube = self.cube
+        cols = cube.month_slice(start, months)
+        if len(cube.months) and cols.start >= cols.stop:
+            # Only on a cache miss; the caller of __call__ is three frames up
+            warnings.warn(
+                f"{months} months from {start:%Y-%m} miss the cube "
+                f"({cube.months[0]:%Y-%m} to {cube.months[-1]:%Y-%m}); the result is empty",
+                stacklevel=3,
+            )
+        month_index = cube.months[cols]
+        mask = np.ones(len(cube.person_ids), dtype=bool) if roles is None else cube.attributes["role"].isin(roles).to_numpy()
+        people = np.flatnonzero(mask)
+        group, labels = self._group_codes(axes, people)
+        groups = len(labels)
+
+        # Sorted by group so every metric is one add.reduceat over (people, months)
+        order = np.argsort(group, kind="stable")
+        people, group = people[order], group[order]
+        bounds = np.flatnonzero(np.r_[True, group[1:] != group[:-1]]) if len(group) else np.empty(0, np.int64)
+
+        needed = [m for m in cube.metrics if m in metrics or any(m in _DERIVED_INPUTS.get(d, ()) for d in metrics)]
+        sums = {}
+        for metric in needed:
+            block = cube.values[people, cols, cube.metric_index(metric)].astype(np.float64)
+            sums[metric] = np.add.reduceat(block, bounds, axis=0) if len(bounds) else np.zeros((0, len(month_index)))
+        if "free_hours" in metrics:
+            sums["free_hours"] = sums["available_hours"] - sums["booked_hours"]
+        if "utilization" in metrics:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sums["utilization"] = np.where(sums["available_hours"] > 0, sums["booked_hours"] / sums["available_hours"], np.nan)
+
+        out = labels.loc[labels.index.repeat(len(month_index))].reset_index(drop=True)
+        out["Month"] = np.tile(month_index.values, groups)
+        out["people"] = np.repeat(np.bincount(group, minlength=groups), len(month_index))
+        for metric in metrics:
+            out[metric] = sums[metric].reshape(-1)
+        return out
@@ -0,0 +1,277 @@
+"""
+Business-day capacity calendar built from the regional Working Hours files.
+
+``Working Hours For US.csv`` and ``UAE Working Hours.csv`` give one row per
+month with ``Net Working Hours`` and a few ``Holiday #N`` dates. Here every
+region is expanded once into per-day arrays:
+
+  - ``busday``: numpy business-day mask (weekmask minus holidays and closures)
+  - ``hours``:  working hours on that day, reconciled so each month sums to
+                the file's ``Net Working Hours`` exactly
+
+plus cumulative sums, so the available hours or working days for any
+person x date range is two array lookups, vectorized over as many ranges as
+needed:
+
+    cal = CapacityCalendar.from_data_dir('../data')
+    cal.available_hours(['US', 'UAE'], ['2025-07-01', '2025-07-15'], ['2025-07-31', '2025-08-14'])
+
+Regions are discovered from file names (``Working Hours For <REGION>.csv`` or
+``<REGION> Working Hours.csv``), so a new region only needs a new file.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+HOURS_PER_DAY = 9.0
+DEFAULT_WEEKMASK = "1111100"
+# Per-region overrides, e.g. a Sunday-Thursday week: {"KSA": "1111001"}
+REGION_WEEKMASKS: Dict[str, str] = {}
+
+REGION_FILE_PATTERNS = (
+    re.compile(r"^Working Hours For (?P<region>.+)\.csv$", re.IGNORECASE),
+    re.compile(r"^(?P<region>.+) Working Hours\.csv$", re.IGNORECASE),
+)
+
+# Office location keywords -> region; anything unmatched is DEFAULT_REGION
+REGION_LOCATION_KEYWORDS: Dict[str, tuple] = {
+    "UAE": ("abu dhabi", "uae", "dubai"),
+}
+DEFAULT_REGION = "US"
+
+
+def discover_region_files(data_dir: str) -> Dict[str, str]:
+    """Map region code -> Working Hours CSV path for every matching file in ``data_dir``."""
+    found: Dict[str, str] = {}
+    for fname in sorted(os.listdir(data_dir)):
+        for pattern in REGION_FILE_PATTERNS:
+            m = pattern.match(fname)
+            if m:
+                found[m.group("region").strip().upper()] = os.path.join(data_dir, fname)
+                break
+    return found
+
+
+def region_for_location(locations: Iterable) -> pd.Series:
+    """Office location ('Abu Dhabi | Flex', 'NY Perm', 'UAE', ...) -> region code."""
+    text = pd.Series(locations, dtype="object").astype("string").str.lower().fillna("")
+    out = pd.Series(DEFAULT_REGION, index=text.index, dtype="object")
+    for region, keywords in REGION_LOCATION_KEYWORDS.items():
+        hit = np.zeros(len(text), dtype=bool)
+        for kw in keywords:
+            hit |= text.str.contains(kw, regex=False).to_numpy()
+        out[hit] = region
+    return out
+
+
+def _to_days(values) -> np.ndarray:
+    return pd.to_datetime(pd.Series(values), errors="coerce").to_numpy().astype("datetime64[D]")
+
+
+def _day_offset(day: np.datetime64, first: np.datetime64) -> int:
+    return int((np.datetime64(day, "D") - np.datetime64(first, "D")).astype(np.int64))
+
+
+def _closure_start(value, month_start: np.datetime64, month_end: np.datetime64) -> Optional[np.datetime64]:
+    """Parse 'First Closure Day' (MM-DD-YYYY, ISO, or a bare day of month)."""
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        day = np.datetime64(pd.Timestamp(value).date())
+    else:
+        text = str(value).strip()
+        if re.fullmatch(r"\d{1,2}(\.0)?", text):
+            day = month_start + (int(float(text)) - 1)
+        else:
+            parsed = pd.to_datetime(text, errors="coerce", format="mixed")
+            if pd.isna(parsed):
+                return None
+            day = np.datetime64(parsed.date())
+    return day if month_start <= day <= month_end else None
+
+
+@dataclass
+class RegionCalendar:
+    region: str
+    first_day: np.datetime64
+    busday: np.ndarray
+    hours: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.cum_hours = np.concatenate([[0.0], np.cumsum(self.hours, dtype=np.float64)])
+        self.cum_days = np.concatenate([[0], np.cumsum(self.busday, dtype=np.int64)])
+
+    @property
+    def last_day(self) -> np.datetime64:
+        return self.first_day + (len(self.hours) - 1)
+
+    @classmethod
+    def from_monthly(
+        cls,
+        region: str,
+        monthly: pd.DataFrame,
+        weekmask: str = DEFAULT_WEEKMASK,
+        hours_per_day: float = HOURS_PER_DAY,
+    ) -> "RegionCalendar":
+        """Expand a Working Hours frame (one row per month) into daily arrays."""
+        # "Month" is authoritative: some rows carry a stale Start/End Date
+        # copied from the previous year
+        if "Month" in monthly.columns:
+            month = pd.to_datetime(monthly["Month"], errors="coerce")
+            start_col = month.dt.to_period("M").dt.start_time.fillna(pd.to_datetime(monthly["Start Date"], errors="coerce"))
+            end_col = month.dt.to_period("M").dt.end_time.dt.normalize().fillna(pd.to_datetime(monthly["End Date"], errors="coerce"))
+        else:
+            start_col, end_col = monthly["Start Date"], monthly["End Date"]
+        valid = (pd.to_datetime(start_col, errors="coerce").notna() & pd.to_datetime(end_col, errors="coerce").notna()).to_numpy()
+        monthly = monthly[valid]
+        starts = _to_days(start_col[valid])
+        ends = _to_days(end_col[valid])
+        order = np.argsort(starts)
+        first, last = starts.min(), ends.max()
+        n_days = _day_offset(last, first) + 1
+
+        holiday_cols = [c for c in monthly.columns if re.fullmatch(r"Holiday #\d+", str(c))]
+        holidays = np.unique(np.concatenate([_to_days(monthly[c]) for c in holiday_cols])) if holiday_cols else np.array([], dtype="datetime64[D]")
+        holidays = holidays[~np.isnat(holidays)]
+
+        days = first + np.arange(n_days)
+        busday = np.zeros(n_days, dtype=bool)
+        for i in order:
+            lo, hi = _day_offset(starts[i], first), _day_offset(ends[i], first) + 1
+            busday[lo:hi] = np.is_busday(days[lo:hi], weekmask=weekmask, holidays=holidays)
+        hours = np.zeros(n_days, dtype=np.float64)
+        net = pd.to_numeric(monthly["Net Working Hours"], errors="coerce").to_numpy()
+        closures = monthly["First Closure Day"].to_numpy() if "First Closure Day" in monthly.columns else [None] * len(monthly)
+
+        for i in order:
+            lo, hi = _day_offset(starts[i], first), _day_offset(ends[i], first) + 1
+            closure = _closure_start(closures[i], starts[i], ends[i])
+            if closure is not None:
+                busday[_day_offset(closure, first):hi] = False
+            if np.isnan(net[i]):
+                hours[lo:hi] = busday[lo:hi] * hours_per_day
+                continue
+            hours[lo:hi] = _reconcile_month(busday[lo:hi], float(net[i]), hours_per_day)
+            busday[lo:hi] = hours[lo:hi] > 0
+
+        return cls(region, first, busday, hours)
+
+    # ------------------------------------------------------------- queries
+
+    def _bounds(self, starts, ends):
+        s = _to_days(starts)
+        e = _to_days(ends)
+        e = np.where(np.isnat(e), s, e)
+        lo = np.clip((s - self.first_day).astype(np.int64), 0, len(self.hours))
+        hi = np.clip((e - self.first_day).astype(np.int64) + 1, 0, len(self.hours))
+        hi = np.maximum(hi, lo)
+        invalid = np.isnat(s)
+        return lo, hi, invalid
+
+    def hours_between(self, starts, ends) -> np.ndarray:
+        """Working hours in each inclusive [start, end] range (0 outside the calendar)."""
+        lo, hi, invalid = self._bounds(starts, ends)
+        out = self.cum_hours[hi] - self.cum_hours[lo]
+        out[invalid] = np.nan
+        return out
+
+    def days_between(self, starts, ends) -> np.ndarray:
+        """Working days in each inclusive [start, end] range."""
+        lo, hi, invalid = self._bounds(starts, ends)
+        out = (self.cum_days[hi] - self.cum_days[lo]).astype(np.float64)
+        out[invalid] = np.nan
+        return out
+
+    def daily(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "Region": self.region,
+            "Date": pd.to_datetime(self.first_day + np.arange(len(self.hours))),
+            "Is_Working_Day": self.busday,
+            "Working_Hours": self.hours,
+        })
+
+
+def _reconcile_month(busday: np.ndarray, net_hours: float, hours_per_day: float) -> np.ndarray:
+    """
+    Daily hours for one month that sum to ``net_hours``.
+
+    When the file's net hours cover fewer days than the business-day mask (an
+    unlisted year-end closure), the trailing working days are dropped, which
+    matches how the closures appear in the data. When they cover more, the
+    hours are spread evenly over the business days.
+    """
+    hours = np.zeros(len(busday), dtype=np.float64)
+    working = np.flatnonzero(busday)
+    if len(working) == 0 or net_hours <= 0:
+        return hours
+    full_days, remainder = divmod(net_hours, hours_per_day)
+    full_days = int(full_days)
+    if full_days + (remainder > 0) <= len(working):
+        hours[working[:full_days]] = hours_per_day
+        if remainder > 0:
+            hours[working[full_days]] = remainder
+    else:
+        hours[working] = net_hours / len(working)
+    return hours
+
+
+class CapacityCalendar:
+    """Per-region ``RegionCalendar`` objects with vectorized mixed-region queries."""
+
+    def __init__(self, regions: Dict[str, RegionCalendar]):
+        self.regions = regions
+
+    @classmethod
+    def from_data_dir(cls, data_dir: str, hours_per_day: float = HOURS_PER_DAY) -> "CapacityCalendar":
+        regions = {}
+        for region, path in discover_region_files(data_dir).items():
+            regions[region] = RegionCalendar.from_monthly(
+                region,
+                pd.read_csv(path),
+                weekmask=REGION_WEEKMASKS.get(region, DEFAULT_WEEKMASK),
+                hours_per_day=hours_per_day,
+            )
+        if not regions:
+            raise FileNotFoundError(f"No Working Hours files found in {data_dir}")
+        return cls(regions)
+
+    def __getitem__(self, region: str) -> RegionCalendar:
+        return self.regions[region.upper()]
+
+    def _by_region(self, method: str, regions, starts, ends) -> np.ndarray:
+        regions = pd.Series(regions, dtype="object").astype("string").str.upper().to_numpy(dtype=object, na_value=None)
+        starts = np.asarray(pd.to_datetime(pd.Series(starts), errors="coerce"))
+        ends = np.asarray(pd.to_datetime(pd.Series(ends), errors="coerce"))
+        out = np.full(len(regions), np.nan)
+        for region in pd.unique(regions):
+            if region not in self.regions:
+                continue
+            rows = regions == region
+            out[rows] = getattr(self.regions[region], method)(starts[rows], ends[rows])
+        return out
+
+    def available_hours(self, regions, starts, ends) -> np.ndarray:
+        """Working hours per row for the row's region and inclusive date range (NaN for unknown regions)."""
+        return self._by_region("hours_between", regions, starts, ends)
+
+    def working_days(self, regions, starts, ends) -> np.ndarray:
+        return self._by_region("days_between", regions, starts, ends)
+
+    def monthly_hours(self, regions: Optional[List[str]] = None) -> pd.DataFrame:
+        """Net working hours per region and month, recomputed from the daily arrays."""
+        frames = []
+        for region in regions or list(self.regions):
+            daily = self[region].daily()
+            frames.append(daily.groupby([daily["Date"].dt.to_period("M").dt.to_timestamp()]).agg(
+                Working_Days=("Is_Working_Day", "sum"),
+                Net_Working_Hours=("Working_Hours", "sum"),
+            ).reset_index().rename(columns={"Date": "Month"}).assign(Region=region))
+        return pd.concat(frames, ignore_index=True)[["Region", "Month", "Working_Days", "Net_Working_Hours"]]
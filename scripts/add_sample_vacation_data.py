@@ -1,154 +1,374 @@
 #!/usr/bin/env python3
 """
-Add sample vacation data for July-October 2025 to the Namely Vacation dataset.
-This script adds realistic vacation records for existing leadership users.
+Append synthetic leave records for leadership users to the Namely Vacation dataset.
+
+Records are drawn with a seeded numpy generator in a handful of array
+operations, so millions of rows take seconds:
+
+  - --fraction of the users in --roles are sampled, each gets a random number
+    of records in --records MIN,MAX
+  - every record falls in a random month of --start..--end, starts on a
+    weekday (days 1-20 of the month, rolled forward past weekends) and spans
+    ``Used`` business days for its leave type (``Departure date`` is the last
+    one; single-day leave has none, like the Namely export)
+
+The batch is appended to the CSV under --batch-id (``_BATCH_ID_``) instead of
+rewriting the file. Re-running with the same batch id replaces only that
+batch: if it is still the tail of the file (tracked with its byte offset and
+hash in .cache/sample_leave_batches.json) the file is truncated there and the
+new rows appended; otherwise the CSV is streamed once without that batch's
+rows, every other record copied through byte for byte. Other batches,
+including the real export, are never touched.
+
+Usage examples:
+  python scripts/add_sample_vacation_data.py
+  python scripts/add_sample_vacation_data.py --start 2025-07 --end 2025-10 --fraction 0.3
+  python scripts/add_sample_vacation_data.py --start 2020-01 --end 2025-12 --records 2000,2000 --batch-id 100
+  python scripts/add_sample_vacation_data.py --batch-id 100 --remove
 """
 
-import pandas as pd
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
 import numpy as np
-from datetime import datetime, timedelta
-import random
-
-def main():
-    print("🏖️ Adding Sample Vacation Data for July-October 2025")
-    print("="*60)
-    
-    # Load the original vacation data
-    vacation_file = 'data/Namely Vacation and Leave Dataset.csv'
-    df_vacation = pd.read_csv(vacation_file)
-    original_count = len(df_vacation)
-    print(f"✅ Loaded original vacation data: {original_count:,} records")
-    
-    # Load the users data to get leadership names
-    df_users = pd.read_csv('data/10k Users.csv')
-    selected_roles = ['Design', 'Principal', 'Program Management', 'Strategy', 'Studio', 'Tech']
-    df_leadership = df_users[df_users['role'].isin(selected_roles)]
-    
-    # Get leadership users
-    leadership_users = []
-    for _, user in df_leadership.iterrows():
-        # Get individual values to avoid Series boolean issues
-        emp_num = user.get('employee_number', None)
-        location = user.get('location', 'Remote')
-        discipline = user.get('discipline', 'Leadership')
-        
-        leadership_users.append({
-            'Full Name': f"{user['first_name']} {user['last_name']}",
-            'First Name': user['first_name'],
-            'Last Name': user['last_name'],
-            'Employee Number': emp_num if pd.notna(emp_num) else f"EMP-{str(user['id']).zfill(6)}",
-            'Employee Type': 'Staff Full Time',
-            'Office Location': location if pd.notna(location) else 'Remote',
-            'Job Title': user['role'],
-            'Departments': discipline if pd.notna(discipline) else 'Leadership'
-        })
-    
-    print(f"✅ Found {len(leadership_users)} leadership users")
-    
-    # Define vacation types and their typical durations
-    vacation_types = [
-        ('Vacation', 5, 10),  # Type, min days, max days
-        ('Work From Anywhere', 3, 5),
-        ('Sick', 1, 3),
-        ('UAE Vacation', 7, 14),
-        ('Family Caregiver Leave', 2, 5),
-        ('Bereavement', 3, 3),
-    ]
-    
-    # Create sample records for July-October 2025
-    new_records = []
-    months = [
-        (datetime(2025, 7, 1), 'July'),
-        (datetime(2025, 8, 1), 'August'),
-        (datetime(2025, 9, 1), 'September'),
-        (datetime(2025, 10, 1), 'October')
-    ]
-    
-    # Sample 30% of leadership users for vacation records
-    sample_size = max(20, int(len(leadership_users) * 0.3))
-    sampled_users = random.sample(leadership_users, min(sample_size, len(leadership_users)))
-    
-    print(f"\n📊 Creating vacation records for {len(sampled_users)} users")
-    
-    for user in sampled_users:
-        # Each user gets 1-3 vacation records across the 4 months
-        num_vacations = random.randint(1, 3)
-        
-        for _ in range(num_vacations):
-            # Pick a random month
-            month_start, month_name = random.choice(months)
-            
-            # Pick a random vacation type
-            vac_type, min_days, max_days = random.choice(vacation_types)
-            days = random.randint(min_days, max_days)
-            
-            # Random start day within the month (avoiding weekends for start)
-            start_day = random.randint(1, 20)
-            start_date = month_start.replace(day=start_day)
-            
-            # Skip weekends for start date
-            while start_date.weekday() >= 5:  # 5=Saturday, 6=Sunday
-                start_date += timedelta(days=1)
-            
-            # Calculate end date
-            end_date = start_date + timedelta(days=days-1)
-            
-            # Create the record matching the original format
-            record = {
-                'User status': 'Active Employee',
-                'Scheduled From Accrued': 0.0,
-                'Employee Type': user['Employee Type'],
-                'Used': float(days),
-                'Departments': user['Departments'],
-                'Type': vac_type,
-                'Employee Number': user['Employee Number'],
-                'Departure date': end_date.strftime('%Y-%m-%d') if days > 1 else np.nan,
-                'Full Name': user['Full Name'],
-                'Start date': start_date.strftime('%Y-%m-%d'),
-                'Office Location': user['Office Location'],
-                'Job Title': user['Job Title'],
-                'Accrual Year': 2025,
-                'Units': 'days',
-                'Scheduled': 0.0,
-                'First Name': user['First Name'],
-                'Last Name': user['Last Name'],
-                '_BATCH_ID_': 99.0,  # New batch ID for sample data
-                '_BATCH_LAST_RUN_': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            new_records.append(record)
-    
-    # Convert new records to DataFrame
-    df_new = pd.DataFrame(new_records)
-    print(f"\n✅ Created {len(df_new)} new vacation records")
-    
-    # Show sample of new records
+import pandas as pd
+
+
+def resolve_project_root() -> str:
+    current_file = os.path.abspath(__file__)
+    project_root = os.path.dirname(os.path.dirname(current_file))
+    return project_root
+
+
+sys.path.insert(0, resolve_project_root())
+
+from capacity.sources import SOURCE_FILES  # noqa: E402
+from capacity.stages import DEFAULT_SELECTED_ROLES  # noqa: E402
+
+
+# Leave type, minimum and maximum business days
+VACATION_TYPES: Tuple[Tuple[str, int, int], ...] = (
+    ("Vacation", 5, 10),
+    ("Work From Anywhere", 3, 5),
+    ("Sick", 1, 3),
+    ("UAE Vacation", 7, 14),
+    ("Family Caregiver Leave", 2, 5),
+    ("Bereavement", 3, 3),
+)
+
+VACATION_COLUMNS = [
+    "User status", "Scheduled From Accrued", "Employee Type", "Used", "Departments", "Type",
+    "Employee Number", "Departure date", "Full Name", "Start date", "Office Location", "Job Title",
+    "Accrual Year", "Units", "Scheduled", "First Name", "Last Name", "_BATCH_ID_", "_BATCH_LAST_RUN_", "Month",
+]
+BATCH_COLUMN = "_BATCH_ID_"
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def leadership_users(users: pd.DataFrame, roles: Sequence[str]) -> pd.DataFrame:
+    """Name, employee number, office and title of every user in ``roles``, as leave-record columns."""
+    users = users[users["role"].isin(list(roles))]
+    first = users["first_name"].astype("string").fillna("")
+    last = users["last_name"].astype("string").fillna("")
+    fallback = "EMP-" + users["id"].astype("string").str.zfill(6)
+    return pd.DataFrame({
+        "Full Name": first + " " + last,
+        "First Name": first,
+        "Last Name": last,
+        "Employee Number": users["employee_number"].astype("string").fillna(fallback),
+        "Employee Type": "Staff Full Time",
+        "Office Location": users["location"].astype("string").fillna("Remote"),
+        "Job Title": users["role"].astype("string"),
+        "Departments": users["discipline"].astype("string").fillna("Leadership"),
+    }).reset_index(drop=True)
+
+
+def generate_leave(
+    people: pd.DataFrame,
+    start: str,
+    end: str,
+    fraction: float = 0.3,
+    records: Tuple[int, int] = (1, 3),
+    batch_id: float = 99.0,
+    seed: int = 42,
+    run_at: Optional[str] = None,
+) -> pd.DataFrame:
+    """Leave records for a random ``fraction`` of ``people`` in the months ``start``..``end``."""
+    rng = np.random.default_rng(seed)
+    months = pd.period_range(pd.Period(start, "M"), pd.Period(end, "M"), freq="M")
+    if len(months) == 0 or people.empty:
+        return pd.DataFrame(columns=VACATION_COLUMNS)
+    month_starts = months.to_timestamp().to_numpy().astype("datetime64[D]")
+
+    sampled = rng.choice(len(people), size=max(1, min(len(people), int(round(len(people) * fraction)))), replace=False)
+    counts = rng.integers(records[0], records[1] + 1, len(sampled))
+    who = np.repeat(np.sort(sampled), counts)
+    n = len(who)
+
+    kind = rng.integers(0, len(VACATION_TYPES), n)
+    lo = np.array([t[1] for t in VACATION_TYPES])[kind]
+    hi = np.array([t[2] for t in VACATION_TYPES])[kind]
+    days = rng.integers(lo, hi + 1)
+    first_day = month_starts[rng.integers(0, len(months), n)] + rng.integers(0, 20, n).astype("timedelta64[D]")
+    start_day = np.busday_offset(first_day, 0, roll="forward")
+    last_day = np.busday_offset(start_day, days - 1, roll="forward")
+
+    departure = np.datetime_as_string(last_day, unit="D").astype(object)
+    departure[days == 1] = None
+    out = people.iloc[who].reset_index(drop=True)
+    out = out.assign(**{
+        "User status": "Active Employee",
+        "Scheduled From Accrued": 0.0,
+        "Used": days.astype(float),
+        "Type": np.array([t[0] for t in VACATION_TYPES], dtype=object)[kind],
+        "Departure date": departure,
+        "Start date": np.datetime_as_string(start_day, unit="D"),
+        "Accrual Year": start_day.astype("datetime64[Y]").astype(int) + 1970,
+        "Units": "days",
+        "Scheduled": 0.0,
+        BATCH_COLUMN: float(batch_id),
+        "_BATCH_LAST_RUN_": run_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Month": np.datetime_as_string(start_day.astype("datetime64[M]"), unit="M"),
+    })
+    return out[VACATION_COLUMNS]
+
+
+# ------------------------------------------------------------ append / replace
+
+def _batch_key(csv_path: str, batch_id: float) -> str:
+    return f"{os.path.abspath(csv_path)}::{float(batch_id):g}"
+
+
+def _read_batches(manifest_path: str) -> dict:
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_batches(manifest_path: str, batches: dict) -> None:
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp = f"{manifest_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(batches, f, indent=2, sort_keys=True)
+    os.replace(tmp, manifest_path)
+
+
+def _block_digest(path: str, offset: int, length: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(HASH_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _is_tail_batch(csv_path: str, entry: Optional[dict]) -> bool:
+    """True if ``entry`` (offset, length, sha256) is still exactly the end of ``csv_path``."""
+    if not entry or os.path.getsize(csv_path) != entry["offset"] + entry["length"]:
+        return False
+    return _block_digest(csv_path, entry["offset"], entry["length"]) == entry["sha256"]
+
+
+def _same_batch(value: str, batch_id: float) -> bool:
+    try:
+        return float(value) == float(batch_id)
+    except ValueError:
+        return False
+
+
+def _raw_records(f):
+    """Raw bytes of each CSV record, line ending included; a quoted field may span physical lines."""
+    record = b""
+    for line in f:
+        record += line
+        # An odd number of quotes so far means a quoted field is still open
+        if record.count(b'"') % 2 == 0:
+            yield record
+            record = b""
+    if record:
+        yield record
+
+
+def _field(record: bytes, col: int) -> Optional[str]:
+    """Field ``col`` of one raw record (``None`` if the row is shorter)."""
+    if b'"' not in record:
+        fields = record.rstrip(b"\r\n").split(b",")
+        return fields[col].decode("utf-8") if col < len(fields) else None
+    row = next(csv.reader([record.decode("utf-8")]), [])
+    return row[col] if col < len(row) else None
+
+
+def drop_batch_rows(csv_path: str, batch_id: float) -> int:
+    """
+    Stream ``csv_path`` once without the rows of ``batch_id``; returns how many were dropped.
+
+    Every other record is copied through byte for byte (quoting, line endings
+    and encoding as exported); only its ``_BATCH_ID_`` field is parsed.
+    """
+    dropped = 0
+    directory = os.path.dirname(os.path.abspath(csv_path))
+    with open(csv_path, "rb") as src:
+        records = _raw_records(src)
+        header = next(records, None)
+        columns = next(csv.reader([header.decode("utf-8-sig")]), []) if header is not None else []
+        if BATCH_COLUMN not in columns:
+            return 0
+        col = columns.index(BATCH_COLUMN)
+        fd, tmp = tempfile.mkstemp(suffix=".csv", dir=directory)
+        with os.fdopen(fd, "wb") as dst:
+            dst.write(header)
+            for record in records:
+                value = _field(record, col)
+                if value is not None and _same_batch(value, batch_id):
+                    dropped += 1
+                    continue
+                dst.write(record)
+    if dropped:
+        os.replace(tmp, csv_path)
+    else:
+        os.remove(tmp)
+    return dropped
+
+
+def remove_batch(csv_path: str, batch_id: float, manifest_path: str) -> Tuple[int, str]:
+    """Take ``batch_id`` out of ``csv_path``: truncate if it is the tail, otherwise rewrite once."""
+    batches = _read_batches(manifest_path)
+    key = _batch_key(csv_path, batch_id)
+    entry = batches.pop(key, None)
+    if _is_tail_batch(csv_path, entry):
+        with open(csv_path, "r+b") as f:
+            f.truncate(entry["offset"])
+        _write_batches(manifest_path, batches)
+        return entry["rows"], "truncated"
+
+    present = False
+    for chunk in pd.read_csv(csv_path, usecols=[BATCH_COLUMN], chunksize=1_000_000):
+        if (pd.to_numeric(chunk[BATCH_COLUMN], errors="coerce") == float(batch_id)).any():
+            present = True
+            break
+    if not present:
+        _write_batches(manifest_path, batches)
+        return 0, "absent"
+    dropped = drop_batch_rows(csv_path, batch_id)
+    # Offsets of batches recorded after the rewrite point are no longer valid
+    batches = {k: v for k, v in batches.items() if not k.startswith(f"{os.path.abspath(csv_path)}::")}
+    _write_batches(manifest_path, batches)
+    return dropped, "rewritten"
+
+
+def append_batch(csv_path: str, records: pd.DataFrame, batch_id: float, manifest_path: str) -> int:
+    """Append ``records`` in the file's own column order and remember where the batch starts."""
+    if os.path.exists(csv_path):
+        columns = list(pd.read_csv(csv_path, nrows=0).columns)
+        with open(csv_path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        write_header = False
+    else:
+        columns = VACATION_COLUMNS
+        write_header = True
+
+    offset = os.path.getsize(csv_path) if os.path.exists(csv_path) else 0
+    records.reindex(columns=columns).to_csv(csv_path, mode="a", header=write_header, index=False)
+    length = os.path.getsize(csv_path) - offset
+
+    batches = _read_batches(manifest_path)
+    batches[_batch_key(csv_path, batch_id)] = {
+        "offset": offset,
+        "length": length,
+        "rows": len(records),
+        "sha256": _block_digest(csv_path, offset, length),
+        "appended": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    _write_batches(manifest_path, batches)
+    return length
+
+
+def main(argv: Optional[list] = None) -> int:
+    root = resolve_project_root()
+    parser = argparse.ArgumentParser(description="Append a seeded batch of synthetic leave records")
+    parser.add_argument("--data-dir", default=os.path.join(root, "data"), help="Directory with the CSV sources")
+    parser.add_argument("--start", default="2025-07", help="First month (YYYY-MM)")
+    parser.add_argument("--end", default="2025-10", help="Last month (YYYY-MM)")
+    parser.add_argument("--fraction", type=float, default=0.3, help="Share of leadership users that get records")
+    parser.add_argument("--records", default="1,3", help="MIN,MAX records per sampled user")
+    parser.add_argument("--roles", default=",".join(DEFAULT_SELECTED_ROLES), help="Comma-separated user roles")
+    parser.add_argument("--batch-id", type=float, default=99.0, help="_BATCH_ID_ of the batch (re-runs replace it)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--remove", action="store_true", help="Only remove the batch")
+    parser.add_argument("--dry-run", action="store_true", help="Generate and summarize without writing")
+    args = parser.parse_args(argv)
+
+    vacation_file = os.path.join(args.data_dir, SOURCE_FILES["vacation"])
+    manifest_path = os.path.join(os.path.dirname(os.path.abspath(args.data_dir)), ".cache", "sample_leave_batches.json")
+    try:
+        lo, hi = (int(x) for x in args.records.split(","))
+    except ValueError:
+        print(f"Error: --records expects MIN,MAX, got '{args.records}'", file=sys.stderr)
+        return 2
+    if not 0 < args.fraction <= 1 or lo < 0 or hi < lo:
+        print("Error: --fraction must be in (0, 1] and --records MIN,MAX with 0 <= MIN <= MAX", file=sys.stderr)
+        return 2
+
+    print(f"🏖️ Sample leave batch {args.batch_id:g} for {args.start}..{args.end}")
+    print("=" * 60)
+
+    if args.remove:
+        removed, how = remove_batch(vacation_file, args.batch_id, manifest_path)
+        print(f"🗑️  Removed {removed:,} rows of batch {args.batch_id:g} ({how})")
+        return 0
+
+    users = pd.read_csv(os.path.join(args.data_dir, SOURCE_FILES["users"]))
+    people = leadership_users(users, [r.strip() for r in args.roles.split(",") if r.strip()])
+    print(f"✅ Found {len(people):,} leadership users")
+
+    t0 = time.perf_counter()
+    records = generate_leave(
+        people, args.start, args.end, fraction=args.fraction, records=(lo, hi), batch_id=args.batch_id, seed=args.seed,
+    )
+    seconds = time.perf_counter() - t0
+    print(f"✅ Generated {len(records):,} records in {seconds:.2f}s")
+    if records.empty:
+        print("⚠️  Nothing to write")
+        return 0
+
     print("\n📊 Sample of new vacation records:")
-    sample_display = df_new[['Full Name', 'Type', 'Start date', 'Used', 'Job Title']].head(10)
-    print(sample_display.to_string(index=False))
-    
-    # Show distribution by month
-    df_new['Month'] = pd.to_datetime(df_new['Start date']).dt.strftime('%Y-%m')
+    print(records[["Full Name", "Type", "Start date", "Used", "Job Title"]].head(10).to_string(index=False))
     print("\n📅 New records by month:")
-    print(df_new['Month'].value_counts().sort_index())
-    
-    # Combine with original data
-    df_combined = pd.concat([df_vacation, df_new], ignore_index=True)
-    
-    # Save the updated file
-    print(f"\n💾 Saving updated vacation data...")
-    df_combined.to_csv(vacation_file, index=False)
-    
-    print(f"\n✅ Success! Updated vacation data saved:")
-    print(f"   • Original records: {original_count:,}")
-    print(f"   • New records added: {len(df_new)}")
-    print(f"   • Total records: {len(df_combined):,}")
-    print(f"\n📍 File saved to: {vacation_file}")
-    
-    # Create a backup of the original
-    backup_file = vacation_file.replace('.csv', '_original_backup.csv')
-    df_vacation.to_csv(backup_file, index=False)
-    print(f"📦 Backup of original data saved to: {backup_file}")
+    print(records["Month"].value_counts().sort_index().tail(24))
+
+    if args.dry_run:
+        print("\nDry run complete. No files written.")
+        return 0
+
+    if os.path.exists(vacation_file):
+        removed, how = remove_batch(vacation_file, args.batch_id, manifest_path)
+        if removed:
+            print(f"\n♻️  Replaced {removed:,} earlier rows of batch {args.batch_id:g} ({how})")
+    t0 = time.perf_counter()
+    written = append_batch(vacation_file, records, args.batch_id, manifest_path)
+    print(f"\n💾 Appended {len(records):,} rows ({written / 1024**2:.1f} MB) in {time.perf_counter() - t0:.2f}s")
+    print(f"📍 {vacation_file}")
+    return 0
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    raise SystemExit(main())
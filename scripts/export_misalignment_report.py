@@ -6,7 +6,26 @@ This script reads the query from SQL/misalignment_report_mysql57.sql, executes i
 against a MySQL database using credentials from environment variables, and writes
 the results to a timestamped CSV file.
 
-Environment variables:
+With --stream the rows are fetched from an unbuffered (server-side) cursor in
+--batch-size chunks and each chunk is appended to the output straight away, so
+memory stays flat however large the result is. --format picks CSV, gzip-compressed
+CSV or Parquet. --sqlite runs the query on a local SQLite database through the
+MySQL stand-in (capacity/sqlite_standin.py) instead, for testing without credentials.
+
+Exports are cached under .cache/sql_exports/ keyed by the SQL text and a
+fingerprint (row count + CHECKSUM TABLE) of every table the query reads; when
+none changed, the previous export is copied out without running the query.
+--refresh forces a re-run, --no-cache bypasses the cache entirely.
+
+--staged runs the <name>_staged variant of the SQL file, which materializes the
+shared keys and derived tables into indexed temporary tables before the final
+SELECT (same rows, fewer full scans). Multi-statement files work in both modes.
+
+Outputs are named <name>_<timestamp><ext> and cached under <name>, where <name>
+is the --sql file stem without any _staged suffix (--name overrides it), so
+exports of different queries never share a file name.
+
+Environment variables (see capacity/sql_connect.py):
   - DB_HOST: MySQL host (required)
   - DB_PORT: MySQL port (default: 3306)
   - DB_USER: MySQL username (required)
@@ -16,128 +35,212 @@ Environment variables:
 Usage examples:
   python scripts/export_misalignment_report.py
   python scripts/export_misalignment_report.py --outdir "CSV review" --sql SQL/misalignment_report_mysql57.sql
+  python scripts/export_misalignment_report.py --stream --format csv.gz --batch-size 20000
+  python scripts/export_misalignment_report.py --refresh
+  python scripts/export_misalignment_report.py --sql "Consulting Salary History for Modeling/Consultants_Salary_Data_projection.SQL" --staged --stream
+  python scripts/export_misalignment_report.py --stream --format parquet --sqlite local.db --attach dataflow_schema=org_units.db
 """
 
 import argparse
 import os
+import shutil
 import sys
+import time
 from datetime import datetime
 from typing import Optional
 
 import pandas as pd
 import mysql.connector
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def resolve_project_root() -> str:
-    current_file = os.path.abspath(__file__)
-    project_root = os.path.dirname(os.path.dirname(current_file))
-    return project_root
+from capacity.sql_cache import DEFAULT_MAX_AGE_DAYS, DEFAULT_MAX_BYTES, ExportCache  # noqa: E402
+from capacity.sql_export import (  # noqa: E402
+    DEFAULT_BATCH_SIZE,
+    FORMATS,
+    output_path,
+    result_statement,
+    run_statements,
+    split_statements,
+    sql_stem,
+    staged_variant,
+    stream_query,
+)
+from capacity.sql_connect import DB_ENV_EXAMPLE, PROJECT_ROOT, connect_sqlite, load_sql_file, mysql_settings_from_env  # noqa: E402
 
 
-def read_env(name: str, default: Optional[str] = None) -> Optional[str]:
-    value = os.environ.get(name, default)
-    return value
-
-
-def load_sql_file(sql_path: str) -> str:
-    with open(sql_path, "r", encoding="utf-8") as f:
-        sql_text = f.read()
-    # Trim trailing semicolons and whitespace; some drivers are picky
-    return sql_text.rstrip().rstrip(";")
+def report_path(outdir: str, name: str = "misalignment_report", fmt: str = "csv") -> str:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return output_path(outdir, name, fmt, timestamp)
 
 
-def connect_mysql(host: str, port: int, user: str, password: str, database: str) -> mysql.connector.MySQLConnection:
-    return mysql.connector.connect(
-        host=host,
-        port=port,
-        user=user,
-        password=password,
-        database=database,
-        connect_timeout=15,
-        use_pure=True,
-    )
+def export_to_csv(df: pd.DataFrame, outdir: str, name: str = "misalignment_report", fmt: str = "csv") -> str:
+    outfile = report_path(outdir, name, fmt)
+    if fmt == "parquet":
+        df.to_parquet(outfile, index=False)
+    else:
+        df.to_csv(outfile, index=False, compression="gzip" if fmt == "csv.gz" else None)
+    return outfile
 
 
-def export_to_csv(df: pd.DataFrame, outdir: str) -> str:
-    os.makedirs(outdir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    outfile = os.path.join(outdir, f"misalignment_report_{timestamp}.csv")
-    df.to_csv(outfile, index=False)
-    return outfile
+def print_progress(rows: int, seconds: float) -> None:
+    rate = rows / seconds if seconds > 0 else 0.0
+    print(f"   ... {rows:,} rows so far ({rate:,.0f} rows/s)", flush=True)
 
 
 def main(argv: Optional[list] = None) -> int:
     parser = argparse.ArgumentParser(description="Export misalignment report to dated CSV")
-    default_outdir = os.path.join(resolve_project_root(), "CSV review")
-    default_sql = os.path.join(resolve_project_root(), "SQL", "misalignment_report_mysql57.sql")
+    default_outdir = os.path.join(PROJECT_ROOT, "CSV review")
+    default_sql = os.path.join(PROJECT_ROOT, "SQL", "misalignment_report_mysql57.sql")
     parser.add_argument("--outdir", default=default_outdir, help="Output directory for CSV files")
     parser.add_argument("--sql", default=default_sql, help="Path to the SQL file to execute")
+    parser.add_argument("--name", default=None, help="Output file and cache name (default: the --sql file stem, without _staged)")
+    parser.add_argument("--stream", action="store_true", help="Fetch with an unbuffered cursor and write batch by batch")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv", help="Output format (default: csv)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per fetch when streaming")
+    parser.add_argument("--progress-every", type=int, default=10, help="Print progress every N batches when streaming (0 = off)")
+    parser.add_argument("--sqlite", default=None, help="Run on this SQLite database via the MySQL stand-in instead of MySQL")
+    parser.add_argument("--attach", action="append", default=[], help="NAME=PATH SQLite database attached as schema NAME (repeatable)")
+    parser.add_argument("--staged", action="store_true", help="Run the <name>_staged variant of --sql (indexed temporary tables, same rows)")
+    parser.add_argument("--cache-dir", default=os.path.join(PROJECT_ROOT, ".cache", "sql_exports"), help="Export cache directory")
+    parser.add_argument("--refresh", action="store_true", help="Re-run the query even if the source tables are unchanged")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor write the export cache")
+    parser.add_argument("--cache-max-gb", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 3, help="Evict least recently used exports beyond this size")
+    parser.add_argument("--cache-max-age-days", type=float, default=DEFAULT_MAX_AGE_DAYS, help="Evict exports older than this")
     args = parser.parse_args(argv)
 
-    # Database configuration from environment
-    host = read_env("DB_HOST")
-    user = read_env("DB_USER")
-    password = read_env("DB_PASSWORD")
-    database = read_env("DB_NAME")
-    port_str = read_env("DB_PORT", "3306")
-
-    missing = [name for name, val in {
-        "DB_HOST": host,
-        "DB_USER": user,
-        "DB_PASSWORD": password,
-        "DB_NAME": database,
-    }.items() if not val]
-
-    if missing:
-        print(f"Error: Missing required environment variables: {', '.join(missing)}", file=sys.stderr)
-        print("Set them and re-run. Example:", file=sys.stderr)
-        print("  export DB_HOST=localhost DB_PORT=3306 DB_USER=user DB_PASSWORD=pass DB_NAME=dbname", file=sys.stderr)
-        return 2
-
-    try:
-        port = int(port_str)
-    except ValueError:
-        print(f"Error: DB_PORT must be an integer, got '{port_str}'", file=sys.stderr)
+    if args.batch_size <= 0:
+        print(f"Error: --batch-size must be positive, got {args.batch_size}", file=sys.stderr)
         return 2
 
     # Load SQL
     sql_path = args.sql
     if not os.path.isabs(sql_path):
-        sql_path = os.path.join(resolve_project_root(), sql_path)
+        sql_path = os.path.join(PROJECT_ROOT, sql_path)
     if not os.path.exists(sql_path):
         print(f"Error: SQL file not found: {sql_path}", file=sys.stderr)
         return 2
+    if args.name is None:
+        args.name = sql_stem(sql_path)
+    if args.staged:
+        staged = staged_variant(sql_path)
+        if staged is None:
+            print(f"Error: No staged variant next to {sql_path} (expected <name>_staged<ext>)", file=sys.stderr)
+            return 2
+        sql_path = staged
     query = load_sql_file(sql_path)
 
+    if args.sqlite:
+        try:
+            conn = connect_sqlite(args.sqlite, args.attach)
+        except Exception as err:
+            print(f"Error: Failed to open SQLite database: {err}", file=sys.stderr)
+            return 1
+        return run_export(conn, query, args)
+
+    # Database configuration from environment
+    try:
+        settings = mysql_settings_from_env()
+    except ValueError as err:
+        print(f"Error: {err}", file=sys.stderr)
+        print("Set them and re-run. Example:", file=sys.stderr)
+        print(f"  {DB_ENV_EXAMPLE}", file=sys.stderr)
+        return 2
+
     # Execute and export
     try:
-        conn = connect_mysql(host=host, port=port, user=user, password=password, database=database)
+        conn = settings.connect()
     except mysql.connector.Error as err:
         print(f"Error: Failed to connect to MySQL: {err}", file=sys.stderr)
         return 1
+    return run_export(conn, query, args)
+
 
+def run_export(conn, query: str, args: argparse.Namespace) -> int:
+    """Cached, buffered (``pd.read_sql``) or streaming export; closes ``conn``."""
     try:
-        df = pd.read_sql(query, conn)
-    except Exception as err:
-        print(f"Error: Query execution failed: {err}", file=sys.stderr)
-        return 1
+        return export_with_cache(conn, query, args)
     finally:
         try:
             conn.close()
         except Exception:
             pass
 
+
+def export_with_cache(conn, query: str, args: argparse.Namespace) -> int:
+    cache = key = None
+    if not args.no_cache:
+        cache = ExportCache(args.cache_dir, max_bytes=int(args.cache_max_gb * 1024 ** 3), max_age_days=args.cache_max_age_days)
+        t0 = time.perf_counter()
+        try:
+            key = cache.key(conn, query, args.format)
+        except Exception as err:
+            print(f"Warning: Could not fingerprint source tables, skipping cache: {err}", file=sys.stderr)
+            cache = None
+        if cache is not None and not args.refresh:
+            hit = cache.lookup(key)
+            if hit is not None:
+                outfile = report_path(args.outdir, args.name, args.format)
+                shutil.copyfile(hit.path, outfile)
+                rows = f"{hit.rows:,} rows" if hit.rows is not None else "rows"
+                print(f"♻️  Source tables unchanged ({time.perf_counter() - t0:.1f}s to check); "
+                      f"reused {rows} exported {hit.age_seconds / 3600:.1f}h ago")
+                print(f"Wrote {rows} to {outfile} from cache")
+                return 0
+
+    exported = stream_export(conn, query, args) if args.stream else buffered_export(conn, query, args)
+    if exported is None:
+        return 1
+    if cache is not None:
+        outfile, rows = exported
+        try:
+            cache.store(key, outfile, rows=rows, name=args.name)
+        except OSError as err:
+            print(f"Warning: Could not cache export: {err}", file=sys.stderr)
+    return 0
+
+
+def stream_export(conn, query: str, args: argparse.Namespace):
+    outfile = report_path(args.outdir, args.name, args.format)
+    batches = [0]
+
+    def progress(rows: int, seconds: float) -> None:
+        batches[0] += 1
+        if args.progress_every > 0 and batches[0] % args.progress_every == 0:
+            print_progress(rows, seconds)
+
     try:
-        outfile = export_to_csv(df, args.outdir)
+        stats = stream_query(conn, query, outfile, fmt=args.format, batch_size=args.batch_size, progress=progress)
+    except Exception as err:
+        print(f"Error: Streaming export failed: {err}", file=sys.stderr)
+        return None
+    print(f"Wrote {stats.rows:,} rows to {stats.path} in {stats.seconds:.1f}s ({stats.rows_per_sec:,.0f} rows/s, {stats.batches:,} batches)")
+    return stats.path, stats.rows
+
+
+def buffered_export(conn, query: str, args: argparse.Namespace):
+    start = time.perf_counter()
+    statements = split_statements(query)
+    try:
+        result = result_statement(statements)
+        run_statements(conn, statements[:result])
+        df = pd.read_sql(statements[result], conn)
+        run_statements(conn, statements[result + 1:])
+    except Exception as err:
+        print(f"Error: Query execution failed: {err}", file=sys.stderr)
+        return None
+
+    try:
+        outfile = export_to_csv(df, args.outdir, args.name, args.format)
     except Exception as err:
         print(f"Error: Failed to write CSV: {err}", file=sys.stderr)
-        return 1
+        return None
 
-    print(f"Wrote {len(df):,} rows to {outfile}")
-    return 0
+    seconds = time.perf_counter() - start
+    rate = len(df) / seconds if seconds > 0 else 0.0
+    print(f"Wrote {len(df):,} rows to {outfile} in {seconds:.1f}s ({rate:,.0f} rows/s)")
+    return outfile, len(df)
 
 
 if __name__ == "__main__":
     raise SystemExit(main())
-
-
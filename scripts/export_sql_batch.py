@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Export several SQL files concurrently over a bounded connection pool.
+
+Each SQL file (paths or glob patterns) is streamed to its own dated file
+``<sql stem>_<timestamp><ext>`` in --outdir (``<sql stem>_2_...`` and so on
+when files in different directories share a stem), using the same unbuffered batch
+export as ``export_misalignment_report.py --stream``. Up to --workers queries
+run at once, each on a pooled connection, so the batch takes about as long as
+its slowest query instead of the sum of all of them. A summary with per-query
+latency and row counts is printed and written next to the exports. With
+--staged, files that have a ``<name>_staged`` variant (indexed temporary tables
+before the final SELECT) run that instead.
+
+Environment variables (MySQL, unless --sqlite is given): DB_HOST, DB_PORT,
+DB_USER, DB_PASSWORD and DB_NAME, as for export_misalignment_report.py
+(see capacity/sql_connect.py).
+
+Usage examples:
+  python scripts/export_sql_batch.py
+  python scripts/export_sql_batch.py "SQL/*.sql" --workers 2 --format csv.gz
+  python scripts/export_sql_batch.py SQL/misalignment_report_mysql57.sql SQL/comp_title_override_mysql57.sql \\
+      --sqlite local.db --attach dataflow_schema=org_units.db
+"""
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capacity.sql_connect import (  # noqa: E402
+    DB_ENV_EXAMPLE,
+    PROJECT_ROOT,
+    connect_sqlite,
+    load_sql_file,
+    mysql_settings_from_env,
+    parse_attach,
+)
+from capacity.sql_export import (  # noqa: E402
+    DEFAULT_BATCH_SIZE,
+    FORMATS,
+    ConnectionPool,
+    ExportJob,
+    export_many,
+    output_path,
+    staged_variant,
+)
+
+DEFAULT_SQL = [
+    os.path.join("SQL", "misalignment_report_mysql57.sql"),
+    os.path.join("SQL", "comp_title_override_mysql57.sql"),
+    os.path.join("Consulting Salary History for Modeling", "Consultants_Salary_Data_projection.SQL"),
+]
+
+
+def expand_sql_paths(patterns: List[str]) -> List[str]:
+    """Paths and globs (relative to the project root) -> existing files, in order, without duplicates."""
+    paths: List[str] = []
+    for pattern in patterns:
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(PROJECT_ROOT, pattern)
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            raise FileNotFoundError(f"No SQL files match: {pattern}")
+        for path in matches:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"SQL file not found: {path}")
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def job_names(sql_paths: List[str]) -> List[str]:
+    """One output name per SQL file: its stem, suffixed _2, _3, ... where stems clash (case-insensitively)."""
+    names: List[str] = []
+    taken = set()
+    for path in sql_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while name.lower() in taken:
+            n += 1
+            name = f"{stem}_{n}"
+        taken.add(name.lower())
+        names.append(name)
+    return names
+
+
+def connection_factory(args: argparse.Namespace):
+    """Opens one connection: the SQLite stand-in for --sqlite, else MySQL from DB_*; ``ValueError`` if unusable."""
+    if args.sqlite:
+        parse_attach(args.attach)
+        return lambda: connect_sqlite(args.sqlite, args.attach, check_same_thread=False)
+    return mysql_settings_from_env().connect
+
+
+def write_summary(results, outdir: str, timestamp: str) -> str:
+    path = os.path.join(outdir, f"export_summary_{timestamp}.csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["query", "sql_file", "output", "rows", "seconds", "rows_per_sec", "wait_seconds", "error"])
+        for r in results:
+            stats = r.stats
+            writer.writerow([
+                r.job.name,
+                os.path.relpath(r.job.sql_path, PROJECT_ROOT),
+                stats.path if stats else "",
+                stats.rows if stats else "",
+                f"{stats.seconds:.3f}" if stats else "",
+                f"{stats.rows_per_sec:.0f}" if stats else "",
+                f"{r.wait_seconds:.3f}",
+                r.error or "",
+            ])
+    return path
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export several SQL files concurrently over a connection pool")
+    parser.add_argument("sql", nargs="*", default=DEFAULT_SQL, help="SQL files or glob patterns (default: the three comp dataflows)")
+    parser.add_argument("--outdir", default=os.path.join(PROJECT_ROOT, "CSV review"), help="Output directory")
+    parser.add_argument("--workers", type=int, default=3, help="Pool size = queries running at once (default: 3)")
+    parser.add_argument("--format", choices=list(FORMATS), default="csv", help="Output format (default: csv)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per fetch")
+    parser.add_argument("--staged", action="store_true", help="Use each file's <name>_staged variant where one exists")
+    parser.add_argument("--sqlite", default=None, help="Run on this SQLite database via the MySQL stand-in instead of MySQL")
+    parser.add_argument("--attach", action="append", default=[], help="NAME=PATH SQLite database attached as schema NAME (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1 or args.batch_size < 1:
+        print("Error: --workers and --batch-size must be positive", file=sys.stderr)
+        return 2
+    try:
+        sql_paths = expand_sql_paths(args.sql)
+    except FileNotFoundError as err:
+        print(f"Error: {err}", file=sys.stderr)
+        return 2
+
+    try:
+        factory = connection_factory(args)
+    except ValueError as err:
+        print(f"Error: {err}", file=sys.stderr)
+        if not args.sqlite:
+            print(f"  {DB_ENV_EXAMPLE}", file=sys.stderr)
+        return 2
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    jobs = []
+    for sql_path, name in zip(sql_paths, job_names(sql_paths)):
+        path = output_path(args.outdir, name, args.format, timestamp)
+        if name != os.path.splitext(os.path.basename(sql_path))[0]:
+            print(f"⚠️  {sql_path}: output name taken by another query, exporting as {name}")
+        if args.staged and staged_variant(sql_path):
+            sql_path = staged_variant(sql_path)
+        jobs.append(ExportJob(name, load_sql_file(sql_path), path, sql_path=sql_path))
+
+    pool = ConnectionPool(factory, size=min(args.workers, len(jobs)))
+    print(f"🚀 Exporting {len(jobs)} queries with {pool.size} pooled connection(s)")
+    start = time.perf_counter()
+    try:
+        results = export_many(pool, jobs, fmt=args.format, batch_size=args.batch_size)
+    finally:
+        pool.close()
+    wall = time.perf_counter() - start
+
+    width = max(len(job.name) for job in jobs)
+    print(f"\n{'query':<{width}} {'rows':>10} {'seconds':>8} {'rows/s':>9}  output")
+    for r in results:
+        if r.ok:
+            s = r.stats
+            print(f"{r.job.name:<{width}} {s.rows:>10,} {s.seconds:>8.2f} {s.rows_per_sec:>9,.0f}  {s.path}")
+        else:
+            print(f"{r.job.name:<{width}} {'❌ failed':>10} {'':>8} {'':>9}  {r.error}")
+    serial = sum(r.stats.seconds for r in results if r.ok)
+    summary = write_summary(results, args.outdir, timestamp)
+    print(f"\n⏱️  Wall {wall:.2f}s vs {serial:.2f}s summed query time")
+    print(f"📝 Summary: {summary}")
+    return 0 if all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
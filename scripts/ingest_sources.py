@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Build (or refresh) the typed columnar cache for the CSV sources in data/.
+
+Each CSV is converted to an uncompressed Feather file under .cache/columnar/
+with dates parsed, low-cardinality columns stored as categoricals and
+Probability stored as a number. Sources whose CSV has not changed are skipped,
+so this is cheap to run before every notebook session or from cron.
+
+With --incremental the Domo-exported leave and Salesforce sources are also
+folded into their incremental stores (capacity.incremental): only batches
+appended since the last watermark are read and the monthly aggregates are
+patched in place.
+
+Usage examples:
+  python scripts/ingest_sources.py
+  python scripts/ingest_sources.py --sources vacation,salesforce --force
+  python scripts/ingest_sources.py --incremental
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+
+def resolve_project_root() -> str:
+    current_file = os.path.abspath(__file__)
+    project_root = os.path.dirname(os.path.dirname(current_file))
+    return project_root
+
+
+sys.path.insert(0, resolve_project_root())
+
+from capacity.incremental import INCREMENTAL_SPECS, IncrementalStore  # noqa: E402
+from capacity.sources import SOURCE_FILES, ColumnarCache  # noqa: E402
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert data/ CSV sources into typed Feather files")
+    parser.add_argument("--data-dir", default=os.path.join(resolve_project_root(), "data"), help="Directory with the CSV sources")
+    parser.add_argument("--cache-dir", default=None, help="Output directory (default: .cache/columnar next to data/)")
+    parser.add_argument("--sources", default="", help=f"Comma-separated subset of: {', '.join(SOURCE_FILES)}")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the CSV is unchanged")
+    parser.add_argument("--incremental", action="store_true", help="Also refresh the batch-watermark stores (vacation, salesforce)")
+    args = parser.parse_args(argv)
+
+    cache = ColumnarCache(args.data_dir, args.cache_dir)
+    names = [s.strip() for s in args.sources.split(",") if s.strip()] or list(SOURCE_FILES)
+    unknown = [n for n in names if n not in SOURCE_FILES]
+    if unknown:
+        print(f"Error: Unknown sources: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    for name in names:
+        if not os.path.exists(cache.csv_path(name)):
+            print(f"⏭️  {name}: {SOURCE_FILES[name]} not found, skipped")
+            continue
+        if not args.force and cache.is_fresh(name):
+            print(f"✅ {name}: up to date")
+            continue
+        t0 = time.perf_counter()
+        path = cache.build(name)
+        print(f"🔄 {name}: rebuilt {os.path.relpath(path)} in {time.perf_counter() - t0:.2f}s")
+
+    if args.incremental:
+        store = IncrementalStore(args.data_dir)
+        for name in names:
+            if name in INCREMENTAL_SPECS and os.path.exists(store.csv_path(name)):
+                print(f"📥 {store.refresh(name)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
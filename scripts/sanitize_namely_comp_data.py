@@ -12,22 +12,41 @@ Usage examples:
     --extra-exclude "gender,ethnicity" \
     --keep "employee id"
 
+  python scripts/sanitize_namely_comp_data.py --stream --format parquet --workers 4
+
 What it does:
   - Loads all sheets from the input Excel workbook
   - Drops columns whose names match default sensitive keywords (case-insensitive)
   - Optional: add more exclusions via --extra-exclude or protect columns via --keep
   - Writes sanitized workbook and a CSV report of removed columns per sheet
+
+Streaming mode (--stream):
+  - Decides the dropped columns from each sheet's header row alone
+  - Iterates rows read-only, keeping only the kept (and filter) columns, and
+    applies the Division / --min-start-date filters as rows stream in
+  - Writes with a write-only workbook (or CSV / Parquet per sheet via --format)
+  - Processes sheets in parallel worker processes (--workers); memory stays
+    bounded by --chunk-rows instead of the size of the workbook
 """
 
 from __future__ import annotations
 
 import argparse
+import os
+import pickle
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 
+OUTPUT_FORMATS: Tuple[str, ...] = ("xlsx", "csv", "parquet")
+
 DEFAULT_SENSITIVE_KEYWORDS: Tuple[str, ...] = (
     # Names and identifiers
     "name", "first name", "last name", "middle name", "preferred name", "legal name",
@@ -63,6 +82,10 @@ class SanitizeConfig:
     exclude_divisions: Tuple[str, ...]
     min_start_date: str
     dry_run: bool
+    stream: bool = False
+    output_format: str = "xlsx"
+    workers: int = 1
+    chunk_rows: int = 5000
 
 
 def parse_args() -> SanitizeConfig:
@@ -120,8 +143,33 @@ def parse_args() -> SanitizeConfig:
         action="store_true",
         help="Only print what would be removed, do not write files",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read-only row streaming with header-based column projection and a write-only writer",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="xlsx",
+        help="Output format: one workbook (xlsx) or one file per sheet (csv/parquet, stream mode only)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Sheets processed in parallel in stream mode (default: CPU count)",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=5000,
+        help="Rows buffered per chunk in stream mode",
+    )
 
     args = parser.parse_args()
+    if args.format != "xlsx" and not args.stream:
+        parser.error("--format csv/parquet requires --stream")
 
     input_path = Path(args.input).expanduser().resolve()
     output_path = Path(args.output).expanduser().resolve()
@@ -142,6 +190,10 @@ def parse_args() -> SanitizeConfig:
         exclude_divisions=exclude_div,
         min_start_date=str(args.min_start_date),
         dry_run=bool(args.dry_run),
+        stream=bool(args.stream),
+        output_format=args.format,
+        workers=max(1, int(args.workers)),
+        chunk_rows=max(1, int(args.chunk_rows)),
     )
 
 
@@ -252,6 +304,273 @@ def sanitize_workbook(cfg: SanitizeConfig) -> Tuple[
     return removed_by_sheet, kept_by_sheet, original_row_counts, kept_row_counts
 
 
+@dataclass
+class SheetResult:
+    sheet: str
+    removed: List[str]
+    kept: List[str]
+    original_rows: int
+    kept_rows: int
+    path: Optional[str] = None
+
+
+def header_names(header: Iterable[object]) -> List[str]:
+    """Column names as ``pd.read_excel`` would label them (``Unnamed: i``, ``name.1`` for repeats)."""
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            candidate = f"{name}.{seen[name]}"
+            while candidate in seen:
+                seen[name] += 1
+                candidate = f"{name}.{seen[name]}"
+            seen[candidate] = 0
+            name = candidate
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _row_filter(cfg: SanitizeConfig, names: List[str]):
+    """(predicate over the projected row, index of Start Date in it or None, source columns to read)."""
+    import pandas as pd
+
+    sources: List[int] = []
+    div_at = start_at = None
+    if "Division" in names:
+        div_at = len(sources)
+        sources.append(names.index("Division"))
+    if "Start Date" in names:
+        start_at = len(sources)
+        sources.append(names.index("Start Date"))
+
+    include = {v.lower() for v in cfg.include_divisions}
+    exclude = {v.lower() for v in cfg.exclude_divisions}
+    try:
+        min_date = pd.to_datetime(cfg.min_start_date)
+    except Exception:
+        # Same as the pandas path: unparsable minimum means no date filtering
+        min_date = None
+    parsed: Dict[object, object] = {}
+
+    def parse_date(value):
+        if value not in parsed:
+            stamp = pd.to_datetime(value, errors="coerce")
+            parsed[value] = None if pd.isna(stamp) else stamp.to_pydatetime()
+        return parsed[value]
+
+    def keep(values: List[object]) -> bool:
+        if div_at is not None and (include or exclude):
+            # pandas' astype(str) turns an empty cell into "nan"
+            division = "nan" if values[div_at] is None else str(values[div_at]).lower()
+            if include and division not in include:
+                return False
+            if not include and division in exclude:
+                return False
+        if start_at is not None:
+            value = values[start_at]
+            if not isinstance(value, datetime):
+                value = None if value is None else parse_date(value)
+                values[start_at] = value
+            if min_date is not None and (value is None or value < min_date):
+                return False
+        return True
+
+    return keep, start_at, sources
+
+
+def stream_sheet(cfg: SanitizeConfig, sheet: str, emit) -> SheetResult:
+    """
+    Stream one sheet: pick the columns from its header row, project each row to
+    those (plus the Division / Start Date filter columns) and hand kept rows to
+    ``emit(columns, rows)`` in chunks of ``cfg.chunk_rows``. Blank rows are
+    judged on the full row, like ``read_excel``.
+    """
+    from openpyxl import load_workbook
+
+    sensitive_keywords = DEFAULT_SENSITIVE_KEYWORDS + cfg.extra_exclude_keywords
+    wb = load_workbook(cfg.input_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet]
+        header = list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+        while header and header[-1] is None:
+            header.pop()
+        names = header_names(header)
+        drop_cols = sorted(compute_columns_to_drop(names, sensitive_keywords, cfg.keep_keywords))
+        kept_idx = [i for i, name in enumerate(names) if name not in drop_cols]
+        kept = [names[i] for i in kept_idx]
+
+        keep, start_at, filter_idx = _row_filter(cfg, names)
+        # Projected row = filter columns first, then the kept ones
+        sources = filter_idx + kept_idx
+        start_out = kept_idx.index(filter_idx[start_at]) if start_at is not None and filter_idx[start_at] in kept_idx else None
+        n_filter = len(filter_idx)
+
+        original = kept_rows = pending_empty = 0
+        chunk: List[tuple] = []
+        emit(kept, [])
+        # Full-width rows: openpyxl parses every cell of a row's XML either way, and a
+        # row whose only data is in dropped columns is not blank to read_excel
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            values = [row[o] if o < len(row) else None for o in sources]
+            if all(v is None for v in row):
+                # read_excel drops trailing blank rows; only count them once data follows
+                pending_empty += 1
+                continue
+            for _ in range(pending_empty):
+                original += 1
+                blank = [None] * len(sources)
+                if keep(blank):
+                    chunk.append(tuple(blank[n_filter:]))
+            pending_empty = 0
+            original += 1
+            if not keep(values):
+                continue
+            out = values[n_filter:]
+            if start_out is not None:
+                out[start_out] = values[start_at]
+            chunk.append(tuple(out))
+            if len(chunk) >= cfg.chunk_rows:
+                kept_rows += len(chunk)
+                emit(kept, chunk)
+                chunk = []
+        if chunk:
+            kept_rows += len(chunk)
+            emit(kept, chunk)
+    finally:
+        wb.close()
+    return SheetResult(sheet, drop_cols, kept, original, kept_rows)
+
+
+def sheet_output_path(cfg: SanitizeConfig, sheet: str) -> Path:
+    from capacity.sql_export import FORMATS
+
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in sheet)
+    return cfg.output_path.with_name(f"{cfg.output_path.stem}__{safe}{FORMATS[cfg.output_format]}")
+
+
+def _stream_sheet_worker(cfg: SanitizeConfig, sheet: str, spill_dir: Optional[str]) -> SheetResult:
+    """
+    Worker-process entry point. CSV / Parquet go straight to the per-sheet file;
+    xlsx rows are pickled chunk by chunk to ``spill_dir`` for the parent to
+    append to the single write-only workbook.
+    """
+    if cfg.dry_run:
+        return stream_sheet(cfg, sheet, lambda columns, rows: None)
+
+    if cfg.output_format == "xlsx":
+        fd, spill = tempfile.mkstemp(suffix=".pkl", dir=spill_dir)
+        with os.fdopen(fd, "wb") as f:
+            result = stream_sheet(cfg, sheet, lambda columns, rows: pickle.dump(rows, f, pickle.HIGHEST_PROTOCOL))
+        result.path = spill
+        return result
+
+    from capacity.sql_export import open_writer
+
+    path = sheet_output_path(cfg, sheet)
+    tmp = path.with_name(path.name + ".tmp")
+    writer = None
+
+    def emit(columns, rows):
+        nonlocal writer
+        if writer is None:
+            writer = open_writer(str(tmp), columns, cfg.output_format)
+        if rows:
+            writer.write(rows)
+
+    try:
+        result = stream_sheet(cfg, sheet, emit)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, path)
+    result.path = str(path)
+    return result
+
+
+def write_report(cfg: SanitizeConfig, results: List[SheetResult]) -> None:
+    import csv
+    with cfg.report_path.open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sheet", "removed_columns", "original_rows", "kept_rows"])
+        for r in results:
+            writer.writerow([r.sheet, "; ".join(map(str, r.removed)), r.original_rows, r.kept_rows])
+
+
+def sanitize_workbook_streaming(cfg: SanitizeConfig) -> Tuple[
+    Dict[str, List[str]],
+    Dict[str, List[str]],
+    Dict[str, int],
+    Dict[str, int],
+]:
+    """
+    Same result as sanitize_workbook without loading whole sheets: rows are
+    streamed read-only through the column projection and filters, sheets run
+    in up to ``cfg.workers`` processes, and output goes to a write-only
+    workbook or to one CSV / Parquet file per sheet.
+    """
+    from openpyxl import Workbook, load_workbook
+
+    wb = load_workbook(cfg.input_path, read_only=True)
+    sheets = list(wb.sheetnames)
+    wb.close()
+
+    workers = max(1, min(cfg.workers, len(sheets)))
+    direct_xlsx = cfg.output_format == "xlsx" and not cfg.dry_run and workers == 1
+    out_wb = Workbook(write_only=True) if cfg.output_format == "xlsx" and not cfg.dry_run else None
+
+    results: List[SheetResult] = []
+    with tempfile.TemporaryDirectory(dir=cfg.output_path.parent) as spill_dir:
+        if direct_xlsx:
+            for sheet in sheets:
+                ws = out_wb.create_sheet(sheet)
+
+                def emit(columns, rows, ws=ws):
+                    if not rows:
+                        ws.append(columns)
+                    for row in rows:
+                        ws.append(row)
+
+                results.append(stream_sheet(cfg, sheet, emit))
+        elif workers == 1:
+            results = [_stream_sheet_worker(cfg, sheet, spill_dir) for sheet in sheets]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_stream_sheet_worker, cfg, sheet, spill_dir) for sheet in sheets]
+                results = [f.result() for f in futures]
+
+        if out_wb is not None:
+            if not direct_xlsx:
+                for result in results:
+                    ws = out_wb.create_sheet(result.sheet)
+                    ws.append(result.kept)
+                    with open(result.path, "rb") as f:
+                        while True:
+                            try:
+                                rows = pickle.load(f)
+                            except EOFError:
+                                break
+                            for row in rows:
+                                ws.append(row)
+                    result.path = str(cfg.output_path)
+            tmp = cfg.output_path.with_name(cfg.output_path.name + ".tmp")
+            out_wb.save(tmp)
+            os.replace(tmp, cfg.output_path)
+
+    if not cfg.dry_run:
+        write_report(cfg, results)
+
+    return (
+        {r.sheet: r.removed for r in results},
+        {r.sheet: list(map(str, r.kept)) for r in results},
+        {r.sheet: r.original_rows for r in results},
+        {r.sheet: r.kept_rows for r in results},
+    )
+
+
 def main() -> None:
     cfg = parse_args()
     if not cfg.input_path.exists():
@@ -263,7 +582,8 @@ def main() -> None:
     except Exception:
         sys.exit(3)
 
-    removed_by_sheet, kept_by_sheet, original_row_counts, kept_row_counts = sanitize_workbook(cfg)
+    run = sanitize_workbook_streaming if cfg.stream else sanitize_workbook
+    removed_by_sheet, kept_by_sheet, original_row_counts, kept_row_counts = run(cfg)
 
     # Console summary
     print("Sensitive keyword defaults:")
@@ -286,7 +606,11 @@ def main() -> None:
     if cfg.dry_run:
         print("Dry run complete. No files written.")
     else:
-        print(f"Sanitized workbook written to: {cfg.output_path}")
+        if cfg.output_format == "xlsx":
+            print(f"Sanitized workbook written to: {cfg.output_path}")
+        else:
+            for sheet in removed_by_sheet:
+                print(f"Sanitized sheet written to:   {sheet_output_path(cfg, sheet)}")
         print(f"Removal report written to:    {cfg.report_path}")
 
 